@@ -1,3 +1,6 @@
+import json
+import time
+
 import pandas as pd
 import numpy as np
 import joblib
@@ -18,6 +21,15 @@ BEST_THRESHOLD = 0.45
 ROC_CURVE_PATH = "docs/images/roc_curve_ohe_new.png"
 CONF_MATRIX_PATH = "docs/images/confusion_matrix_ohe_new.png"
 
+# 评估产物：供 pages/5_model_documentation.py 直接读取，页面无需加载模型和数据
+EVALUATION_ARTIFACT_PATH = "analysis/models/evaluation_ohe_new.json"
+
+# 混淆矩阵的阈值网格（另外总会包含 BEST_THRESHOLD）
+ARTIFACT_THRESHOLDS = np.round(np.arange(0.05, 1.0, 0.05), 2)
+
+# ROC 曲线简化后保留的最大顶点数
+ROC_MAX_POINTS = 64
+
 # 关键：定义分类列，必须与训练脚本中的 load_data_with_ohe 函数保持一致
 CATEGORY_COLS = ['Pregnancies_category', 'BMI_category', 'Age_category']
 
@@ -114,11 +126,94 @@ def plot_and_save_visualizations(model, X_test, Y_test, best_t):
     print(f"✅ ROC曲线图表已更新至: {ROC_CURVE_PATH}")
 
 
+def simplify_curve(x, y, max_points=ROC_MAX_POINTS):
+    """
+    贪心地保留偏离当前折线最远的点（Douglas-Peucker 的迭代形式），
+    直到顶点数达到 max_points 或剩余点都已落在折线上；首尾两点总会保留。
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if len(x) <= max_points:
+        return x, y
+
+    keep = [0, len(x) - 1]
+    while len(keep) < max_points:
+        keep.sort()
+        best_dist, best_idx = 0.0, None
+        for start, end in zip(keep[:-1], keep[1:]):
+            if end - start < 2:
+                continue
+            seg_x, seg_y = x[end] - x[start], y[end] - y[start]
+            px, py = x[start + 1:end] - x[start], y[start + 1:end] - y[start]
+            norm = np.hypot(seg_x, seg_y) or 1.0
+            dist = np.abs(seg_x * py - seg_y * px) / norm
+            i = int(dist.argmax())
+            if dist[i] > best_dist:
+                best_dist, best_idx = dist[i], start + 1 + i
+        if best_idx is None or best_dist < 1e-9:
+            break
+        keep.append(best_idx)
+
+    keep.sort()
+    return x[keep], y[keep]
+
+
+def build_evaluation_artifact(model, X_test, Y_test, best_t):
+    """汇总测试集评估结果：各阈值的混淆矩阵、简化后的 ROC 曲线、AUC 与模型系数"""
+    Y_true = np.asarray(Y_test).astype(int)
+    Y_proba = model.predict_proba(X_test)[:, 1]
+
+    thresholds = sorted(set(ARTIFACT_THRESHOLDS.tolist()) | {float(best_t)})
+    matrices = []
+    for t in thresholds:
+        tn, fp, fn, tp = confusion_matrix(Y_true, (Y_proba >= t).astype(int), labels=[0, 1]).ravel()
+        matrices.append({
+            'threshold': round(float(t), 4),
+            'tn': int(tn), 'fp': int(fp), 'fn': int(fn), 'tp': int(tp),
+            'accuracy': float((tp + tn) / len(Y_true)),
+            'precision': float(tp / (tp + fp)) if tp + fp else 0.0,
+            'recall': float(tp / (tp + fn)) if tp + fn else 0.0,
+            'specificity': float(tn / (tn + fp)) if tn + fp else 0.0,
+        })
+
+    fpr, tpr, _ = roc_curve(Y_true, Y_proba)
+    roc_fpr, roc_tpr = simplify_curve(fpr, tpr)
+
+    return {
+        'model_path': MODEL_PATH,
+        'test_data_path': TEST_DATA_PATH,
+        'generated_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'n_test': int(len(Y_true)),
+        'n_positive': int(Y_true.sum()),
+        'auc': float(roc_auc_score(Y_true, Y_proba)),
+        'best_threshold': float(best_t),
+        'confusion_matrices': matrices,
+        'roc': {
+            'fpr': [round(float(v), 5) for v in roc_fpr],
+            'tpr': [round(float(v), 5) for v in roc_tpr],
+            'original_points': int(len(fpr)),
+        },
+        'intercept': float(model.intercept_[0]),
+        'coefficients': {
+            name: float(coef) for name, coef in zip(model.feature_names_in_, model.coef_[0])
+        },
+    }
+
+
+def save_evaluation_artifact(artifact, path=EVALUATION_ARTIFACT_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(artifact, f, ensure_ascii=False, indent=2)
+    print(f"✅ 评估产物已保存至: {path}（ROC {artifact['roc']['original_points']} -> "
+          f"{len(artifact['roc']['fpr'])} 个顶点）")
+
+
 if __name__ == "__main__":
     print("--- 启动模型可视化脚本 ---")
     model, X_test, Y_test = load_model_and_data(MODEL_PATH, TEST_DATA_PATH)
 
     if model is not None and X_test is not None and Y_test is not None:
         plot_and_save_visualizations(model, X_test, Y_test, BEST_THRESHOLD)
+        save_evaluation_artifact(build_evaluation_artifact(model, X_test, Y_test, BEST_THRESHOLD))
     else:
         print("脚本执行失败，请检查文件路径和数据完整性。")
\ No newline at end of file
@@ -0,0 +1,263 @@
+"""
+糖尿病预测项目 - 多模型并行对比
+功能: 只读取和编码一次数据，放入共享内存作为只读矩阵，
+      在进程池中并发训练和评估 4_classification_model*.py 与 Ridge Regression.py 中的候选模型，
+      最后在主进程中依次测量每个模型的单条/批量预测延迟，输出一张统一的指标表。
+      只有阈值不同的候选（LR_OHE 与 LR_OHE_new）共用一次训练，在表中按各自阈值分行列出。
+
+用法（在项目根目录执行）:
+    python analysis/6_model_comparison.py
+    python analysis/6_model_comparison.py --models LR_OHE NB --workers 2
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression, Ridge
+from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score, roc_auc_score
+from sklearn.model_selection import GridSearchCV
+from sklearn.naive_bayes import GaussianNB
+
+# =================================================================
+# ⭐⭐⭐ 对比配置区 ⭐⭐⭐
+# =================================================================
+
+TRAIN_DATA_PATH = "data/processed/diabetes_train_normalized.csv"
+TEST_DATA_PATH = "data/processed/diabetes_test_normalized.csv"
+COMPARISON_REPORT_PATH = "docs/model_comparison.csv"
+
+TARGET_COL = 'Outcome'
+NUMERIC_FEATURES = [
+    'Pregnancies', 'Glucose', 'BloodPressure', 'SkinThickness',
+    'Insulin', 'BMI', 'DiabetesPedigreeFunction', 'Age'
+]
+CATEGORY_COLS = ['Pregnancies_category', 'BMI_category', 'Age_category']
+
+# 与 src/model_predictor.py 的 OPTIMAL_THRESHOLD 一致
+OPTIMAL_THRESHOLD = 0.45
+
+# 延迟测量：单条预测的采样次数
+LATENCY_SAMPLES = 200
+
+# 候选模型：特征集（numeric / ohe）、决策阈值，与对应的分析脚本保持一致；
+# fit 指向另一个候选时表示模型与特征完全相同、只有阈值不同，直接复用其训练结果
+MODEL_SPECS = {
+    'LR': {'script': '4_classification_model.py', 'features': 'numeric', 'threshold': 0.50},
+    'NB': {'script': '4_classification_model_nb.py', 'features': 'ohe', 'threshold': 0.50},
+    'LR_OHE': {'script': '4_classification_model_ohe.py', 'features': 'ohe', 'threshold': 0.50},
+    'LR_OHE_new': {'script': '4_classification_model_ohe_new.py', 'features': 'ohe',
+                   'threshold': OPTIMAL_THRESHOLD, 'fit': 'LR_OHE'},
+    'Ridge': {'script': 'Ridge Regression.py', 'features': 'numeric', 'threshold': 0.50},
+}
+
+
+def fit_name(name):
+    """候选模型实际对应的训练任务名"""
+    return MODEL_SPECS[name].get('fit', name)
+
+
+def build_estimator(name):
+    """与各脚本相同的模型与调参网格；进程池内部 n_jobs=1，避免与外层并发争抢 CPU"""
+    if name == 'NB':
+        return GaussianNB()
+    if name == 'Ridge':
+        return GridSearchCV(Ridge(random_state=42), {'alpha': [0.01, 0.1, 1.0, 10.0, 100.0]},
+                            cv=5, scoring='neg_mean_squared_error', n_jobs=1)
+    return GridSearchCV(LogisticRegression(solver='liblinear', random_state=42),
+                        {'C': np.logspace(-4, 4, 20), 'penalty': ['l1', 'l2']},
+                        cv=5, scoring='roc_auc', n_jobs=1)
+
+
+def positive_scores(model, X):
+    """统一的阳性得分：分类器取 predict_proba，Ridge 的 0-100 风险评分换算回 0-1"""
+    if hasattr(model, 'predict_proba'):
+        return model.predict_proba(X)[:, 1]
+    return np.clip(model.predict(X) / 100.0, 0.0, 1.0)
+
+
+# =================================================================
+# 数据：编码一次，放入共享内存
+# =================================================================
+
+def load_encoded_data(train_path=TRAIN_DATA_PATH, test_path=TEST_DATA_PATH):
+    """
+    读取训练/测试集并做一次 OHE（drop_first=True，与各脚本一致），
+    返回 (矩阵, 列名, 训练行数)。矩阵最后一列为 Outcome，训练集在前、测试集在后。
+    """
+    df_train = pd.read_csv(train_path)
+    df_test = pd.read_csv(test_path)
+
+    # 合并后统一编码，保证训练集和测试集的 OHE 列一致
+    combined = pd.get_dummies(pd.concat([df_train, df_test], ignore_index=True),
+                              columns=CATEGORY_COLS, drop_first=True)
+    ohe_cols = sorted(col for col in combined.columns if col not in NUMERIC_FEATURES + [TARGET_COL])
+    columns = NUMERIC_FEATURES + ohe_cols + [TARGET_COL]
+
+    return combined[columns].to_numpy(dtype=np.float64), columns, len(df_train)
+
+
+def _attach(shm_name, shape):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    matrix = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    matrix.flags.writeable = False
+    return shm, matrix
+
+
+def _split(matrix, columns, n_train, feature_set):
+    if feature_set == 'numeric':
+        idx = [columns.index(col) for col in NUMERIC_FEATURES]
+    else:
+        idx = list(range(len(columns) - 1))
+    feature_names = [columns[i] for i in idx]
+
+    X = pd.DataFrame(matrix[:, idx], columns=feature_names)
+    y = matrix[:, -1].astype(int)
+    return X.iloc[:n_train], y[:n_train], X.iloc[n_train:].reset_index(drop=True), y[n_train:]
+
+
+# =================================================================
+# 进程池任务
+# =================================================================
+
+def train_and_evaluate(name, row_names, shm_name, shape, columns, n_train):
+    """
+    在子进程中训练一个模型，并按 row_names 中各候选的阈值分别评估，
+    返回 ([各候选的指标], 训练好的模型)
+    """
+    shm, matrix = _attach(shm_name, shape)
+    try:
+        X_train, y_train, X_test, y_test = _split(matrix, columns, n_train, MODEL_SPECS[name]['features'])
+
+        estimator = build_estimator(name)
+        start = time.perf_counter()
+        # Ridge 与原脚本一致，以 Outcome × 100 作为风险评分回归目标
+        estimator.fit(X_train, y_train * 100 if name == 'Ridge' else y_train)
+        fit_seconds = time.perf_counter() - start
+
+        model = getattr(estimator, 'best_estimator_', estimator)
+        best_params = getattr(estimator, 'best_params_', {})
+
+        scores = positive_scores(model, X_test)
+        auc = roc_auc_score(y_test, scores)
+
+        rows = []
+        for row_name in row_names:
+            spec = MODEL_SPECS[row_name]
+            y_pred = (scores >= spec['threshold']).astype(int)
+            rows.append({
+                '模型': row_name,
+                '来源脚本': spec['script'],
+                '特征数': X_train.shape[1],
+                '阈值': spec['threshold'],
+                'AUC': auc,
+                'Accuracy': accuracy_score(y_test, y_pred),
+                'Recall': recall_score(y_test, y_pred, zero_division=0),
+                'Precision': precision_score(y_test, y_pred, zero_division=0),
+                'F1': f1_score(y_test, y_pred, zero_division=0),
+                '训练耗时_s': fit_seconds,
+                '最佳参数': str({k: (round(v, 4) if isinstance(v, float) else v) for k, v in best_params.items()}),
+            })
+        return rows, model
+    finally:
+        # 只解除映射，共享内存由主进程负责释放
+        shm.close()
+
+
+# =================================================================
+# 延迟测量（主进程依次执行，避免并发训练干扰计时）
+# =================================================================
+
+def measure_latency(model, X_test, samples=LATENCY_SAMPLES):
+    """返回 (单条预测 p50 微秒, 批量预测每条微秒)"""
+    rows = [X_test.iloc[[i % len(X_test)]] for i in range(samples)]
+    positive_scores(model, rows[0])  # 预热
+
+    single = []
+    for row in rows:
+        start = time.perf_counter()
+        positive_scores(model, row)
+        single.append(time.perf_counter() - start)
+
+    batch = pd.concat([X_test] * max(1, 10000 // len(X_test)), ignore_index=True)
+    start = time.perf_counter()
+    positive_scores(model, batch)
+    batch_seconds = time.perf_counter() - start
+
+    return np.median(single) * 1e6, batch_seconds / len(batch) * 1e6
+
+
+def compare_models(names=None, workers=None, train_path=TRAIN_DATA_PATH, test_path=TEST_DATA_PATH):
+    """并行训练评估全部候选模型，返回统一指标表"""
+    names = list(MODEL_SPECS) if not names else names
+    unknown = [n for n in names if n not in MODEL_SPECS]
+    if unknown:
+        raise ValueError(f"未知模型: {unknown}，可选: {list(MODEL_SPECS)}")
+
+    # 训练任务 -> 共用该次训练的候选（保持请求顺序）
+    fits = {}
+    for name in names:
+        fits.setdefault(fit_name(name), []).append(name)
+
+    matrix, columns, n_train = load_encoded_data(train_path, test_path)
+    print(f"数据编码完成: {matrix.shape[0]} 行 × {len(columns) - 1} 个特征（训练集 {n_train} 行）")
+
+    shm = shared_memory.SharedMemory(create=True, size=matrix.nbytes)
+    try:
+        np.ndarray(matrix.shape, dtype=np.float64, buffer=shm.buf)[:] = matrix
+
+        workers = workers or min(len(fits), os.cpu_count() or 1)
+        results, models = [], {}
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(train_and_evaluate, name, row_names, shm.name, matrix.shape, columns, n_train): name
+                for name, row_names in fits.items()
+            }
+            for future in as_completed(futures):
+                rows, model = future.result()
+                print(f"  ✓ {'、'.join(row['模型'] for row in rows)}: AUC={rows[0]['AUC']:.4f}，"
+                      f"训练 {rows[0]['训练耗时_s']:.2f}s")
+                results.extend(rows)
+                models[futures[future]] = model
+        print(f"并行训练总耗时: {time.perf_counter() - start:.2f}s（{workers} 个进程）")
+    finally:
+        shm.close()
+        shm.unlink()
+
+    latency = {}
+    for name, model in models.items():
+        _, _, X_test, _ = _split(matrix, columns, n_train, MODEL_SPECS[name]['features'])
+        latency[name] = measure_latency(model, X_test)
+    for metrics in results:
+        metrics['单条预测_us'], metrics['批量每条_us'] = latency[fit_name(metrics['模型'])]
+
+    table = pd.DataFrame(results).set_index('模型').loc[names]
+    return table[['来源脚本', '特征数', '阈值', 'AUC', 'Accuracy', 'Recall', 'Precision', 'F1',
+                  '训练耗时_s', '单条预测_us', '批量每条_us', '最佳参数']]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="多模型并行训练与对比")
+    parser.add_argument('--models', nargs='+', default=None, help=f"候选模型，默认全部: {list(MODEL_SPECS)}")
+    parser.add_argument('--workers', type=int, default=None, help="进程数，默认 min(训练任务数, CPU 核数)")
+    parser.add_argument('-o', '--output', default=COMPARISON_REPORT_PATH, help="对比结果 CSV")
+    args = parser.parse_args()
+
+    table = compare_models(args.models, args.workers)
+
+    print("\n=== 模型对比 ===")
+    with pd.option_context('display.width', 200, 'display.max_columns', None):
+        print(table.round(4).to_string())
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    table.to_csv(args.output, encoding='utf-8-sig')
+    print(f"\n对比结果已保存至: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
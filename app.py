@@ -18,6 +18,11 @@ st.set_page_config(
 # 添加项目根目录到Python路径
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+# 启动预热：后台加载模型、参数、字体和图表库，首个用户不再承担冷启动开销
+from src.warmup import start_warmup
+
+start_warmup()
+
 # 活泼现代的CSS样式
 st.markdown("""
 <style>
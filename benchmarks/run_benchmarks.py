@@ -0,0 +1,356 @@
+"""
+糖尿病预测项目 - 性能基准测试
+功能: 在合成数据集上测量预测热路径（preprocess_data、predict_risk、批量筛查评分）、
+      data_pre_process 各阶段脚本和 analysis 训练脚本的耗时，结果保存为 JSON，
+      便于在不同版本之间对比性能回归。
+
+用法（在项目根目录执行）:
+    python benchmarks/run_benchmarks.py                          # 默认 1K / 100K 行
+    python benchmarks/run_benchmarks.py --sizes 1000 100000 10000000
+    python benchmarks/run_benchmarks.py --skip-scripts           # 只测进程内热路径
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/上一版本.json
+
+说明:
+    - 脚本阶段在临时目录中按原样运行（复制脚本 + 合成 data/raw/diabetes.csv），不会改动仓库数据；
+    - 3_fill_missing_value.py 等逐行处理的脚本在 10M 行下耗时很长，可用 --script-timeout 限制；
+    - --compare 发现回归时以退出码 1 结束，可直接作为发布前的检查步骤；
+    - 基准耗时远超单元测试，且要在临时目录中以子进程运行整条流程，因此是独立脚本，不放在 tests/ 中。
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+warnings.filterwarnings('ignore')
+
+# =================================================================
+# ⭐⭐⭐ 基准配置区 ⭐⭐⭐
+# =================================================================
+
+RAW_DATA_PATH = os.path.join(ROOT_DIR, "data", "raw", "diabetes.csv")
+RESULTS_DIR = os.path.join(ROOT_DIR, "benchmarks", "results")
+
+DEFAULT_SIZES = [1000, 100000]
+
+# 进程内基准的重复次数（取中位数）
+DEFAULT_REPEATS = 5
+
+# 单条预测基准的调用次数
+SINGLE_ROW_CALLS = 200
+
+# 数据预处理流水线（按执行顺序），每一步读取上一步的输出
+PIPELINE_SCRIPTS = [
+    "data_pre_process/1_missing_value_detection.py",
+    "data_pre_process/2_data_categorization.py",
+    "data_pre_process/3_fill_missing_value.py",
+    "data_pre_process/4_outlier_detection.py",
+    "data_pre_process/5_eliminate_outlier.py",
+    "data_pre_process/6_test_unique.py",
+    "data_pre_process/7_data_sampling.py",
+    "data_pre_process/8_normalization.py",
+    "data_pre_process/9_group_summary.py",
+    "data_pre_process/10_contingency_table.py",
+]
+
+# 训练脚本: (脚本路径, 运行目录)。Ridge 脚本使用 ../data 相对路径，需要在 analysis/ 下运行
+TRAINING_SCRIPTS = [
+    ("analysis/4_classification_model.py", "."),
+    ("analysis/4_classification_model_nb.py", "."),
+    ("analysis/4_classification_model_ohe.py", "."),
+    ("analysis/4_classification_model_ohe_new.py", "."),
+    ("analysis/Ridge Regression.py", "analysis"),
+]
+
+# 相对上次结果变慢超过该比例时标记为回归
+REGRESSION_TOLERANCE = 1.2
+
+
+# =================================================================
+# 合成数据
+# =================================================================
+
+def make_synthetic_dataset(n_rows, seed=42):
+    """用合成人群生成器按 Pima 分布生成 n_rows 行（包含 0 值缺失模式）"""
+    from src.synthetic_population import generate_population
+    return generate_population(n_rows, seed=seed, raw_path=RAW_DATA_PATH)
+
+
+# =================================================================
+# 计时工具
+# =================================================================
+
+def time_call(func, repeats):
+    """重复执行 func，返回每次耗时（秒）"""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def make_record(name, size, timings, rows=None, status="ok"):
+    """整理单项基准结果；rows 为每次执行处理的行数，用于计算吞吐量"""
+    record = {'name': name, 'size': size, 'status': status, 'repeats': len(timings)}
+    if timings:
+        median = statistics.median(timings)
+        record.update({
+            'min_s': min(timings),
+            'median_s': median,
+            'mean_s': statistics.mean(timings),
+        })
+        if rows:
+            record['rows_per_s'] = rows / median if median > 0 else None
+    return record
+
+
+def print_record(record):
+    if record['status'] != 'ok':
+        print(f"  {record['name']:<45} size={record['size']:<10} {record['status']}")
+        return
+    throughput = f"{record['rows_per_s']:,.0f} 行/秒" if record.get('rows_per_s') else ""
+    print(f"  {record['name']:<45} size={record['size']:<10} 中位数 {record['median_s'] * 1000:10.2f} ms  {throughput}")
+
+
+# =================================================================
+# 进程内热路径
+# =================================================================
+
+def bench_single_row(repeats):
+    """单条预测：preprocess_data、predict_risk（未命中缓存 / 命中缓存）"""
+    from src.model_predictor import (
+        load_model, load_standardization_params, predict_risk, preprocess_data, prediction_cache
+    )
+
+    # 预热：模型和标准化参数加载不计入单次预测耗时
+    load_model()
+    load_standardization_params()
+
+    sample = make_synthetic_dataset(SINGLE_ROW_CALLS, seed=0).to_dict('records')
+
+    def run_preprocess():
+        for row in sample:
+            preprocess_data(row)
+
+    def run_predict_uncached():
+        for row in sample:
+            prediction_cache.clear()
+            predict_risk(row)
+
+    def run_predict_cached():
+        for row in sample:
+            predict_risk(row)
+
+    records = []
+    for name, func in [("preprocess_data", run_preprocess),
+                       ("predict_risk (未命中缓存)", run_predict_uncached),
+                       ("predict_risk (命中缓存)", run_predict_cached)]:
+        timings = [t / SINGLE_ROW_CALLS for t in time_call(func, repeats)]
+        records.append(make_record(name, 1, timings, rows=1))
+    return records
+
+
+def bench_batch(size, repeats):
+    """批量路径：preprocess_batch、predict_risk_batch、批量筛查页面的完整评分"""
+    from src.model_predictor import preprocess_batch, predict_risk_batch, top_risk_drivers
+
+    df = make_synthetic_dataset(size)
+
+    def run_screening():
+        # 与 pages/2_batch_screening.py 的评分步骤一致
+        scores = predict_risk_batch(df, explain=True)
+        contrib_cols = [col for col in scores.columns if col.startswith('contrib_')]
+        top_risk_drivers(scores[contrib_cols])
+
+    records = []
+    for name, func in [("preprocess_batch", lambda: preprocess_batch(df)),
+                       ("predict_risk_batch", lambda: predict_risk_batch(df)),
+                       ("batch_screening_scoring", run_screening)]:
+        records.append(make_record(name, size, time_call(func, repeats), rows=size))
+    return records
+
+
+# =================================================================
+# 脚本阶段（在临时目录中原样运行）
+# =================================================================
+
+def prepare_sandbox(size):
+    """创建与项目结构一致的临时目录，写入合成原始数据并复制脚本"""
+    sandbox = tempfile.mkdtemp(prefix="diabetes_bench_")
+    for sub in ["data/raw", "data/processed", "data_pre_process", "data_analysis",
+                "analysis/models", "docs/images"]:
+        os.makedirs(os.path.join(sandbox, sub), exist_ok=True)
+
+    make_synthetic_dataset(size).to_csv(os.path.join(sandbox, "data", "raw", "diabetes.csv"), index=False)
+
+    for script in PIPELINE_SCRIPTS + [s for s, _ in TRAINING_SCRIPTS]:
+        shutil.copy(os.path.join(ROOT_DIR, script), os.path.join(sandbox, script))
+    return sandbox
+
+
+def run_script(sandbox, script, cwd, timeout):
+    """运行单个脚本，返回 (耗时秒, 状态)"""
+    env = dict(os.environ, MPLBACKEND="Agg", PYTHONWARNINGS="ignore")
+    start = time.perf_counter()
+    try:
+        result = subprocess.run(
+            [sys.executable, os.path.join(sandbox, script)],
+            cwd=os.path.join(sandbox, cwd), env=env, timeout=timeout,
+            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+        )
+    except subprocess.TimeoutExpired:
+        return time.perf_counter() - start, "timeout"
+
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        last_line = result.stderr.decode('utf-8', errors='replace').strip().splitlines()[-1:] or [""]
+        return elapsed, "failed: " + last_line[0]
+    return elapsed, "ok"
+
+
+def bench_scripts(size, timeout, include_training):
+    """依次运行预处理流水线和训练脚本；某一步失败后，依赖其输出的后续步骤标记为 skipped"""
+    sandbox = prepare_sandbox(size)
+    records = []
+    broken = False
+
+    try:
+        stages = [(s, ".") for s in PIPELINE_SCRIPTS]
+        if include_training:
+            stages += TRAINING_SCRIPTS
+
+        for script, cwd in stages:
+            if broken:
+                records.append(make_record(script, size, [], status="skipped"))
+                continue
+            elapsed, status = run_script(sandbox, script, cwd, timeout)
+            if status == "ok":
+                records.append(make_record(script, size, [elapsed], rows=size))
+            else:
+                records.append(make_record(script, size, [], status=status))
+                # 训练脚本之间相互独立，只有流水线内的失败会阻断后续步骤
+                broken = script in PIPELINE_SCRIPTS
+            print_record(records[-1])
+    finally:
+        shutil.rmtree(sandbox, ignore_errors=True)
+
+    return records
+
+
+# =================================================================
+# 结果保存与对比
+# =================================================================
+
+def environment_info():
+    """记录运行环境，便于判断两次结果是否可比"""
+    info = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+    }
+    try:
+        import sklearn
+        info['sklearn'] = sklearn.__version__
+    except ImportError:
+        pass
+    try:
+        info['git_commit'] = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        pass
+    return info
+
+
+def compare_results(current, baseline_path):
+    """与历史结果逐项对比中位数耗时，超过 REGRESSION_TOLERANCE 的标记为回归"""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)
+
+    previous = {(r['name'], r['size']): r for r in baseline['results'] if r['status'] == 'ok'}
+
+    print("\n" + "=" * 80)
+    print(f"与基线对比: {baseline_path}")
+    print("=" * 80)
+
+    regressions = 0
+    for record in current['results']:
+        old = previous.get((record['name'], record['size']))
+        if record['status'] != 'ok' or old is None:
+            continue
+        ratio = record['median_s'] / old['median_s'] if old['median_s'] > 0 else float('inf')
+        flag = "⚠️ 回归" if ratio > REGRESSION_TOLERANCE else ""
+        regressions += bool(flag)
+        print(f"  {record['name']:<45} size={record['size']:<10} {ratio:6.2f}x  {flag}")
+
+    print(f"\n共 {regressions} 项回归（阈值 {REGRESSION_TOLERANCE:.1f}x）")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="糖尿病预测项目性能基准测试")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="合成数据集行数")
+    parser.add_argument('--repeats', type=int, default=DEFAULT_REPEATS, help="进程内基准的重复次数")
+    parser.add_argument('--skip-scripts', action='store_true', help="跳过 data_pre_process 和训练脚本")
+    parser.add_argument('--skip-training', action='store_true', help="跳过 analysis 训练脚本")
+    parser.add_argument('--script-timeout', type=float, default=None, help="单个脚本的超时时间（秒）")
+    parser.add_argument('--output', default=None, help="结果 JSON 路径，默认写入 benchmarks/results/")
+    parser.add_argument('--compare', default=None, help="与之前的结果 JSON 对比")
+    args = parser.parse_args()
+
+    # 模型与数据路径均相对项目根目录
+    os.chdir(ROOT_DIR)
+
+    results = []
+
+    print("\n[单条预测]")
+    for record in bench_single_row(args.repeats):
+        print_record(record)
+        results.append(record)
+
+    for size in args.sizes:
+        print(f"\n[批量路径] {size:,} 行")
+        for record in bench_batch(size, args.repeats):
+            print_record(record)
+            results.append(record)
+
+        if not args.skip_scripts:
+            print(f"\n[脚本阶段] {size:,} 行")
+            results.extend(bench_scripts(size, args.script_timeout, not args.skip_training))
+
+    report = {
+        'timestamp': pd.Timestamp.now().isoformat(timespec='seconds'),
+        'environment': environment_info(),
+        'results': results,
+    }
+
+    output_path = args.output or os.path.join(
+        RESULTS_DIR, f"benchmark_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n基准结果已保存至: {output_path}")
+
+    if args.compare and compare_results(report, args.compare) > 0:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,18 @@
 import pandas as pd
 import numpy as np
 import os
+import sys
 
-# -------------------------
-#   加载数据
-# -------------------------
-base_dir = os.path.dirname(os.path.dirname(__file__))
-csv_path = os.path.join(base_dir, "data", "processed", "diabetes_with_categories.csv")
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, base_dir)
 
-print(f"正在加载数据集：{csv_path}")
-df = pd.read_csv(csv_path)
+from src.streaming_stats import parse_streaming_args
 
-print(f"数据形状：{df.shape}")
-print(f"数据列：{list(df.columns)}")
+args = parse_streaming_args("按年龄组中位数填充 0 值")
+
+csv_path = os.path.join(base_dir, "data", "processed", "diabetes_with_categories.csv")
+output_path = os.path.join(base_dir, "data", "processed", "diabetes_filled_by_age.csv")
+report_path = os.path.join(base_dir, "data_pre_process", "zero_filling_report.txt")
 
 # -------------------------
 #   定义需要处理的列
@@ -26,6 +26,103 @@ zero_to_fill_cols = [
     'Insulin'  # 胰岛素
 ]
 
+
+def run_streaming():
+    """第一遍用草图估计各年龄组非0值中位数，第二遍逐块填充并追加写出"""
+    from src.streaming_stats import (
+        QuantileSketch, RunningMoments, group_median_sketches, iter_csv_chunks
+    )
+
+    print(f"正在流式加载数据集：{csv_path}（块大小 {args.chunk_size:,}，秩误差约 {args.epsilon}）")
+    grouped, overall, total_rows = group_median_sketches(
+        iter_csv_chunks(csv_path, args.chunk_size), 'Age_category', zero_to_fill_cols, epsilon=args.epsilon)
+
+    # 该年龄组没有非0值时使用全局中位数（与整表模式一致）
+    age_groups = list(dict.fromkeys(g for col in zero_to_fill_cols for g in grouped[col].sketches))
+    age_group_medians = {
+        age_group: {
+            col: (grouped[col].sketches[age_group].median() if age_group in grouped[col].sketches
+                  else overall[col].median())
+            for col in zero_to_fill_cols
+        }
+        for age_group in age_groups
+    }
+
+    print("\n按年龄组计算中位数（草图近似）：")
+    print("-" * 50)
+    for age_group, medians in age_group_medians.items():
+        print(f"\n{age_group}:")
+        for col, median_val in medians.items():
+            print(f"  {col:<20} 中位数: {median_val:.2f}")
+
+    zero_counts_before = {col: 0 for col in zero_to_fill_cols}
+    moments_before = RunningMoments(zero_to_fill_cols)
+    moments_after = RunningMoments(zero_to_fill_cols)
+    medians_before = {col: QuantileSketch.from_error(args.epsilon) for col in zero_to_fill_cols}
+    medians_after = {col: QuantileSketch.from_error(args.epsilon) for col in zero_to_fill_cols}
+
+    for i, chunk in enumerate(iter_csv_chunks(csv_path, args.chunk_size)):
+        moments_before.update(chunk)
+        for col in zero_to_fill_cols:
+            medians_before[col].update(chunk[col].to_numpy())
+            zero_mask = chunk[col] == 0
+            zero_counts_before[col] += int(zero_mask.sum())
+            group_medians = {g: medians[col] for g, medians in age_group_medians.items()}
+            fill = chunk.loc[zero_mask, 'Age_category'].map(group_medians).fillna(overall[col].median())
+            chunk[col] = chunk[col].astype(float)
+            chunk.loc[zero_mask, col] = fill
+            medians_after[col].update(chunk[col].to_numpy())
+        moments_after.update(chunk)
+        chunk.to_csv(output_path, mode='w' if i == 0 else 'a', header=(i == 0), index=False, encoding='utf-8')
+
+    print("\n填充前后统计对比：")
+    print("-" * 50)
+    mean_before, mean_after = moments_before.means(), moments_after.means()
+    for col in zero_to_fill_cols:
+        print(f"\n{col}: 填充了 {zero_counts_before[col]} 个0值")
+        print(f"  填充前 - 平均值: {mean_before[col]:.2f}, 中位数: {medians_before[col].median():.2f}")
+        print(f"  填充后 - 平均值: {mean_after[col]:.2f}, 中位数: {medians_after[col].median():.2f}")
+
+    with open(report_path, "w", encoding="utf-8") as f:
+        f.write("0值填充报告（按年龄组中位数填充，流式草图近似）\n")
+        f.write("=" * 60 + "\n\n")
+        f.write(f"原始数据行数: {total_rows}\n")
+        f.write(f"填充时间: {pd.Timestamp.now()}\n")
+        f.write(f"中位数秩误差: 约 {args.epsilon}\n\n")
+
+        f.write("各年龄组中位数:\n")
+        f.write("-" * 40 + "\n")
+        for age_group, medians in age_group_medians.items():
+            f.write(f"\n{age_group}:\n")
+            for col, median_val in medians.items():
+                f.write(f"  {col:<20} {median_val:.2f}\n")
+
+        f.write("\n填充统计:\n")
+        f.write("-" * 40 + "\n")
+        f.write(f"{'列名':<20} {'填充前0值':>10} {'填充数':>10} {'填充后0值':>10}\n")
+        f.write("-" * 60 + "\n")
+        for col in zero_to_fill_cols:
+            f.write(f"{col:<20} {zero_counts_before[col]:>10} {zero_counts_before[col]:>10} {0:>10}\n")
+
+        f.write("\n保存文件: diabetes_filled_by_age.csv\n")
+
+    print(f"\n填充后的数据已保存到：{output_path}")
+    print(f"详细报告已保存到：{report_path}")
+
+
+if args.streaming:
+    run_streaming()
+    sys.exit(0)
+
+# -------------------------
+#   加载数据
+# -------------------------
+print(f"正在加载数据集：{csv_path}")
+df = pd.read_csv(csv_path)
+
+print(f"数据形状：{df.shape}")
+print(f"数据列：{list(df.columns)}")
+
 # -------------------------
 #   统计原始0值数量
 # -------------------------
@@ -131,7 +228,6 @@ for col in zero_to_fill_cols:
 # -------------------------
 #   保存填充后的数据
 # -------------------------
-output_path = os.path.join(base_dir, "data", "processed", "diabetes_filled_by_age.csv")
 df_filled.to_csv(output_path, index=False, encoding='utf-8')
 
 print(f"\n填充后的数据已保存到：{output_path}")
@@ -139,8 +235,6 @@ print(f"\n填充后的数据已保存到：{output_path}")
 # -------------------------
 #   创建详细报告
 # -------------------------
-report_path = os.path.join(base_dir, "data_pre_process", "zero_filling_report.txt")
-
 with open(report_path, "w", encoding="utf-8") as f:
     f.write("0值填充报告（按年龄组中位数填充）\n")
     f.write("=" * 60 + "\n\n")
@@ -1,17 +1,86 @@
 import pandas as pd
 import numpy as np
 import os
+import sys
 
-base_dir = os.path.dirname(os.path.dirname(__file__))
-csv_path = os.path.join(base_dir, "data", "processed", "diabetes_filled_by_age.csv")
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, base_dir)
 
-# 加载数据
-df = pd.read_csv(csv_path)
+from src.streaming_stats import parse_streaming_args
+
+args = parse_streaming_args("箱线图（IQR）异常值检测")
+
+csv_path = os.path.join(base_dir, "data", "processed", "diabetes_filled_by_age.csv")
+output_path = os.path.join(base_dir, "data_pre_process", "boxplot_outlier_report.txt")
 
 # 需要检测的列
 numeric_cols = ['Pregnancies', 'Glucose', 'BloodPressure', 'SkinThickness',
                 'Insulin', 'BMI', 'DiabetesPedigreeFunction', 'Age']
 
+# 流式模式下每列最多列出的异常值行数（大数据时完整列表没有意义）
+MAX_LISTED_OUTLIERS = 1000
+
+
+def run_streaming():
+    """第一遍用草图估计各列四分位数，第二遍逐块统计异常值"""
+    from src.streaming_stats import column_quantile_sketches, iqr_bounds, iter_csv_chunks
+
+    sketches, total_rows = column_quantile_sketches(
+        iter_csv_chunks(csv_path, args.chunk_size, usecols=numeric_cols), numeric_cols, epsilon=args.epsilon)
+    stats = {col: iqr_bounds(sketches[col]) for col in numeric_cols}
+
+    counts = {col: 0 for col in numeric_cols}
+    rows = {col: [] for col in numeric_cols}
+    values = {col: [] for col in numeric_cols}
+    for chunk in iter_csv_chunks(csv_path, args.chunk_size, usecols=numeric_cols):
+        for col in numeric_cols:
+            _, _, _, lower, upper = stats[col]
+            outliers = chunk.loc[(chunk[col] < lower) | (chunk[col] > upper), col]
+            counts[col] += len(outliers)
+            room = MAX_LISTED_OUTLIERS - len(rows[col])
+            if room > 0:
+                rows[col].extend(outliers.index[:room].tolist())
+                values[col].extend(outliers.iloc[:room].tolist())
+
+    output_lines = []
+    output_lines.append("各列箱线图统计信息 (IQR方法，流式草图近似)")
+    output_lines.append("=" * 60)
+    output_lines.append(f"数据文件: {csv_path}")
+    output_lines.append(f"数据行数: {total_rows}")
+    output_lines.append(f"分位数秩误差: 约 {args.epsilon}")
+    output_lines.append(f"统计时间: {pd.Timestamp.now()}\n")
+
+    for col in numeric_cols:
+        Q1, Q3, IQR, lower, upper = stats[col]
+        output_lines.append(f"\n{col}:")
+        output_lines.append(f"  Q1: {Q1:.2f}, Q3: {Q3:.2f}, IQR: {IQR:.2f}")
+        output_lines.append(f"  异常值边界: [{lower:.2f}, {upper:.2f}]")
+        output_lines.append(f"  异常值数量: {counts[col]}")
+        if counts[col] > 0:
+            suffix = f"（仅列出前 {MAX_LISTED_OUTLIERS} 个）" if counts[col] > MAX_LISTED_OUTLIERS else ""
+            output_lines.append(f"  异常值行{suffix}: {rows[col]}")
+            output_lines.append(f"  异常值具体数值{suffix}: {values[col]}")
+
+    output_lines.append(f"\n{'=' * 60}")
+    output_lines.append(f"总计: {sum(counts.values())} 个异常值")
+
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(output_lines))
+
+    print(f"报告已保存到: {output_path}")
+    print("各列箱线图统计信息 (IQR方法，流式草图近似)")
+    print("=" * 60)
+    for line in output_lines[:10]:
+        print(line)
+
+
+if args.streaming:
+    run_streaming()
+    sys.exit(0)
+
+# 加载数据
+df = pd.read_csv(csv_path)
+
 # 准备写入txt的内容
 output_lines = []
 output_lines.append("各列箱线图统计信息 (IQR方法)")
@@ -60,7 +129,6 @@ output_lines.append(f"\n{'=' * 60}")
 output_lines.append(f"总计: {total_outliers} 个异常值")
 
 # 保存到txt文件
-output_path = os.path.join(base_dir, "data_pre_process", "boxplot_outlier_report.txt")
 with open(output_path, "w", encoding="utf-8") as f:
     f.write("\n".join(output_lines))
 
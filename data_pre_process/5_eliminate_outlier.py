@@ -1,15 +1,56 @@
 import pandas as pd
 import os
+import sys
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, base_dir)
+
+from src.streaming_stats import parse_streaming_args
+
+args = parse_streaming_args("按 IQR 边界截断异常值")
 
-# 加载数据
-base_dir = os.path.dirname(os.path.dirname(__file__))
 csv_path = os.path.join(base_dir, "data", "processed", "diabetes_filled_by_age.csv")
-df = pd.read_csv(csv_path)
+output_path = os.path.join(base_dir, "data", "processed", "diabetes_eliminate_outlier.csv")
 
 # 需要处理的列
 process_cols = ['SkinThickness', 'Insulin', 'BloodPressure', 'BMI',
                 'DiabetesPedigreeFunction', 'Glucose']
 
+
+def run_streaming():
+    """第一遍用草图估计各列四分位数，第二遍逐块截断并追加写出"""
+    from src.streaming_stats import column_quantile_sketches, iqr_bounds, iter_csv_chunks
+
+    print(f"开始IQR边界处理（流式模式，块大小 {args.chunk_size:,}，秩误差约 {args.epsilon}）...")
+    sketches, total_rows = column_quantile_sketches(
+        iter_csv_chunks(csv_path, args.chunk_size), process_cols, epsilon=args.epsilon)
+
+    bounds = {}
+    for col in process_cols:
+        _, _, _, lower, upper = iqr_bounds(sketches[col])
+        bounds[col] = (lower, upper)
+
+    for i, chunk in enumerate(iter_csv_chunks(csv_path, args.chunk_size)):
+        for col, (lower, upper) in bounds.items():
+            chunk[col] = chunk[col].clip(lower=lower, upper=upper)
+        chunk.to_csv(output_path, mode='w' if i == 0 else 'a', header=(i == 0), index=False, encoding='utf-8')
+
+    for col, (lower, upper) in bounds.items():
+        sketch = sketches[col]
+        print(f"{col}: 边界[{lower:.1f}, {upper:.1f}] | "
+              f"修改前[{sketch.min:.1f}, {sketch.max:.1f}] | "
+              f"修改后[{max(sketch.min, lower):.1f}, {min(sketch.max, upper):.1f}]")
+
+    print(f"\n处理完成！共 {total_rows:,} 行，保存到: {output_path}")
+
+
+if args.streaming:
+    run_streaming()
+    sys.exit(0)
+
+# 加载数据
+df = pd.read_csv(csv_path)
+
 print("开始IQR边界处理...")
 
 # 对每列应用IQR边界
@@ -36,7 +77,6 @@ for col in process_cols:
               f"修改后[{df[col].min():.1f}, {df[col].max():.1f}]")
 
 # 保存数据
-output_path = os.path.join(base_dir, "data", "processed", "diabetes_eliminate_outlier.csv")
 df.to_csv(output_path, index=False, encoding='utf-8')
 
 print(f"\n处理完成！保存到: {output_path}")
\ No newline at end of file
@@ -7,14 +7,24 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 import warnings
-from src.model_predictor import predict_risk, OPTIMAL_THRESHOLD
-import plotly.figure_factory as ff
+from src.model_predictor import load_model, get_model_version, predict_risk_batch, OPTIMAL_THRESHOLD
+from src.audit_log import get_audit_logger
+from src.risk_lookup import get_risk_lookup_table
+from src.sensitivity import compute_sensitivity_curves
+from src.instrumentation import start_run, timed, render_diagnostics_panel
+from src.lazy_imports import lazy_attr, lazy_import
+from src.warmup import start_warmup
+
+# 图表库只在真正绘图时导入，页面首次渲染不承担其导入开销
+go = lazy_import('plotly.graph_objects')
+make_subplots = lazy_attr('plotly.subplots', 'make_subplots')
 
 warnings.filterwarnings('ignore')
 
+# 性能诊断：标记本次重跑开始（未开启 DIABETES_PROFILING 时无操作）
+start_run()
+
 # 页面配置
 st.set_page_config(
     page_title="个人风险评估 - 糖尿病预测",
@@ -23,6 +33,8 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+start_warmup()
+
 # 现代化CSS样式
 st.markdown("""
 <style>
@@ -79,6 +91,7 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+@timed('图表构建: 风险仪表盘')
 def create_risk_gauge(risk_score):
     """创建风险评分仪表盘"""
     fig = go.Figure(go.Indicator(
@@ -111,6 +124,55 @@ def create_risk_gauge(risk_score):
     return fig
 
 
+@timed('图表构建: 敏感性曲线')
+def create_sensitivity_chart(curves, raw_input_data):
+    """创建 8 项指标的 what-if 敏感性曲线（其他指标固定为当前输入）"""
+    feature_labels = {
+        'Pregnancies': '怀孕次数',
+        'Glucose': '血糖浓度',
+        'BloodPressure': '舒张压',
+        'SkinThickness': '皮褶厚度',
+        'Insulin': '胰岛素水平',
+        'BMI': '体质指数',
+        'DiabetesPedigreeFunction': '糖尿病家族史函数',
+        'Age': '年龄'
+    }
+
+    features = list(curves.keys())
+    fig = make_subplots(rows=2, cols=4, subplot_titles=[feature_labels.get(f, f) for f in features])
+
+    for idx, feature in enumerate(features):
+        row, col = idx // 4 + 1, idx % 4 + 1
+        values, scores = curves[feature]
+
+        fig.add_trace(go.Scatter(
+            x=values, y=scores, mode='lines',
+            line={'color': '#667eea', 'width': 2},
+            hovertemplate='%{x}: %{y:.1f}分<extra></extra>'
+        ), row=row, col=col)
+
+        # 标出当前输入所在位置
+        current = raw_input_data[feature]
+        current_score = np.interp(current, values, scores)
+        fig.add_trace(go.Scatter(
+            x=[current], y=[current_score], mode='markers',
+            marker={'color': '#ef4444', 'size': 9},
+            hovertemplate='当前值 %{x}: %{y:.1f}分<extra></extra>'
+        ), row=row, col=col)
+
+    # 显示评分 50 分对应模型的诊断阈值
+    fig.add_hline(y=50, line_dash='dash', line_color='#f59e0b', line_width=1)
+    fig.update_yaxes(range=[0, 100])
+    fig.update_layout(
+        height=500,
+        showlegend=False,
+        margin={'t': 40, 'b': 20},
+        font={'color': "#1f2937", 'family': "Arial, sans-serif"}
+    )
+
+    return fig
+
+
 def get_risk_level(score, threshold):  # ✅ 接受 2 个参数
     """根据风险评分和阈值确定风险等级和建议"""
 
@@ -270,10 +332,26 @@ def main():
             }
 
             # 2. 调用核心预测函数
-            risk_score, final_prediction, odds_ratios = predict_risk(raw_input_data)
+            _, odds_ratios = load_model()
+
+            if odds_ratios is None:
+                # 模型加载函数已在内部显示错误，这里直接返回
+                return
 
-            if risk_score is None:
-                # 预测函数已在内部显示错误，这里直接返回
+            try:
+                # 滑块只会产生网格上的值，正常情况下直接查表评分（8 次查找 + 1 次 sigmoid）。
+                # 只有查找表不可用（模型没有线性系数）或输入不在网格上时才回退到模型预测；
+                # 微批合并器只用于 HTTP 服务（src/prediction_service.py），页面不需要。
+                lookup_table = get_risk_lookup_table()
+                result = lookup_table.predict(raw_input_data) if lookup_table is not None else None
+                if result is None:
+                    row = predict_risk_batch(pd.DataFrame([raw_input_data])).iloc[0]
+                    result = row['risk_score'], int(row['prediction'])
+                risk_score, final_prediction = result
+                get_audit_logger().record(raw_input_data, risk_score, final_prediction,
+                                          get_model_version(), 'personal_assessment')
+            except Exception as e:
+                st.error(f"预测失败：特征对齐或模型计算出错。详细错误: {e}")
                 return
 
             # 获取风险等级
@@ -360,6 +438,16 @@ def main():
             df_metrics = pd.DataFrame(key_risk_data)
             st.dataframe(df_metrics, use_container_width=True, hide_index=True)
 
+            # What-if 敏感性分析：8 项指标的全部扫描点一次批量评分
+            st.markdown("### 🎯 敏感性分析")
+            st.markdown("保持其他指标不变，单独调整某一项指标时风险评分的变化（红点为您的当前值，虚线为诊断阈值）：")
+
+            try:
+                curves = compute_sensitivity_curves(raw_input_data)
+                st.plotly_chart(create_sensitivity_chart(curves, raw_input_data), use_container_width=True)
+            except Exception as e:
+                st.warning(f"敏感性分析生成失败: {e}")
+
         else:
             st.info("💡 请在左侧输入体检指标，然后点击'开始风险评估'按钮")
 
@@ -372,5 +460,8 @@ def main():
     </div>
     """, unsafe_allow_html=True)
 
+    # 性能诊断面板（仅在开启 DIABETES_PROFILING 时显示）
+    render_diagnostics_panel()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
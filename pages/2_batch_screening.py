@@ -7,13 +7,39 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
-from io import StringIO
+from io import BytesIO
+import os
 import warnings
+from src.csv_ingest import passthrough_columns, read_header, read_upload
+from src.data_validation import REQUIRED_COLUMNS, missing_columns, split_valid_rows, validate_frame
+from src.batch_jobs import (
+    COMPLETED, FAILED, QUEUED, RESUMABLE_STATUSES, RUNNING, STATUS_NAMES_CN, get_job_queue,
+)
+from src.instrumentation import start_run, stage, render_diagnostics_panel
+from src.lazy_imports import lazy_import
+from src.warmup import start_warmup
+
+# 图表库只在真正绘图时导入，页面首次渲染不承担其导入开销
+go = lazy_import('plotly.graph_objects')
+
+# 任务进度刷新间隔（秒）和"最近的任务"列表长度
+JOB_POLL_SECONDS = 1.0
+RECENT_JOBS_SHOWN = 5
+
+# 逐行错误表最多显示的条数
+ERROR_PREVIEW_ROWS = 1_000
+
+# 详细结果表格最多显示的行数
+RESULT_PREVIEW_ROWS = 10_000
+
+# 超过该行数不生成 Excel 报告（openpyxl 约 2,500 行/秒），只提供 CSV
+EXCEL_MAX_ROWS = 50_000
 
 warnings.filterwarnings('ignore')
 
+# 性能诊断：标记本次重跑开始（未开启 DIABETES_PROFILING 时无操作）
+start_run()
+
 # 页面配置
 st.set_page_config(
     page_title="批量数据筛查 - 糖尿病预测",
@@ -22,6 +48,8 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+start_warmup()
+
 # 现代化CSS样式
 st.markdown("""
 <style>
@@ -76,65 +104,12 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-def calculate_risk_score(row):
-    """计算风险评分（示例函数）"""
-    score = 20  # 基础分
-
-    # 血糖因子
-    glucose = row.get('Glucose', 100)
-    if glucose > 140:
-        score += 30
-    elif glucose > 120:
-        score += 15
-    elif glucose > 100:
-        score += 5
-
-    # BMI因子
-    bmi = row.get('BMI', 25)
-    if bmi > 30:
-        score += 20
-    elif bmi > 25:
-        score += 10
-
-    # 年龄因子
-    age = row.get('Age', 35)
-    if age > 60:
-        score += 15
-    elif age > 45:
-        score += 10
-    elif age > 30:
-        score += 5
-
-    # 家族史因子
-    diabetes_pedigree = row.get('DiabetesPedigreeFunction', 0.5)
-    if diabetes_pedigree > 1.0:
-        score += 15
-    elif diabetes_pedigree > 0.5:
-        score += 8
-
-    return min(100, max(0, score))
-
-def get_risk_category(score):
-    """获取风险分类"""
-    if score < 30:
-        return "低风险"
-    elif score < 70:
-        return "中等风险"
-    else:
-        return "高风险"
-
 def validate_csv_format(df):
     """验证CSV格式"""
-    required_columns = [
-        'Pregnancies', 'Glucose', 'BloodPressure',
-        'SkinThickness', 'Insulin', 'BMI',
-        'DiabetesPedigreeFunction', 'Age'
-    ]
-
-    missing_columns = [col for col in required_columns if col not in df.columns]
+    missing = missing_columns(df.columns)
 
-    if missing_columns:
-        missing_cols_str = ', '.join(missing_columns)
+    if missing:
+        missing_cols_str = ', '.join(missing)
         return False, "缺少必需的列: " + missing_cols_str
 
     if len(df) == 0:
@@ -142,6 +117,259 @@ def validate_csv_format(df):
 
     return True, "格式验证通过"
 
+def render_validation_errors(report, quarantined_df, filename):
+    """异常行说明：各列问题计数、逐行错误表和隔离文件下载"""
+    st.warning("⚠️ " + str(report.n_invalid) + " 行数据存在缺失、非数值或超出合理范围的值，"
+               "将被隔离，不参与预测；其余 " + str(report.n_rows - report.n_invalid) + " 行照常预测")
+
+    with st.expander("🔎 查看数据校验详情"):
+        st.markdown("**各列问题计数**")
+        st.dataframe(report.summary(), use_container_width=True)
+
+        st.markdown("**逐行错误**（行号为数据行序号，从 1 开始）")
+        if len(report.errors) > ERROR_PREVIEW_ROWS:
+            st.caption("仅显示前 " + f"{ERROR_PREVIEW_ROWS:,}" + " 条，完整内容见隔离文件")
+        st.dataframe(report.errors.head(ERROR_PREVIEW_ROWS), use_container_width=True, hide_index=True)
+
+        st.download_button(
+            label="📥 下载隔离数据 (CSV)",
+            data=quarantined_df.to_csv(index=False).encode('utf-8-sig'),
+            file_name=os.path.splitext(filename)[0] + "_quarantine.csv",
+            mime="text/csv"
+        )
+
+def render_results(result_df, job_id):
+    """步骤 4：统计概览、风险分布、详细结果和导出"""
+    # 步骤4: 结果展示
+    st.markdown("---")
+    st.markdown("""
+    <div class="step-container">
+        <h4>步骤 4: 预测结果分析</h4>
+        <p>查看批量筛查的统计结果和详细报告</p>
+    </div>
+    """, unsafe_allow_html=True)
+
+    # 统计概览
+    st.markdown("#### 📊 筛查统计概览")
+
+    risk_counts = result_df['风险等级'].value_counts()
+
+    col1, col2, col3, col4 = st.columns(4)
+
+    with col1:
+        st.metric("总样本数", len(result_df))
+
+    with col2:
+        low_risk = risk_counts.get('低风险', 0)
+        low_risk_pct = round(low_risk / len(result_df) * 100, 1)
+        st.metric("低风险", str(low_risk) + " (" + str(low_risk_pct) + "%)")
+
+    with col3:
+        medium_risk = risk_counts.get('中等风险', 0)
+        medium_risk_pct = round(medium_risk / len(result_df) * 100, 1)
+        st.metric("中等风险", str(medium_risk) + " (" + str(medium_risk_pct) + "%)")
+
+    with col4:
+        high_risk = risk_counts.get('高风险', 0)
+        high_risk_pct = round(high_risk / len(result_df) * 100, 1)
+        st.metric("高风险", str(high_risk) + " (" + str(high_risk_pct) + "%)")
+
+    # 风险分布图
+    st.markdown("#### 📈 风险分布")
+
+    fig_pie = go.Figure(data=[go.Pie(
+        labels=risk_counts.index,
+        values=risk_counts.values,
+        hole=0.3,
+        marker_colors=['#10b981', '#f59e0b', '#ef4444']
+    )])
+
+    fig_pie.update_layout(
+        title="风险等级分布",
+        height=400,
+        showlegend=True
+    )
+
+    col1, col2 = st.columns([1, 1])
+
+    with col1:
+        st.plotly_chart(fig_pie, use_container_width=True)
+
+    with col2:
+        # 风险评分分布直方图
+        fig_hist = go.Figure(data=[go.Histogram(
+            x=result_df['风险评分'],
+            nbinsx=20,
+            marker_color='#667eea',
+            opacity=0.7
+        )])
+
+        fig_hist.update_layout(
+            title="风险评分分布",
+            xaxis_title="风险评分",
+            yaxis_title="人数",
+            height=400
+        )
+
+        st.plotly_chart(fig_hist, use_container_width=True)
+
+    # 详细结果表格
+    st.markdown("#### 📋 详细筛查结果")
+
+    # 添加颜色编码的风险等级
+    def color_risk_level(val):
+        if val == "高风险":
+            return 'background-color: #fee2e2; color: #dc2626; font-weight: bold'
+        elif val == "中等风险":
+            return 'background-color: #fef3c7; color: #d97706; font-weight: bold'
+        else:
+            return 'background-color: #d1fae5; color: #059669; font-weight: bold'
+
+    # 带样式的表格有单元格数上限，大文件只预览前 RESULT_PREVIEW_ROWS 行
+    display_df = result_df.head(RESULT_PREVIEW_ROWS).copy()
+    display_df = display_df.round(2)
+    if len(result_df) > RESULT_PREVIEW_ROWS:
+        st.caption("仅显示前 " + f"{RESULT_PREVIEW_ROWS:,}" + " 行，完整结果请下载")
+
+    st.dataframe(
+        display_df.style.applymap(color_risk_level, subset=['风险等级']),
+        use_container_width=True,
+        height=400
+    )
+
+    # 导出功能
+    st.markdown("---")
+    st.markdown("#### 💾 导出筛查报告")
+
+    csv, excel = build_job_exports(job_id)
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        # 导出为CSV
+        st.download_button(
+            label="📊 下载筛查结果 (CSV)",
+            data=csv,
+            file_name="diabetes_screening_results_" + pd.Timestamp.now().strftime('%Y%m%d_%H%M%S') + ".csv",
+            mime="text/csv",
+            use_container_width=True
+        )
+
+    with col2:
+        # 导出为Excel
+        if excel is None:
+            st.caption("结果超过 " + f"{EXCEL_MAX_ROWS:,}" + " 行，请下载 CSV（Excel 报告生成过慢）")
+        else:
+            st.download_button(
+                label="📈 下载完整报告 (Excel)",
+                data=excel,
+                file_name="diabetes_screening_report_" + pd.Timestamp.now().strftime('%Y%m%d_%H%M%S') + ".xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                use_container_width=True
+            )
+
+@st.cache_data(max_entries=2, show_spinner="正在加载筛查结果...")
+def load_job_results(job_id):
+    """已完成任务的结果不再变化，按 job_id 缓存"""
+    return get_job_queue().load_results(job_id)
+
+@st.cache_data(max_entries=2, show_spinner="正在生成导出文件...")
+def build_job_exports(job_id):
+    """CSV 和 Excel 报告按任务缓存，页面重跑（如切换任务、点击按钮）时不再重新生成"""
+    result_df = load_job_results(job_id)
+    csv = result_df.to_csv(index=False).encode('utf-8-sig')
+    if len(result_df) > EXCEL_MAX_ROWS:
+        return csv, None
+
+    risk_counts = result_df['风险等级'].value_counts()
+    buffer = BytesIO()
+    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
+        result_df.to_excel(writer, index=False, sheet_name='筛查结果')
+
+        # 添加统计汇总表
+        summary_data = {
+            '指标': ['总样本数', '高风险人数', '中等风险人数', '低风险人数', '平均风险评分'],
+            '数值': [
+                len(result_df),
+                risk_counts.get('高风险', 0),
+                risk_counts.get('中等风险', 0),
+                risk_counts.get('低风险', 0),
+                result_df['风险评分'].mean()
+            ]
+        }
+        summary_df = pd.DataFrame(summary_data)
+        summary_df.to_excel(writer, index=False, sheet_name='统计汇总')
+    return csv, buffer.getvalue()
+
+def job_progress_text(job):
+    done_rows = min(job['completed_chunks'] * job['chunk_rows'], job['total_rows'])
+    return (STATUS_NAMES_CN[job['status']] + "：已完成 " + str(job['completed_chunks']) + "/" +
+            str(job['total_chunks']) + " 块（" + f"{done_rows:,}" + "/" + f"{job['total_rows']:,}" + " 行）")
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def render_job_progress(job_id):
+    """排队 / 运行中的任务：只重跑这一片段刷新进度，结束后重跑整页显示结果"""
+    jobs = get_job_queue()
+    job = jobs.get(job_id)
+    if job is None or job['status'] not in (QUEUED, RUNNING):
+        st.rerun()
+
+    st.progress(job['completed_chunks'] / job['total_chunks'], text=job_progress_text(job))
+    if jobs.cancel_requested(job_id):
+        st.caption("⏳ 已请求取消，当前块完成后停止")
+    elif st.button("⏹️ 取消任务", key="cancel_job"):
+        jobs.cancel(job_id)
+
+def render_job(job_id):
+    """当前任务面板：进行中显示进度，已结束显示状态、续跑按钮或结果"""
+    jobs = get_job_queue()
+    job = jobs.get(job_id)
+
+    st.markdown("---")
+    if job is None:
+        # 包括 URL 中格式不合法的 job_id：不回显，直接按不存在处理
+        st.warning("⚠️ 未找到该任务，可能已被删除")
+        return
+
+    st.markdown("#### ⏱️ 批量预测任务 " + job_id + ("（" + job['filename'] + "）" if job['filename'] else ""))
+
+    if job['status'] in (QUEUED, RUNNING):
+        render_job_progress(job_id)
+        return
+
+    if job['status'] == COMPLETED:
+        st.success("✅ 预测完成！")
+        render_results(load_job_results(job_id), job_id)
+        return
+
+    st.progress(job['completed_chunks'] / job['total_chunks'], text=job_progress_text(job))
+    if job['status'] == FAILED:
+        st.error("❌ 任务失败: " + str(job['error']))
+    if job['status'] in RESUMABLE_STATUSES and st.button("▶️ 从中断处继续", key="resume_job", type="primary"):
+        jobs.resume(job_id)
+        st.rerun()
+
+def render_recent_jobs(current_job_id):
+    """
+    本会话提交的最近任务，用于切换查看。
+    只列出 session_state 中记录的 job_id，不展示其他用户的任务；通过 URL 打开的任务不加入列表。
+    """
+    queue = get_job_queue()
+    jobs = [queue.get(job_id) for job_id in reversed(st.session_state.get('submitted_job_ids', []))]
+    jobs = [job for job in jobs if job is not None][:RECENT_JOBS_SHOWN]
+    if not jobs:
+        return
+
+    with st.expander("🗂️ 本次会话提交的任务"):
+        for job in jobs:
+            col1, col2 = st.columns([4, 1])
+            with col1:
+                st.markdown("`" + job['job_id'] + "` " + (job['filename'] or "") + " · " + job_progress_text(job))
+            with col2:
+                if job['job_id'] != current_job_id and st.button("查看", key="view_" + job['job_id']):
+                    st.query_params['job'] = job['job_id']
+                    st.rerun()
+
 def main():
     """主函数"""
 
@@ -185,21 +413,34 @@ def main():
     # 文件上传区域
     uploaded_file = st.file_uploader(
         "📁 选择CSV文件",
-        type=['csv'],
-        help="请上传包含8个必需列的CSV文件"
+        type=['csv', 'gz', 'zip'],
+        help="请上传包含8个必需列的CSV文件，也可以上传 gzip / zip 压缩后的CSV"
     )
 
     if uploaded_file is not None:
         try:
+            # 只解析 8 项指标和选择保留的附加列（编号类列默认保留），其余列跳过
+            header = read_header(uploaded_file, uploaded_file.name)
+            extra_columns = [col for col in header if col not in REQUIRED_COLUMNS]
+            keep_columns = st.multiselect(
+                "结果中保留的附加列",
+                options=extra_columns,
+                default=passthrough_columns(header),
+                help="例如患者编号；未选择的列不会被解析，大文件可显著加快读取"
+            ) if extra_columns else []
+
             # 读取CSV文件
-            df = pd.read_csv(uploaded_file)
+            with stage('数据加载: 上传文件'):
+                df, ingest_info = read_upload(uploaded_file, uploaded_file.name, keep_columns)
 
             # 验证格式
             is_valid, message = validate_csv_format(df)
 
             if is_valid:
                 st.success("✅ " + message)
-                st.info("📄 文件信息：" + str(df.shape[0]) + " 行 × " + str(df.shape[1]) + " 列")
+                st.info("📄 文件信息：" + str(df.shape[0]) + " 行 × " + str(df.shape[1]) + " 列"
+                        "（原文件 " + str(ingest_info['columns_total']) + " 列，解析用时 " +
+                        f"{ingest_info['seconds']:.2f}" + " 秒）")
 
                 # 显示数据预览
                 st.markdown("#### 📋 数据预览")
@@ -214,8 +455,13 @@ def main():
                 </div>
                 """, unsafe_allow_html=True)
 
+                # 按 FEATURE_SCHEMA 逐列校验类型、合理范围和 0 值缺失
+                with stage('数据校验'):
+                    report = validate_frame(df)
+                    valid_df, quarantined_df = split_valid_rows(df, report)
+
                 # 数据质量统计
-                col1, col2, col3 = st.columns(3)
+                col1, col2, col3, col4 = st.columns(4)
 
                 with col1:
                     # 缺失值统计
@@ -230,13 +476,16 @@ def main():
 
                 with col3:
                     # 零值统计（针对生理学不可能的特征）
-                    zero_cols = ['Glucose', 'BloodPressure', 'SkinThickness', 'Insulin', 'BMI']
-                    zero_count = 0
-                    for col in zero_cols:
-                        if col in df.columns:
-                            zero_count += (df[col] == 0).sum()
+                    zero_count = report.count('zero_as_missing')
                     st.metric("可疑零值", str(zero_count), "需要检查" if zero_count > 0 else "正常")
 
+                with col4:
+                    # 类型或取值不合理的行，不参与预测
+                    st.metric("异常行", str(report.n_invalid), "将被隔离" if report.n_invalid > 0 else "无异常")
+
+                if report.n_invalid > 0:
+                    render_validation_errors(report, quarantined_df, uploaded_file.name)
+
                 # 步骤3: 批量预测
                 st.markdown("---")
                 st.markdown("""
@@ -246,161 +495,13 @@ def main():
                 </div>
                 """, unsafe_allow_html=True)
 
-                # 预测按钮
-                if st.button("🚀 开始批量预测", type="primary", use_container_width=True):
-                    with st.spinner("正在进行风险评估..."):
-                        # 复制数据用于预测
-                        result_df = df.copy()
-
-                        # 计算风险评分
-                        result_df['风险评分'] = result_df.apply(calculate_risk_score, axis=1)
-                        result_df['风险等级'] = result_df['风险评分'].apply(get_risk_category)
-
-                        # 计算患病概率（示例）
-                        result_df['患病概率'] = result_df['风险评分'] / 100
-
-                        st.success("✅ 预测完成！")
-
-                # 如果已经进行了预测，显示结果
-                if '风险评分' in locals() and 'result_df' in locals():
-                    # 步骤4: 结果展示
-                    st.markdown("---")
-                    st.markdown("""
-                    <div class="step-container">
-                        <h4>步骤 4: 预测结果分析</h4>
-                        <p>查看批量筛查的统计结果和详细报告</p>
-                    </div>
-                    """, unsafe_allow_html=True)
-
-                    # 统计概览
-                    st.markdown("#### 📊 筛查统计概览")
-
-                    risk_counts = result_df['风险等级'].value_counts()
-
-                    col1, col2, col3, col4 = st.columns(4)
-
-                    with col1:
-                        st.metric("总样本数", len(result_df))
-
-                    with col2:
-                        low_risk = risk_counts.get('低风险', 0)
-                        low_risk_pct = round(low_risk / len(result_df) * 100, 1)
-                        st.metric("低风险", str(low_risk) + " (" + str(low_risk_pct) + "%)")
-
-                    with col3:
-                        medium_risk = risk_counts.get('中等风险', 0)
-                        medium_risk_pct = round(medium_risk / len(result_df) * 100, 1)
-                        st.metric("中等风险", str(medium_risk) + " (" + str(medium_risk_pct) + "%)")
-
-                    with col4:
-                        high_risk = risk_counts.get('高风险', 0)
-                        high_risk_pct = round(high_risk / len(result_df) * 100, 1)
-                        st.metric("高风险", str(high_risk) + " (" + str(high_risk_pct) + "%)")
-
-                    # 风险分布图
-                    st.markdown("#### 📈 风险分布")
-
-                    fig_pie = go.Figure(data=[go.Pie(
-                        labels=risk_counts.index,
-                        values=risk_counts.values,
-                        hole=0.3,
-                        marker_colors=['#10b981', '#f59e0b', '#ef4444']
-                    )])
-
-                    fig_pie.update_layout(
-                        title="风险等级分布",
-                        height=400,
-                        showlegend=True
-                    )
-
-                    col1, col2 = st.columns([1, 1])
-
-                    with col1:
-                        st.plotly_chart(fig_pie, use_container_width=True)
-
-                    with col2:
-                        # 风险评分分布直方图
-                        fig_hist = go.Figure(data=[go.Histogram(
-                            x=result_df['风险评分'],
-                            nbinsx=20,
-                            marker_color='#667eea',
-                            opacity=0.7
-                        )])
-
-                        fig_hist.update_layout(
-                            title="风险评分分布",
-                            xaxis_title="风险评分",
-                            yaxis_title="人数",
-                            height=400
-                        )
-
-                        st.plotly_chart(fig_hist, use_container_width=True)
-
-                    # 详细结果表格
-                    st.markdown("#### 📋 详细筛查结果")
-
-                    # 添加颜色编码的风险等级
-                    def color_risk_level(val):
-                        if val == "高风险":
-                            return 'background-color: #fee2e2; color: #dc2626; font-weight: bold'
-                        elif val == "中等风险":
-                            return 'background-color: #fef3c7; color: #d97706; font-weight: bold'
-                        else:
-                            return 'background-color: #d1fae5; color: #059669; font-weight: bold'
-
-                    display_df = result_df.copy()
-                    display_df = display_df.round(2)
-
-                    st.dataframe(
-                        display_df.style.applymap(color_risk_level, subset=['风险等级']),
-                        use_container_width=True,
-                        height=400
-                    )
-
-                    # 导出功能
-                    st.markdown("---")
-                    st.markdown("#### 💾 导出筛查报告")
-
-                    col1, col2 = st.columns(2)
-
-                    with col1:
-                        # 导出为CSV
-                        csv = result_df.to_csv(index=False).encode('utf-8-sig')
-                        st.download_button(
-                            label="📊 下载筛查结果 (CSV)",
-                            data=csv,
-                            file_name="diabetes_screening_results_" + pd.Timestamp.now().strftime('%Y%m%d_%H%M%S') + ".csv",
-                            mime="text/csv",
-                            use_container_width=True
-                        )
-
-                    with col2:
-                        # 导出为Excel
-                        buffer = StringIO()
-                        with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-                            result_df.to_excel(writer, index=False, sheet_name='筛查结果')
-
-                            # 添加统计汇总表
-                            summary_data = {
-                                '指标': ['总样本数', '高风险人数', '中等风险人数', '低风险人数', '平均风险评分'],
-                                '数值': [
-                                    len(result_df),
-                                    risk_counts.get('高风险', 0),
-                                    risk_counts.get('中等风险', 0),
-                                    risk_counts.get('低风险', 0),
-                                    result_df['风险评分'].mean()
-                                ]
-                            }
-                            summary_df = pd.DataFrame(summary_data)
-                            summary_df.to_excel(writer, index=False, sheet_name='统计汇总')
-
-                        st.download_button(
-                            label="📈 下载完整报告 (Excel)",
-                            data=buffer.getvalue(),
-                            file_name="diabetes_screening_report_" + pd.Timestamp.now().strftime('%Y%m%d_%H%M%S') + ".xlsx",
-                            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                            use_container_width=True
-                        )
+                # 预测按钮：提交后台任务（只含通过校验的行），进度和结果见下方任务面板（刷新或重连后仍可查看）
+                if len(valid_df) == 0:
+                    st.error("❌ 没有通过校验的数据行，无法预测")
+                elif st.button("🚀 开始批量预测", type="primary", use_container_width=True):
+                    job_id = get_job_queue().submit(valid_df, uploaded_file.name)
+                    st.session_state.setdefault('submitted_job_ids', []).append(job_id)
+                    st.query_params['job'] = job_id
 
             else:
                 st.error("❌ " + message)
@@ -433,7 +534,7 @@ def main():
         <div class="upload-container">
             <h3>📁 上传您的数据文件</h3>
             <p>拖拽CSV文件到此处，或点击下方按钮选择文件</p>
-            <p><small>支持格式：CSV | 最大文件大小：200MB</small></p>
+            <p><small>支持格式：CSV、CSV.GZ、ZIP | 最大文件大小：200MB</small></p>
         </div>
         """, unsafe_allow_html=True)
 
@@ -452,6 +553,12 @@ def main():
 
         st.info("💡 **提示**：请确保您的CSV文件包含上述所有8个必需列，列名需要完全匹配（区分大小写）。")
 
+    # 批量预测任务：进度、取消 / 续跑、结果
+    job_id = st.query_params.get('job')
+    if job_id:
+        render_job(job_id)
+    render_recent_jobs(job_id)
+
     # 底部说明
     st.markdown("---")
     st.markdown("""
@@ -461,5 +568,8 @@ def main():
     </div>
     """, unsafe_allow_html=True)
 
+    # 性能诊断面板（仅在开启 DIABETES_PROFILING 时显示）
+    render_diagnostics_panel()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
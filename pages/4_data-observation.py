@@ -11,21 +11,25 @@ import matplotlib
 
 matplotlib.use('Agg')
 import matplotlib.pyplot as plt
-import matplotlib.font_manager as fm
-import seaborn as sns
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import plotly.figure_factory as ff
 import warnings
+from src.instrumentation import start_run, timed, render_diagnostics_panel
+from src.warmup import load_font_manager_once, start_warmup
+from src.lazy_imports import lazy_import
+
+# seaborn 只在散点图矩阵和热力图中使用
+sns = lazy_import('seaborn')
 
 warnings.filterwarnings('ignore')
 
+# 性能诊断：标记本次重跑开始（未开启 DIABETES_PROFILING 时无操作）
+start_run()
+
 
 # ============ 配置中文字体 ============
+@timed('字体加载')
 def setup_chinese_font():
-    """配置中文字体 - 每次绘图前调用"""
-    fm._load_fontmanager(try_read_cache=False)
+    """配置中文字体 - 每次绘图前调用；字体缓存每个进程只重建一次"""
+    load_font_manager_once()
     plt.rcParams['font.sans-serif'] = ['Microsoft YaHei', 'SimHei']
     plt.rcParams['axes.unicode_minus'] = False
 
@@ -33,6 +37,9 @@ def setup_chinese_font():
 # 初始化字体
 setup_chinese_font()
 
+# st.pyplot 渲染计时（未开启诊断时即为 st.pyplot 本身）
+render_pyplot = timed('st.pyplot 渲染')(st.pyplot)
+
 # 页面配置
 st.set_page_config(
     page_title="数据可视化分析 - 糖尿病预测",
@@ -41,6 +48,8 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+start_warmup()
+
 # ============ 现代化扁平风格CSS ============
 st.markdown("""
 <style>
@@ -260,6 +269,7 @@ st.markdown("""
 class StreamlitVisualizer:
     """Streamlit数据可视化类"""
 
+    @timed('数据加载: 数据集')
     def __init__(self, data_path='./src/data/diabetes.csv'):
         """初始化并加载数据"""
         try:
@@ -419,7 +429,7 @@ def main():
                          ha='center', va='bottom', fontsize=10, fontweight='bold')
 
             plt.tight_layout()
-            st.pyplot(fig)
+            render_pyplot(fig)
             plt.close()
 
         with col2:
@@ -598,7 +608,7 @@ def main():
             ax.spines['right'].set_visible(False)
             ax.grid(axis='y', alpha=0.3, linestyle='--')
 
-            st.pyplot(fig)
+            render_pyplot(fig)
             plt.close()
 
             st.markdown(f"""
@@ -652,7 +662,7 @@ def main():
             ax.spines['right'].set_visible(False)
             ax.grid(axis='y', alpha=0.3, linestyle='--')
 
-            st.pyplot(fig)
+            render_pyplot(fig)
             plt.close()
 
             st.markdown(f"""
@@ -856,7 +866,7 @@ def main():
             ax.spines['right'].set_visible(False)
             ax.grid(True, alpha=0.2, linestyle='--')
 
-            st.pyplot(fig)
+            render_pyplot(fig)
             plt.close()
 
         with col2:
@@ -888,7 +898,7 @@ def main():
             ax.spines['right'].set_visible(False)
             ax.grid(True, alpha=0.2, axis='y', linestyle='--')
 
-            st.pyplot(fig)
+            render_pyplot(fig)
             plt.close()
 
         # 零值警告
@@ -956,7 +966,7 @@ def main():
                 ax.spines['right'].set_visible(False)
                 ax.grid(True, alpha=0.2, axis='y', linestyle='--')
 
-                st.pyplot(fig)
+                render_pyplot(fig)
                 plt.close()
 
             with col2:
@@ -1023,7 +1033,7 @@ def main():
                                  diag_kws={'alpha': 0.7})
                 g.fig.suptitle('散点图矩阵', y=1.01, fontsize=16, fontweight='bold')
 
-                st.pyplot(g.fig)
+                render_pyplot(g.fig)
                 plt.close()
             else:
                 st.warning("⚠️ 请至少选择2个特征进行分析")
@@ -1049,7 +1059,7 @@ def main():
                         annot_kws={'size': 10, 'weight': 'bold'})
 
             ax.set_title('特征相关性热力图', fontsize=14, fontweight='bold', pad=20)
-            st.pyplot(fig)
+            render_pyplot(fig)
             plt.close()
 
         with col2:
@@ -1068,7 +1078,7 @@ def main():
             ax.spines['right'].set_visible(False)
             ax.grid(axis='x', alpha=0.3, linestyle='--')
 
-            st.pyplot(fig)
+            render_pyplot(fig)
             plt.close()
 
         # 强相关特征对
@@ -1134,7 +1144,7 @@ def main():
             ax.spines['right'].set_visible(False)
             ax.grid(axis='x', alpha=0.3, linestyle='--')
 
-            st.pyplot(fig)
+            render_pyplot(fig)
             plt.close()
 
         with col2:
@@ -1293,6 +1303,9 @@ def main():
     </div>
     """, unsafe_allow_html=True)
 
+    # 性能诊断面板（仅在开启 DIABETES_PROFILING 时显示）
+    render_diagnostics_panel()
+
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
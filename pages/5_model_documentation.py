@@ -4,16 +4,21 @@
 功能: 展示模型原理、性能指标和技术细节
 """
 
+import json
+import os
+
 import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
-import plotly.express as px
-from plotly.subplots import make_subplots
 import warnings
+from src.warmup import start_warmup
 
 warnings.filterwarnings('ignore')
 
+# 评估产物由 analysis/5_visualize_optimal_threshold.py 生成，页面只读取 JSON，不加载模型和数据
+EVALUATION_ARTIFACT_PATH = "analysis/models/evaluation_ohe_new.json"
+
 # 页面配置
 st.set_page_config(
     page_title="模型说明 - 糖尿病预测",
@@ -22,6 +27,8 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+start_warmup()
+
 # 现代化CSS样式
 st.markdown("""
 <style>
@@ -77,10 +84,31 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-def create_confusion_matrix():
+@st.cache_data
+def load_evaluation_artifact(path, mtime):
+    """读取评估产物；mtime 参与缓存键，重新评估后自动失效"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def get_evaluation_artifact():
+    """返回评估产物，文件不存在或损坏时返回 None"""
+    if not os.path.exists(EVALUATION_ARTIFACT_PATH):
+        return None
+    try:
+        return load_evaluation_artifact(EVALUATION_ARTIFACT_PATH, os.path.getmtime(EVALUATION_ARTIFACT_PATH))
+    except (OSError, ValueError):
+        return None
+
+
+def matrix_at(artifact, threshold):
+    """取与 threshold 最接近的阈值对应的混淆矩阵及指标"""
+    return min(artifact['confusion_matrices'], key=lambda m: abs(m['threshold'] - threshold))
+
+
+def create_confusion_matrix(entry):
     """创建混淆矩阵"""
-    # 示例数据（实际应该从模型评估中获取）
-    confusion_data = np.array([[85, 15], [12, 88]])  # TN, FP, FN, TP
+    confusion_data = np.array([[entry['tn'], entry['fp']], [entry['fn'], entry['tp']]])  # TN, FP, FN, TP
 
     fig = go.Figure(data=go.Heatmap(
         z=confusion_data,
@@ -93,7 +121,7 @@ def create_confusion_matrix():
     ))
 
     fig.update_layout(
-        title="混淆矩阵",
+        title=f"混淆矩阵（阈值 {entry['threshold']:.2f}）",
         width=600,
         height=400,
         xaxis_title="预测标签",
@@ -102,22 +130,26 @@ def create_confusion_matrix():
 
     return fig
 
-def create_roc_curve():
-    """创建ROC曲线"""
-    # 示例ROC曲线数据
-    fpr = [0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0]
-    tpr = [0, 0.3, 0.5, 0.7, 0.8, 0.85, 0.9, 0.93, 0.95, 0.98, 1.0]
-
+def create_roc_curve(artifact, entry):
+    """创建ROC曲线，并标出当前阈值对应的工作点"""
     fig = go.Figure()
 
     # ROC曲线
     fig.add_trace(go.Scatter(
-        x=fpr, y=tpr,
+        x=artifact['roc']['fpr'], y=artifact['roc']['tpr'],
         mode='lines',
-        name='ROC曲线 (AUC=0.85)',
+        name=f"ROC曲线 (AUC={artifact['auc']:.3f})",
         line=dict(color='#667eea', width=3)
     ))
 
+    # 当前阈值的工作点
+    fig.add_trace(go.Scatter(
+        x=[1 - entry['specificity']], y=[entry['recall']],
+        mode='markers',
+        name=f"阈值 {entry['threshold']:.2f}",
+        marker=dict(color='#ef4444', size=12)
+    ))
+
     # 对角线（随机分类器）
     fig.add_trace(go.Scatter(
         x=[0, 1], y=[0, 1],
@@ -137,6 +169,27 @@ def create_roc_curve():
 
     return fig
 
+
+def create_odds_ratio_table(artifact):
+    """由逻辑回归系数计算 Odds Ratio（数值特征已标准化，对应增加 1 个标准差）"""
+    rows = []
+    for feature, coef in artifact['coefficients'].items():
+        odds = float(np.exp(coef))
+        if '_category_' in feature:
+            source, label = feature.split('_category_')
+            meaning = f'{source} 处于「{label}」组（相对基准组）'
+        else:
+            meaning = f'{feature} 增加 1 个标准差'
+        direction = '增加' if odds >= 1 else '降低'
+        rows.append({
+            '特征': feature,
+            '系数': round(coef, 4),
+            'Odds Ratio': round(odds, 3),
+            '解释': f'{meaning}，患病几率{direction} {abs(odds - 1) * 100:.0f}%',
+        })
+    df_odds = pd.DataFrame(rows)
+    return df_odds.reindex(df_odds['系数'].abs().sort_values(ascending=False).index).reset_index(drop=True)
+
 def main():
     """主函数"""
 
@@ -166,6 +219,13 @@ def main():
         st.switch_page("pages/6_dataset_info.py")
 
 
+    artifact = get_evaluation_artifact()
+    if artifact is None:
+        st.error(f"未找到模型评估产物: {EVALUATION_ARTIFACT_PATH}，"
+                 "请先在项目根目录运行 python analysis/5_visualize_optimal_threshold.py")
+        return
+    best = matrix_at(artifact, artifact['best_threshold'])
+
     # 导航标签
     tab1, tab2, tab3, tab4 = st.tabs([
         "模型概览",
@@ -332,22 +392,7 @@ def main():
         # Odds Ratio
         st.markdown("#### 📊 Odds Ratio分析")
 
-        # 示例Odds Ratio数据
-        odds_ratio_data = {
-            '特征': ['Glucose', 'BMI', 'Age', 'DiabetesPedigreeFunction', 'Pregnancies', 'BloodPressure'],
-            'Odds Ratio': [2.85, 2.10, 1.95, 1.75, 1.45, 1.30],
-            '95% CI': ['[2.1, 3.8]', '[1.6, 2.7]', '[1.5, 2.5]', '[1.4, 2.2]', '[1.2, 1.8]', '[1.1, 1.6]'],
-            '解释': [
-                '血糖增加1单位，患病几率增加185%',
-                'BMI增加1单位，患病几率增加110%',
-                '年龄增加1岁，患病几率增加95%',
-                '家族史增加0.1，患病几率增加75%',
-                '每多怀孕1次，患病几率增加45%',
-                '血压增加1mmHg，患病几率增加30%'
-            ]
-        }
-
-        df_odds = pd.DataFrame(odds_ratio_data)
+        df_odds = create_odds_ratio_table(artifact)
 
         # Odds Ratio可视化
         fig = go.Figure(data=[
@@ -374,33 +419,36 @@ def main():
 
         # 详细解读表
         st.dataframe(df_odds, use_container_width=True, hide_index=True)
+        st.caption(f"截距: {artifact['intercept']:.4f}；数值特征均已 Z-score 标准化")
 
         # 分类性能
         st.markdown("#### 📈 分类模型性能")
+        st.caption(f"测试集 {artifact['n_test']} 例（患病 {artifact['n_positive']} 例），"
+                   f"决策阈值 {artifact['best_threshold']:.2f}，评估时间 {artifact['generated_at']}")
 
         col1, col2, col3, col4 = st.columns(4)
 
         with col1:
             st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-            st.markdown('<div class="metric-value">85.3%</div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="metric-value">{best["accuracy"]:.1%}</div>', unsafe_allow_html=True)
             st.markdown("准确率")
             st.markdown('</div>', unsafe_allow_html=True)
 
         with col2:
             st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-            st.markdown('<div class="metric-value">82.5%</div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="metric-value">{best["precision"]:.1%}</div>', unsafe_allow_html=True)
             st.markdown("精确率")
             st.markdown('</div>', unsafe_allow_html=True)
 
         with col3:
             st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-            st.markdown('<div class="metric-value">88.1%</div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="metric-value">{best["recall"]:.1%}</div>', unsafe_allow_html=True)
             st.markdown("召回率")
             st.markdown('</div>', unsafe_allow_html=True)
 
         with col4:
             st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-            st.markdown('<div class="metric-value">0.85</div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="metric-value">{artifact["auc"]:.3f}</div>', unsafe_allow_html=True)
             st.markdown("AUC得分")
             st.markdown('</div>', unsafe_allow_html=True)
 
@@ -411,21 +459,26 @@ def main():
         # 混淆矩阵
         st.markdown("#### 🎯 混淆矩阵分析")
 
+        thresholds = [m['threshold'] for m in artifact['confusion_matrices']]
+        threshold = st.select_slider("决策阈值", options=thresholds, value=best['threshold'],
+                                     help=f"模型采用的最佳阈值为 {artifact['best_threshold']:.2f}")
+        entry = matrix_at(artifact, threshold)
+
         col1, col2 = st.columns([1, 1])
 
         with col1:
-            fig_cm = create_confusion_matrix()
+            fig_cm = create_confusion_matrix(entry)
             st.plotly_chart(fig_cm, use_container_width=True)
 
         with col2:
-            st.markdown("""
+            st.markdown(f"""
             <div class="info-box">
                 <h4>混淆矩阵解读</h4>
                 <ul>
-                    <li><strong>真阴性(TN):</strong> 85例 - 正确识别非糖尿病</li>
-                    <li><strong>假阳性(FP):</strong> 15例 - 误诊为糖尿病</li>
-                    <li><strong>假阴性(FN):</strong> 12例 - 漏诊糖尿病</li>
-                    <li><strong>真阳性(TP):</strong> 88例 - 正确识别糖尿病</li>
+                    <li><strong>真阴性(TN):</strong> {entry['tn']}例 - 正确识别非糖尿病</li>
+                    <li><strong>假阳性(FP):</strong> {entry['fp']}例 - 误诊为糖尿病</li>
+                    <li><strong>假阴性(FN):</strong> {entry['fn']}例 - 漏诊糖尿病</li>
+                    <li><strong>真阳性(TP):</strong> {entry['tp']}例 - 正确识别糖尿病</li>
                 </ul>
                 <p><strong>临床关注重点：</strong>降低假阴性率，避免漏诊</p>
             </div>
@@ -437,18 +490,18 @@ def main():
         col1, col2 = st.columns([1, 1])
 
         with col1:
-            fig_roc = create_roc_curve()
+            fig_roc = create_roc_curve(artifact, entry)
             st.plotly_chart(fig_roc, use_container_width=True)
 
         with col2:
-            st.markdown("""
+            st.markdown(f"""
             <div class="info-box">
                 <h4>ROC曲线指标</h4>
                 <ul>
-                    <li><strong>AUC = 0.85：</strong>优秀分类性能</li>
-                    <li><strong>最佳阈值：</strong>0.42</li>
-                    <li><strong>敏感性：</strong>88.1%</li>
-                    <li><strong>特异性：</strong>85.0%</li>
+                    <li><strong>AUC = {artifact['auc']:.3f}：</strong>测试集上的区分能力</li>
+                    <li><strong>最佳阈值：</strong>{artifact['best_threshold']:.2f}</li>
+                    <li><strong>敏感性：</strong>{best['recall']:.1%}</li>
+                    <li><strong>特异性：</strong>{best['specificity']:.1%}</li>
                 </ul>
                 <p><strong>优势：</strong>在高敏感性下保持较好特异性</p>
             </div>
@@ -512,12 +565,12 @@ def main():
 
         # 结论
         st.markdown("---")
-        st.markdown("""
+        st.markdown(f"""
         <div class="info-box">
             <h4>🎯 模型选择结论</h4>
             <p><strong>选择岭回归和逻辑回归的原因：</strong></p>
             <ul>
-                <li>✅ **优秀的预测性能**：准确率85%+，AUC=0.85</li>
+                <li>✅ **优秀的预测性能**：准确率{best['accuracy']:.1%}，AUC={artifact['auc']:.3f}</li>
                 <li>✅ **高可解释性**：系数具有明确医学意义</li>
                 <li>✅ **训练效率高**：适合实时风险评估</li>
                 <li>✅ **稳定可靠**：正则化防止过拟合</li>
@@ -7,9 +7,9 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.express as px
 import plotly.graph_objects as go
 import warnings
+from src.warmup import start_warmup
 
 warnings.filterwarnings('ignore')
 
@@ -21,6 +21,8 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+start_warmup()
+
 # 现代化CSS样式
 st.markdown("""
 <style>
@@ -7,11 +7,14 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.express as px
 import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import plotly.figure_factory as ff
 import warnings
+from src.lazy_imports import lazy_attr, lazy_import
+from src.warmup import start_warmup
+
+# plotly.express 只用于两张图，按需导入
+px = lazy_import('plotly.express')
+make_subplots = lazy_attr('plotly.subplots', 'make_subplots')
 
 warnings.filterwarnings('ignore')
 
@@ -23,6 +26,8 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+start_warmup()
+
 # 现代化CSS
 st.markdown("""
 <style>
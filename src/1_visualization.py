@@ -2,8 +2,23 @@
 糖尿病数据集 - 可视化分析模块（终极修复版）
 作者: 成员A
 功能: 探索性数据分析（EDA）、模式识别、异常值检测
+
+用法（在项目根目录执行）:
+    python src/1_visualization.py                  # 串行生成
+    python src/1_visualization.py --parallel       # 每张图一个进程池任务并行生成
+    python src/1_visualization.py --force          # 忽略缓存，全部重新生成
+
+输入数据和绘图代码都未变化的图表会被跳过（依据 docs/images/.chart_manifest.json）。
 """
 
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
 import pandas as pd
 import numpy as np
 import matplotlib
@@ -17,10 +32,35 @@ import warnings
 warnings.filterwarnings('ignore')
 
 
+# ============ 图表任务配置 ============
+IMAGES_DIR = './docs/images'
+CHART_MANIFEST_PATH = os.path.join(IMAGES_DIR, '.chart_manifest.json')
+
+# (步骤说明, 绘图方法, 输出文件)，每一项在并行模式下是一个独立任务
+PLOT_JOBS = [
+    ('数据概览', 'plot_overview', '01_overview.png'),
+    ('特征分布分析', 'plot_distributions', '02_distributions.png'),
+    ('箱线图分析', 'plot_boxplots', '03_boxplots.png'),
+    ('分组对比分析', 'plot_outcome_comparison', '04_outcome_comparison.png'),
+    ('相关性分析', 'plot_correlation_heatmap', '05_correlation_heatmap.png'),
+    ('散点图矩阵', 'plot_pairplot', '06_pairplot.png'),
+]
+
+# 散点图矩阵：超过该行数时自动改用分箱密度矩阵（逐点散点 + KDE 的成本随行数增长）
+PAIRPLOT_BINNED_THRESHOLD = 20000
+PAIRPLOT_BINS = 40
+
+# 字体缓存是否已在当前进程中重建过
+_font_manager_loaded = False
+
+
 # ============ 配置中文字体 ============
 def setup_chinese_font():
-    """配置中文字体 - 每次绘图前调用"""
-    fm._load_fontmanager(try_read_cache=False)
+    """配置中文字体 - 每次绘图前调用；字体缓存每个进程只重建一次"""
+    global _font_manager_loaded
+    if not _font_manager_loaded:
+        fm._load_fontmanager(try_read_cache=False)
+        _font_manager_loaded = True
     plt.rcParams['font.sans-serif'] = ['Microsoft YaHei', 'SimHei']
     plt.rcParams['axes.unicode_minus'] = False
 
@@ -38,8 +78,10 @@ print("=" * 60 + "\n")
 class DiabetesVisualizer:
     """糖尿病数据可视化类"""
 
-    def __init__(self, data_path='./data/raw/diabetes.csv'):
-        """初始化并加载数据"""
+    def __init__(self, data_path='./data/raw/diabetes.csv', pairplot_mode='auto'):
+        """初始化并加载数据；pairplot_mode 为 'auto' / 'scatter' / 'binned'"""
+        self.data_path = data_path
+        self.pairplot_mode = pairplot_mode
         self.df = pd.read_csv(data_path)
         self.feature_names = self.df.columns[:-1].tolist()
         self.target = 'Outcome'
@@ -267,12 +309,18 @@ class DiabetesVisualizer:
                         f"  • {corr_matrix.columns[i]:25s} <-> {corr_matrix.columns[j]:25s}: {corr_matrix.iloc[i, j]:+.3f}")
 
     def plot_pairplot(self):
-        """散点图矩阵（选择关键特征）"""
+        """散点图矩阵（选择关键特征）；数据量大时改用分箱密度矩阵"""
         setup_chinese_font()  # 确保字体设置生效
 
         # 选择最重要的特征
         key_features = ['Glucose', 'BMI', 'Age', 'Insulin', self.target]
 
+        binned = (self.pairplot_mode == 'binned' or
+                  (self.pairplot_mode == 'auto' and len(self.df) > PAIRPLOT_BINNED_THRESHOLD))
+        if binned:
+            self.plot_binned_pairplot(key_features[:-1])
+            return
+
         plt.figure(figsize=(12, 10))
         pair_plot = sns.pairplot(self.df[key_features], hue=self.target,
                                  palette={0: 'green', 1: 'red'},
@@ -283,6 +331,54 @@ class DiabetesVisualizer:
         plt.close()
         print("✓ 散点图矩阵已保存")
 
+    def plot_binned_pairplot(self, features, bins=PAIRPLOT_BINS):
+        """
+        分箱密度矩阵：用 NumPy 按 Outcome 分组计算二维直方图，绘图元素数量只与分箱数有关。
+        下三角为非患病组、上三角为患病组的二维密度（对数色阶），对角线为两组的归一化直方图。
+        """
+        setup_chinese_font()  # 确保字体设置生效
+
+        edges, counts = binned_pair_matrix(self.df, features, self.target, bins)
+        k = len(features)
+        fig, axes = plt.subplots(k, k, figsize=(12, 10))
+        cmaps = {0: 'Greens', 1: 'Reds'}
+
+        for i, row_feature in enumerate(features):
+            for j, col_feature in enumerate(features):
+                ax = axes[i, j]
+                if i == j:
+                    for outcome, color in ((0, 'green'), (1, 'red')):
+                        hist = counts[outcome][(i, i)]
+                        density = hist / max(hist.sum(), 1) / np.diff(edges[i])
+                        ax.stairs(density, edges[i], color=color, fill=True, alpha=0.35)
+                        ax.stairs(density, edges[i], color=color, linewidth=1.2)
+                else:
+                    outcome = 0 if i > j else 1
+                    # histogram2d 的第一维对应 x 轴（列特征），pcolormesh 需要转置
+                    hist = counts[outcome][(j, i)].T
+                    ax.pcolormesh(edges[j], edges[i], np.ma.masked_equal(hist, 0),
+                                  cmap=cmaps[outcome], norm=matplotlib.colors.LogNorm(vmin=1),
+                                  shading='flat', rasterized=True)
+
+                if i == k - 1:
+                    ax.set_xlabel(col_feature, fontsize=10)
+                else:
+                    ax.set_xticklabels([])
+                if j == 0:
+                    ax.set_ylabel(row_feature, fontsize=10)
+                elif i != j:
+                    ax.set_yticklabels([])
+
+        handles = [plt.Rectangle((0, 0), 1, 1, color='green', alpha=0.6),
+                   plt.Rectangle((0, 0), 1, 1, color='red', alpha=0.6)]
+        fig.legend(handles, ['非患病（下三角）', '患病（上三角）'], loc='upper right', fontsize=10)
+        fig.suptitle(f'关键特征分箱密度矩阵（{len(self.df):,} 个样本）', fontsize=16, fontweight='bold')
+
+        plt.tight_layout()
+        plt.savefig('./docs/images/06_pairplot.png', dpi=150, bbox_inches='tight')
+        plt.close()
+        print("✓ 散点图矩阵已保存（分箱密度模式）")
+
     def generate_summary_report(self):
         """生成分析总结报告"""
         report = []
@@ -352,33 +448,68 @@ class DiabetesVisualizer:
         print(report_text)
         print("\n✓ 分析报告已保存到 ./docs/visualization_report.txt")
 
-    def run_all_analysis(self):
-        """运行所有可视化分析"""
-        import os
-        os.makedirs('./docs/images', exist_ok=True)
+    def chart_fingerprint(self, method_name):
+        """图表指纹：输入数据的哈希 + 绘图方法源码的哈希，任一变化都需要重新生成"""
+        data_hash = hashlib.sha256(pd.util.hash_pandas_object(self.df, index=True).values.tobytes())
+        data_hash.update(','.join(self.df.columns).encode('utf-8'))
+        code = inspect.getsource(getattr(DiabetesVisualizer, method_name))
+        if method_name == 'plot_pairplot':
+            code += inspect.getsource(DiabetesVisualizer.plot_binned_pairplot) + self.pairplot_mode
+        return data_hash.hexdigest()[:16] + '-' + hashlib.sha256(code.encode('utf-8')).hexdigest()[:16]
+
+    def _pending_jobs(self, force=False):
+        """返回 (需要生成的任务, 已跳过的任务, 当前指纹)"""
+        manifest = load_chart_manifest()
+        fingerprints = {method: self.chart_fingerprint(method) for _, method, _ in PLOT_JOBS}
+        pending, skipped = [], []
+        for job in PLOT_JOBS:
+            _, method, filename = job
+            unchanged = (manifest.get(filename) == fingerprints[method]
+                         and os.path.exists(os.path.join(IMAGES_DIR, filename)))
+            (skipped if unchanged and not force else pending).append(job)
+        return pending, skipped, fingerprints
+
+    def run_all_analysis(self, parallel=False, workers=None, force=False):
+        """
+        运行所有可视化分析。
+        parallel=True 时每张图作为独立任务在进程池中生成（Agg 后端，每个进程只初始化一次字体）；
+        force=False 时跳过输入数据和绘图代码都未变化的图表。
+        """
+        os.makedirs(IMAGES_DIR, exist_ok=True)
+        total = len(PLOT_JOBS) + 1
 
         print("\n开始执行可视化分析...")
         print("-" * 60)
 
-        print("\n[1/7] 数据概览...")
-        self.plot_overview()
-
-        print("\n[2/7] 特征分布分析...")
-        self.plot_distributions()
-
-        print("\n[3/7] 箱线图分析...")
-        self.plot_boxplots()
-
-        print("\n[4/7] 分组对比分析...")
-        self.plot_outcome_comparison()
-
-        print("\n[5/7] 相关性分析...")
-        self.plot_correlation_heatmap()
-
-        print("\n[6/7] 散点图矩阵...")
-        self.plot_pairplot()
-
-        print("\n[7/7] 生成分析报告...")
+        start = time.perf_counter()
+        pending, skipped, fingerprints = self._pending_jobs(force)
+        for title, _, filename in skipped:
+            print(f"  - {title}: 数据未变化，跳过（{filename}）")
+
+        manifest = load_chart_manifest()
+        if parallel and len(pending) > 1:
+            workers = workers or min(len(pending), os.cpu_count() or 1)
+            print(f"\n并行生成 {len(pending)} 张图表（{workers} 个进程）...")
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_plot_worker,
+                                     initargs=(self.data_path, self.pairplot_mode)) as pool:
+                futures = {pool.submit(_render_chart, method): (title, method, filename)
+                           for title, method, filename in pending}
+                for future in as_completed(futures):
+                    title, method, filename = futures[future]
+                    seconds = future.result()
+                    manifest[filename] = fingerprints[method]
+                    print(f"  ✓ {title}: {seconds:.2f}s")
+        else:
+            for title, method, filename in pending:
+                step = [job[1] for job in PLOT_JOBS].index(method) + 1
+                print(f"\n[{step}/{total}] {title}...")
+                getattr(self, method)()
+                manifest[filename] = fingerprints[method]
+        save_chart_manifest(manifest)
+        print(f"\n图表生成用时: {time.perf_counter() - start:.2f}s"
+              f"（生成 {len(pending)} 张，跳过 {len(skipped)} 张）")
+
+        print(f"\n[{total}/{total}] 生成分析报告...")
         self.generate_summary_report()
 
         print("\n" + "=" * 60)
@@ -388,9 +519,81 @@ class DiabetesVisualizer:
         print("=" * 60)
 
 
+# ============ 分箱统计 ============
+def binned_pair_matrix(df, features, target, bins=PAIRPLOT_BINS):
+    """
+    按 target 分组计算各特征两两之间的二维直方图（单次遍历，O(n)）。
+    返回 (edges, counts)：edges[i] 为特征 i 的分箱边界（两组共用），
+    counts[outcome][(i, j)] 为特征 i（第一维）× 特征 j（第二维）的计数，i == j 时为一维直方图。
+    """
+    values = df[features].to_numpy(dtype=float)
+    outcome = df[target].to_numpy()
+
+    edges = []
+    for col in range(values.shape[1]):
+        column = values[:, col][~np.isnan(values[:, col])]
+        lo, hi = (column.min(), column.max()) if column.size else (0.0, 1.0)
+        edges.append(np.linspace(lo, hi if hi > lo else lo + 1.0, bins + 1))
+
+    counts = {}
+    for label in (0, 1):
+        group = values[outcome == label]
+        counts[label] = {}
+        for i in range(len(features)):
+            counts[label][(i, i)] = np.histogram(group[:, i], bins=edges[i])[0]
+            for j in range(i + 1, len(features)):
+                hist = np.histogram2d(group[:, i], group[:, j], bins=[edges[i], edges[j]])[0]
+                counts[label][(i, j)] = hist
+                counts[label][(j, i)] = hist.T
+    return edges, counts
+
+
+# ============ 图表缓存清单 ============
+def load_chart_manifest(path=CHART_MANIFEST_PATH):
+    """{输出文件: 指纹}；文件不存在或损坏时返回空字典"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_chart_manifest(manifest, path=CHART_MANIFEST_PATH):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+
+
+# ============ 进程池任务 ============
+_worker_visualizer = None
+
+
+def _init_plot_worker(data_path, pairplot_mode='auto'):
+    """进程池初始化：每个进程只加载一次数据和字体"""
+    global _worker_visualizer
+    matplotlib.use('Agg')
+    setup_chinese_font()
+    _worker_visualizer = DiabetesVisualizer(data_path, pairplot_mode)
+
+
+def _render_chart(method_name):
+    """在子进程中生成一张图，返回耗时（秒）"""
+    start = time.perf_counter()
+    getattr(_worker_visualizer, method_name)()
+    return time.perf_counter() - start
+
+
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="糖尿病数据集可视化分析")
+    parser.add_argument('--data', default='./data/raw/diabetes.csv', help="原始数据 CSV")
+    parser.add_argument('--parallel', action='store_true', help="在进程池中并行生成图表")
+    parser.add_argument('--workers', type=int, default=None, help="进程数，默认 min(图表数, CPU 核数)")
+    parser.add_argument('--force', action='store_true', help="忽略缓存清单，重新生成全部图表")
+    parser.add_argument('--pairplot-mode', choices=['auto', 'scatter', 'binned'], default='auto',
+                        help=f"散点图矩阵模式，auto 在超过 {PAIRPLOT_BINNED_THRESHOLD} 行时使用分箱密度矩阵")
+    args = parser.parse_args()
+
     # 创建可视化对象
-    visualizer = DiabetesVisualizer('./data/raw/diabetes.csv')
+    visualizer = DiabetesVisualizer(args.data, args.pairplot_mode)
 
     # 运行所有分析
-    visualizer.run_all_analysis()
\ No newline at end of file
+    visualizer.run_all_analysis(parallel=args.parallel, workers=args.workers, force=args.force)
\ No newline at end of file
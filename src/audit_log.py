@@ -0,0 +1,340 @@
+"""
+糖尿病预测项目 - 预测审计日志
+功能: 以追加方式记录每次预测的输入、模型版本、原始概率、显示评分和诊断结果。
+      请求路径上只把记录放入内存队列；后台线程按批次序列化为 JSON Lines 写入本地文件，
+      文件超过大小上限后按时间戳轮转（旧文件不删除）。
+      replay() 可读取历史记录，用候选模型重新评分并与当时的决策对比。
+
+用法（在项目根目录执行）:
+    python -m src.audit_log replay --model analysis/models/candidate.pkl
+"""
+
+import argparse
+import atexit
+import glob
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# =================================================================
+# ⭐⭐⭐ 审计日志配置区 ⭐⭐⭐
+# =================================================================
+
+# 设置 DIABETES_AUDIT_LOG=0 可关闭审计日志
+ENABLED = os.environ.get('DIABETES_AUDIT_LOG', '1').lower() not in ('0', 'false', 'no', 'off')
+
+AUDIT_LOG_DIR = os.environ.get('DIABETES_AUDIT_LOG_DIR', 'logs/audit')
+AUDIT_LOG_NAME = 'predictions.jsonl'
+
+# 当前文件超过该大小后轮转
+MAX_FILE_BYTES = 50 * 1024 * 1024
+
+# 攒够多少条或等待多久后写盘一次
+FLUSH_RECORDS = 1000
+FLUSH_INTERVAL_SECONDS = 1.0
+
+# 队列上限（按入队次数计，批量记录算一次）；写盘跟不上时丢弃并计数，绝不阻塞请求
+MAX_QUEUE_SIZE = 10000
+
+# 与 model_predictor.NUMERICAL_FEATURES 一致（这里不导入，避免循环依赖）
+INPUT_FEATURES = [
+    'Pregnancies', 'Glucose', 'BloodPressure', 'SkinThickness',
+    'Insulin', 'BMI', 'DiabetesPedigreeFunction', 'Age'
+]
+
+_STOP = object()
+
+
+def _now():
+    return datetime.now().isoformat(timespec='milliseconds')
+
+
+class AuditLogger:
+    """
+    后台批量写盘的审计日志。
+    record()/record_batch() 只做入队，序列化和文件 I/O 都在后台线程完成。
+    """
+
+    def __init__(self, log_dir=AUDIT_LOG_DIR, max_bytes=MAX_FILE_BYTES,
+                 flush_records=FLUSH_RECORDS, flush_interval=FLUSH_INTERVAL_SECONDS,
+                 max_queue_size=MAX_QUEUE_SIZE):
+        self.log_dir = log_dir
+        self.path = os.path.join(log_dir, AUDIT_LOG_NAME)
+        self.max_bytes = max_bytes
+        self.flush_records = flush_records
+        self.flush_interval = flush_interval
+
+        # 统计信息：已写入记录数、因队列满被丢弃的入队次数
+        self.written = 0
+        self.dropped = 0
+
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name="prediction-audit-log", daemon=True)
+        self._worker.start()
+
+    # ---------------- 请求路径 ----------------
+
+    def _enqueue(self, item):
+        if self._closed:
+            return
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.dropped += 1
+
+    def record(self, raw_data: dict, risk_score, prediction, model_version,
+               source, raw_probability=None):
+        """记录一次单条预测；raw_probability 在查表或命中缓存时可能没有，记为 null"""
+        self._enqueue(('one', {
+            'ts': _now(),
+            'source': source,
+            'model_version': model_version,
+            'inputs': {f: float(raw_data[f]) for f in INPUT_FEATURES},
+            'raw_probability': None if raw_probability is None else float(raw_probability),
+            'risk_score': float(risk_score),
+            'prediction': int(prediction),
+        }))
+
+    def record_batch(self, df_raw: pd.DataFrame, results: pd.DataFrame, model_version, source):
+        """
+        记录一次批量预测。results 为 predict_risk_batch 的返回值。
+        只复制需要的列后整体入队，逐行转换留给后台线程。
+        """
+        frame = df_raw[INPUT_FEATURES].astype(float)
+        frame = frame.assign(
+            raw_probability=results['raw_probability'].to_numpy(),
+            risk_score=results['risk_score'].to_numpy(),
+            prediction=results['prediction'].to_numpy(),
+        )
+        self._enqueue(('batch', (_now(), source, model_version, frame)))
+
+    # ---------------- 后台线程 ----------------
+
+    @staticmethod
+    def _batch_lines(ts, source, model_version, frame):
+        inputs = frame[INPUT_FEATURES].to_dict(orient='records')
+        raw = frame['raw_probability'].tolist()
+        scores = frame['risk_score'].tolist()
+        predictions = frame['prediction'].astype(int).tolist()
+        for i in range(len(frame)):
+            yield json.dumps({
+                'ts': ts,
+                'source': source,
+                'model_version': model_version,
+                'inputs': inputs[i],
+                'raw_probability': raw[i],
+                'risk_score': scores[i],
+                'prediction': predictions[i],
+            }, ensure_ascii=False)
+
+    def _rotate_if_needed(self):
+        if os.path.exists(self.path) and os.path.getsize(self.path) >= self.max_bytes:
+            stamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+            base, ext = os.path.splitext(self.path)
+            os.replace(self.path, f"{base}.{stamp}{ext}")
+
+    def _write(self, items):
+        lines = []
+        for kind, payload in items:
+            if kind == 'one':
+                lines.append(json.dumps(payload, ensure_ascii=False))
+            else:
+                lines.extend(self._batch_lines(*payload))
+
+        if not lines:
+            return
+
+        os.makedirs(self.log_dir, exist_ok=True)
+        self._rotate_if_needed()
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        self.written += len(lines)
+
+    def _run(self):
+        pending, pending_rows = [], 0
+        deadline = None
+
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is not None and item is not _STOP:
+                pending.append(item)
+                pending_rows += len(item[1][3]) if item[0] == 'batch' else 1
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+
+            if pending and (item is None or item is _STOP or pending_rows >= self.flush_records
+                            or time.monotonic() >= deadline):
+                try:
+                    self._write(pending)
+                except Exception as e:
+                    # 审计写盘失败不能影响预测服务，只输出到标准错误
+                    print(f"审计日志写入失败: {e}", flush=True)
+                pending, pending_rows = [], 0
+                deadline = None
+
+            if item is _STOP:
+                return
+
+    def close(self, timeout=5.0):
+        """写出剩余记录并停止后台线程"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._worker.join(timeout)
+
+    def stats(self):
+        return {
+            'written': self.written,
+            'dropped': self.dropped,
+            'queued': self._queue.qsize(),
+            'path': self.path,
+        }
+
+
+class _DisabledAuditLogger:
+    """关闭审计日志时使用的空实现，接口与 AuditLogger 一致"""
+
+    def record(self, *args, **kwargs):
+        pass
+
+    def record_batch(self, *args, **kwargs):
+        pass
+
+    def close(self, timeout=None):
+        pass
+
+    def stats(self):
+        return {'written': 0, 'dropped': 0, 'queued': 0, 'path': None}
+
+
+_audit_logger = None
+_audit_lock = threading.Lock()
+
+
+def get_audit_logger():
+    """进程级共享的审计日志实例，首次调用时启动后台线程，退出时自动写出剩余记录"""
+    global _audit_logger
+    with _audit_lock:
+        if _audit_logger is None:
+            if ENABLED:
+                _audit_logger = AuditLogger()
+                atexit.register(_audit_logger.close)
+            else:
+                _audit_logger = _DisabledAuditLogger()
+        return _audit_logger
+
+
+# =================================================================
+# 回放
+# =================================================================
+
+def audit_log_files(log_dir=AUDIT_LOG_DIR):
+    """按时间顺序返回全部审计文件：已轮转的文件在前，当前文件最后"""
+    base, ext = os.path.splitext(AUDIT_LOG_NAME)
+    rotated = sorted(glob.glob(os.path.join(log_dir, f"{base}.*{ext}")))
+    current = os.path.join(log_dir, AUDIT_LOG_NAME)
+    return rotated + ([current] if os.path.exists(current) else [])
+
+
+def read_audit_log(log_dir=AUDIT_LOG_DIR, source=None) -> pd.DataFrame:
+    """读取审计记录为平铺的 DataFrame（inputs 展开为 8 列），可按 source 过滤"""
+    frames = [pd.read_json(path, lines=True, dtype=False) for path in audit_log_files(log_dir)]
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return pd.DataFrame(columns=['ts', 'source', 'model_version'] + INPUT_FEATURES
+                            + ['raw_probability', 'risk_score', 'prediction'])
+
+    df = pd.concat(frames, ignore_index=True)
+    if source is not None:
+        df = df[df['source'] == source].reset_index(drop=True)
+
+    inputs = pd.DataFrame(df.pop('inputs').tolist(), index=df.index)[INPUT_FEATURES]
+    return pd.concat([df[['ts', 'source', 'model_version']], inputs,
+                      df[['raw_probability', 'risk_score', 'prediction']]], axis=1)
+
+
+def replay(candidate_model, records=None, log_dir=AUDIT_LOG_DIR, threshold=None):
+    """
+    用候选模型重新评分历史流量。
+    candidate_model 可以是已加载的模型对象或 .pkl 路径；records 默认读取全部审计记录。
+    返回在原记录后追加 candidate_raw_probability / candidate_risk_score /
+    candidate_prediction / decision_changed 的 DataFrame。
+    """
+    from src.model_predictor import OPTIMAL_THRESHOLD, adjust_probability_display, preprocess_batch
+
+    if isinstance(candidate_model, str):
+        import joblib
+        candidate_model = joblib.load(candidate_model)
+
+    threshold = OPTIMAL_THRESHOLD if threshold is None else threshold
+    df = read_audit_log(log_dir) if records is None else records.reset_index(drop=True)
+    if df.empty:
+        return df
+
+    X_final = preprocess_batch(df[INPUT_FEATURES])
+    raw_probability = candidate_model.predict_proba(X_final[list(candidate_model.feature_names_in_)])[:, 1]
+
+    result = df.copy()
+    result['candidate_raw_probability'] = raw_probability
+    result['candidate_risk_score'] = adjust_probability_display(raw_probability) * 100
+    result['candidate_prediction'] = (raw_probability >= threshold).astype(int)
+    result['decision_changed'] = result['candidate_prediction'] != result['prediction'].astype(int)
+    return result
+
+
+def summarize_replay(result: pd.DataFrame) -> dict:
+    """回放结果摘要：记录数、决策变化数、阳性率变化、评分平均偏移"""
+    if result.empty:
+        return {'records': 0}
+    return {
+        'records': len(result),
+        'decision_changed': int(result['decision_changed'].sum()),
+        'changed_rate': float(result['decision_changed'].mean()),
+        'positive_rate_logged': float(result['prediction'].mean()),
+        'positive_rate_candidate': float(result['candidate_prediction'].mean()),
+        'mean_score_shift': float(np.mean(result['candidate_risk_score'] - result['risk_score'])),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="预测审计日志工具")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    replay_parser = subparsers.add_parser('replay', help="用候选模型回放历史流量")
+    replay_parser.add_argument('--model', required=True, help="候选模型 .pkl 路径")
+    replay_parser.add_argument('--log-dir', default=AUDIT_LOG_DIR)
+    replay_parser.add_argument('--source', default=None, help="只回放指定来源的记录")
+    replay_parser.add_argument('--threshold', type=float, default=None)
+    replay_parser.add_argument('-o', '--output', default=None, help="逐条对比结果输出 CSV")
+    args = parser.parse_args()
+
+    records = read_audit_log(args.log_dir, source=args.source)
+    result = replay(args.model, records=records, threshold=args.threshold)
+    summary = summarize_replay(result)
+
+    print(f"回放记录数: {summary['records']:,}")
+    if summary['records']:
+        print(f"决策变化: {summary['decision_changed']:,} ({summary['changed_rate']:.2%})")
+        print(f"阳性率: {summary['positive_rate_logged']:.2%} -> {summary['positive_rate_candidate']:.2%}")
+        print(f"平均评分偏移: {summary['mean_score_shift']:+.2f}")
+
+    if args.output:
+        result.to_csv(args.output, index=False, encoding='utf-8-sig')
+        print(f"对比结果已保存: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+"""
+糖尿病预测项目 - 批量筛查后台任务队列
+功能: 批量筛查页面不再在一次脚本运行中同步完成全部预测，而是提交一个任务：
+        - 任务（输入数据、进度、状态）持久化在 JOBS_DIR/<job_id>/ 下，浏览器断线重连或刷新后仍可查看
+        - 后台线程按 JOB_CHUNK_ROWS 行分块调用 screen_frame()，每完成一块就写出该块结果并更新进度
+        - 支持取消（在当前块完成后停止）和从最后完成的块继续（服务重启后未完成的任务标记为 interrupted）
+        - 完成后 load_results() 按原顺序拼接各块结果，列与同步预测完全一致
+      job_id 来自页面 URL（?job=...），不符合 JOB_ID_PATTERN 的一律视为不存在的任务，不会拼进文件路径；
+      job_id 相当于访问凭证：页面只列出本会话提交的任务，不提供全部任务的列表。
+      已结束的任务按 JOB_RETENTION_DAYS / JOB_MAX_FINISHED 定期清理（启动时和每次提交后），数据不会无限堆积。
+      数据和结果以 Parquet 保存（pyarrow 为 Streamlit 的依赖），读取时不会执行任意代码。
+
+目录结构:
+    JOBS_DIR/<job_id>/job.json             任务状态（原子替换写入）
+    JOBS_DIR/<job_id>/input.parquet        提交时的数据
+    JOBS_DIR/<job_id>/parts/00000.parquet  各块结果
+"""
+
+import json
+import math
+import os
+import queue
+import re
+import shutil
+import threading
+import uuid
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from src.audit_log import get_audit_logger
+from src.batch_scoring import screen_frame
+from src.model_predictor import get_model_version
+
+# =================================================================
+# ⭐⭐⭐ 任务队列配置区 ⭐⭐⭐
+# =================================================================
+
+JOBS_DIR = os.environ.get('DIABETES_JOBS_DIR', 'logs/jobs')
+
+# 每块行数：决定进度条粒度和取消 / 续跑的最小单位
+JOB_CHUNK_ROWS = 20_000
+
+AUDIT_SOURCE = 'batch_screening'
+
+# 已结束任务的保留策略：超过保留天数，或超出保留个数的较早任务，连同数据一起删除
+JOB_RETENTION_DAYS = 7
+JOB_MAX_FINISHED = 50
+
+# submit() 生成的 job_id 格式：提交时间 + 6 位随机十六进制
+JOB_ID_PATTERN = re.compile(r'\d{8}-\d{6}-[0-9a-f]{6}')
+
+# 任务状态
+QUEUED = 'queued'
+RUNNING = 'running'
+COMPLETED = 'completed'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+INTERRUPTED = 'interrupted'     # 运行中服务进程退出
+
+RESUMABLE_STATUSES = (CANCELLED, INTERRUPTED, FAILED)
+FINISHED_STATUSES = (COMPLETED, FAILED, CANCELLED, INTERRUPTED)
+
+STATUS_NAMES_CN = {
+    QUEUED: '排队中',
+    RUNNING: '运行中',
+    COMPLETED: '已完成',
+    FAILED: '失败',
+    CANCELLED: '已取消',
+    INTERRUPTED: '已中断',
+}
+
+
+def _now():
+    return datetime.now().isoformat(timespec='seconds')
+
+
+def is_valid_job_id(job_id):
+    return isinstance(job_id, str) and JOB_ID_PATTERN.fullmatch(job_id) is not None
+
+
+def _write_frame(df, path):
+    """原子写出 Parquet：先写临时文件再替换，读取方不会看到写了一半的文件"""
+    df.to_parquet(path + '.tmp')
+    os.replace(path + '.tmp', path)
+
+
+class BatchJobQueue:
+    """单个后台线程按提交顺序执行批量筛查任务，状态全部落盘"""
+
+    def __init__(self, jobs_dir=JOBS_DIR, chunk_rows=JOB_CHUNK_ROWS,
+                 retention_days=JOB_RETENTION_DAYS, max_finished=JOB_MAX_FINISHED):
+        self.jobs_dir = jobs_dir
+        self.chunk_rows = chunk_rows
+        self.retention_days = retention_days
+        self.max_finished = max_finished
+        os.makedirs(jobs_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._cancel_requested = set()
+        self._queue = queue.Queue()
+
+        # 上一个进程遗留的排队 / 运行中任务已无人执行，标记为中断，可手动续跑
+        for job in self.list_jobs():
+            if job['status'] in (QUEUED, RUNNING):
+                self._update(job['job_id'], status=INTERRUPTED)
+        self.sweep()
+
+        self._worker = threading.Thread(target=self._run, name="batch-screening-jobs", daemon=True)
+        self._worker.start()
+
+    # ---------------- 持久化 ----------------
+
+    def _job_dir(self, job_id):
+        if not is_valid_job_id(job_id):
+            raise ValueError(f"非法的任务编号: {job_id!r}")
+        return os.path.join(self.jobs_dir, job_id)
+
+    def _input_path(self, job_id):
+        return os.path.join(self._job_dir(job_id), 'input.parquet')
+
+    def _part_path(self, job_id, index):
+        return os.path.join(self._job_dir(job_id), 'parts', f'{index:05d}.parquet')
+
+    def get(self, job_id):
+        """读取任务状态，任务不存在或 job_id 格式不合法时返回 None"""
+        if not is_valid_job_id(job_id):
+            return None
+        path = os.path.join(self._job_dir(job_id), 'job.json')
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _write(self, job):
+        path = os.path.join(self._job_dir(job['job_id']), 'job.json')
+        tmp = path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(job, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, path)
+
+    def _update(self, job_id, **changes):
+        with self._lock:
+            job = self.get(job_id)
+            job.update(changes, updated_at=_now())
+            self._write(job)
+            return job
+
+    def list_jobs(self):
+        """全部任务，最新提交的在前（仅供启动恢复和清理使用，不要展示给页面用户）"""
+        jobs = []
+        for name in os.listdir(self.jobs_dir):
+            job = self.get(name)
+            if job is not None:
+                jobs.append(job)
+        return sorted(jobs, key=lambda job: job['created_at'], reverse=True)
+
+    # ---------------- 页面调用 ----------------
+
+    def submit(self, df: pd.DataFrame, filename=None):
+        """保存数据并排队，返回 job_id"""
+        job_id = datetime.now().strftime('%Y%m%d-%H%M%S-') + uuid.uuid4().hex[:6]
+        os.makedirs(os.path.join(self._job_dir(job_id), 'parts'))
+        _write_frame(df, self._input_path(job_id))
+
+        job = {
+            'job_id': job_id,
+            'filename': filename,
+            'status': QUEUED,
+            'total_rows': len(df),
+            'chunk_rows': self.chunk_rows,
+            'total_chunks': max(1, math.ceil(len(df) / self.chunk_rows)),
+            'completed_chunks': 0,
+            'model_version': get_model_version(),
+            'created_at': _now(),
+            'updated_at': _now(),
+            'error': None,
+        }
+        with self._lock:
+            self._write(job)
+        self._queue.put(job_id)
+        self.sweep()
+        return job_id
+
+    def cancel(self, job_id):
+        """排队中的任务直接取消；运行中的任务在当前块完成后停止，已完成的块保留用于续跑"""
+        with self._lock:
+            job = self.get(job_id)
+            if job is None:
+                return
+            if job['status'] == QUEUED:
+                job.update(status=CANCELLED, updated_at=_now())
+                self._write(job)
+            elif job['status'] == RUNNING:
+                self._cancel_requested.add(job_id)
+
+    def resume(self, job_id):
+        """从最后完成的块继续执行已取消 / 中断 / 失败的任务"""
+        with self._lock:
+            job = self.get(job_id)
+            if job is None or job['status'] not in RESUMABLE_STATUSES:
+                return False
+            job.update(status=QUEUED, error=None, updated_at=_now())
+            self._write(job)
+        self._queue.put(job_id)
+        return True
+
+    def cancel_requested(self, job_id):
+        return job_id in self._cancel_requested
+
+    def load_results(self, job_id):
+        """按顺序拼接已完成块的结果（任务未完成时返回已完成部分）"""
+        job = self.get(job_id)
+        if job is None:
+            return None
+        parts = [pd.read_parquet(self._part_path(job_id, i)) for i in range(job['completed_chunks'])]
+        if not parts:
+            return None
+        return pd.concat(parts)
+
+    def delete(self, job_id):
+        """删除已结束的任务及其数据"""
+        job = self.get(job_id)
+        if job is not None and job['status'] in FINISHED_STATUSES:
+            shutil.rmtree(self._job_dir(job_id), ignore_errors=True)
+
+    def sweep(self):
+        """删除超过保留天数、或超出保留个数的已结束任务，返回删除的个数"""
+        cutoff = (datetime.now() - timedelta(days=self.retention_days)).isoformat(timespec='seconds')
+        finished = [job for job in self.list_jobs() if job['status'] in FINISHED_STATUSES]
+        expired = finished[self.max_finished:] + [job for job in finished[:self.max_finished]
+                                                  if job['updated_at'] < cutoff]
+        for job in expired:
+            self.delete(job['job_id'])
+        return len(expired)
+
+    # ---------------- 后台线程 ----------------
+
+    def _run(self):
+        while True:
+            job_id = self._queue.get()
+            try:
+                self._process(job_id)
+            except Exception as e:
+                self._update(job_id, status=FAILED, error=str(e))
+
+    def _process(self, job_id):
+        with self._lock:
+            job = self.get(job_id)
+            if job is None or job['status'] != QUEUED:
+                return
+            # 模型已更换时不能与旧模型的结果拼接，从头开始
+            model_version = get_model_version()
+            if job['model_version'] != model_version:
+                job.update(completed_chunks=0, model_version=model_version)
+            job.update(status=RUNNING, started_at=_now(), updated_at=_now())
+            self._write(job)
+
+        df = pd.read_parquet(self._input_path(job_id))
+        audit = get_audit_logger()
+        rows = job['chunk_rows']
+
+        for index in range(job['completed_chunks'], job['total_chunks']):
+            if job_id in self._cancel_requested:
+                self._cancel_requested.discard(job_id)
+                self._update(job_id, status=CANCELLED)
+                return
+
+            chunk = df.iloc[index * rows:(index + 1) * rows]
+            result_df, scores = screen_frame(chunk)
+
+            _write_frame(result_df, self._part_path(job_id, index))
+            audit.record_batch(chunk, scores, model_version, AUDIT_SOURCE)
+            self._update(job_id, completed_chunks=index + 1)
+
+        # 最后一块完成后才到达的取消请求不再生效
+        self._cancel_requested.discard(job_id)
+        self._update(job_id, status=COMPLETED, finished_at=_now())
+
+
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue():
+    """进程级共享的任务队列，首次调用时启动后台线程"""
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is None:
+            _job_queue = BatchJobQueue()
+        return _job_queue
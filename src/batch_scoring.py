@@ -0,0 +1,304 @@
+"""
+糖尿病预测项目 - 命令行批量筛查
+功能: 不经过浏览器上传，直接对诊所导出的 CSV 做批量风险评估（无需 Streamlit 运行时）。
+      输出列与 pages/2_batch_screening.py 完全相同（8 项指标和透传的编号类列 + 风险评分、风险等级、患病概率、
+      主要风险因素1-3），二者共用 screen_frame()，读取时的列裁剪规则也相同（src/csv_ingest.py），支持 .gz / .zip 输入。
+      --workers > 1 时按行对齐的字节区间把文件切块，子进程各自解析并评分，主进程按原顺序写出；
+      每块先按 src/data_validation.py 校验，缺失、非数值或超出合理范围的行写入隔离文件（附源数据行号和错误说明），不参与预测。
+      结束时打印吞吐量（行/秒）和峰值内存。每一批结果同样写入审计日志（来源 batch_cli）。
+
+用法（在项目根目录执行）:
+    python -m src.batch_scoring score input.csv -o out.parquet
+    python -m src.batch_scoring score input.csv -o out.csv --workers 0 --chunk-size 200000
+    python -m src.batch_scoring score input.csv -o out.parquet --quarantine bad_rows.csv
+    python -m src.batch_scoring score export.csv.gz -o out.parquet --keep-columns 门诊号,科室
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from src.audit_log import get_audit_logger
+from src.chunked_preprocessing import count_lines, csv_byte_ranges, ordered_results
+from src.csv_ingest import detect_compression, open_stream, read_block, read_header, select_columns
+from src.data_validation import missing_columns, split_valid_rows, validate_frame
+from src.model_predictor import (
+    get_model_version,
+    load_model,
+    load_standardization_params,
+    predict_risk_batch,
+    top_risk_drivers,
+)
+
+# =================================================================
+# ⭐⭐⭐ 批量筛查配置区 ⭐⭐⭐
+# =================================================================
+
+# 单进程模式下每次读取的行数
+DEFAULT_CHUNK_SIZE = 100_000
+
+# 多进程模式下每个任务处理的字节数（约 20 万行）
+SCORING_BLOCK_BYTES = 8 * 1024 * 1024
+
+# 风险等级边界（与页面的 get_risk_category 一致）
+RISK_LEVELS = [(30, '低风险'), (70, '中等风险')]
+HIGHEST_RISK_LEVEL = '高风险'
+
+AUDIT_SOURCE = 'batch_cli'
+
+# 未指定 --quarantine 时，隔离文件为输出文件名加该后缀
+QUARANTINE_SUFFIX = '.quarantine.csv'
+
+
+def get_risk_category(score):
+    """获取风险分类"""
+    for upper, label in RISK_LEVELS:
+        if score < upper:
+            return label
+    return HIGHEST_RISK_LEVEL
+
+
+def risk_categories(scores) -> np.ndarray:
+    """get_risk_category 的向量化版本（NaN 与标量版本一样落入最高一档）"""
+    scores = np.asarray(scores, dtype=float)
+    return np.select([scores < upper for upper, _ in RISK_LEVELS],
+                     [label for _, label in RISK_LEVELS], default=HIGHEST_RISK_LEVEL)
+
+
+def screen_frame(df: pd.DataFrame):
+    """
+    对一批原始数据做筛查，返回 (结果表, 预测结果)。
+    结果表 = 原始列 + 风险评分、风险等级、患病概率、主要风险因素1-3；
+    预测结果为 predict_risk_batch 的返回值（含 contrib_ 列），供审计日志使用。
+    """
+    result_df = df.copy()
+
+    # 一次矩阵预测，同时得到每位患者各项指标的 logit 贡献
+    scores = predict_risk_batch(result_df, explain=True)
+
+    result_df['风险评分'] = scores['risk_score'].round(1)
+    result_df['风险等级'] = risk_categories(result_df['风险评分'])
+    result_df['患病概率'] = scores['raw_probability']
+
+    # 附加个体化解释：贡献最大的前三项指标
+    contrib_cols = [col for col in scores.columns if col.startswith('contrib_')]
+    result_df = result_df.join(top_risk_drivers(scores[contrib_cols]))
+    return result_df, scores
+
+
+# =================================================================
+# 输入与输出
+# =================================================================
+
+def input_columns(path, keep_columns=None):
+    """只读表头检查必需列（缺失时抛出 ValueError），返回需要解析的列"""
+    columns = read_header(path)
+    missing = missing_columns(columns)
+    if missing:
+        raise ValueError("缺少必需的列: " + ', '.join(missing))
+    return select_columns(columns, keep_columns)
+
+
+class ResultWriter:
+    """按顺序追加写出结果；.parquet 需要 pyarrow，其余按 CSV（utf-8-sig，与页面导出一致）写出"""
+
+    def __init__(self, path):
+        self.path = path
+        self.parquet = path.lower().endswith('.parquet')
+        self._writer = None
+        self._schema = None
+        self._first = True
+        if self.parquet:
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise RuntimeError("写出 Parquet 需要安装 pyarrow，或改用 .csv 输出")
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def write(self, df: pd.DataFrame):
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            if self._writer is None:
+                table = pa.Table.from_pandas(df, preserve_index=False)
+                self._schema = table.schema
+                self._writer = pq.ParquetWriter(self.path, self._schema)
+            else:
+                # 透传列在不同分块中推断出的类型可能不同，统一转换为第一块的类型
+                table = pa.Table.from_pandas(df, schema=self._schema, preserve_index=False)
+            self._writer.write_table(table)
+        else:
+            df.to_csv(self.path, mode='w' if self._first else 'a', header=self._first, index=False,
+                      encoding='utf-8-sig' if self._first else 'utf-8')
+        self._first = False
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+# =================================================================
+# 多进程评分
+# =================================================================
+
+def _init_worker():
+    """子进程只加载一次模型和标准化参数"""
+    load_model()
+    load_standardization_params()
+
+
+def _screen_chunk(chunk, row_offset):
+    """
+    校验一块数据，返回 (结果表, 审计所需的预测列, 隔离行)；整块都不合格时前两项为 None。
+    row_offset 为本块之前的数据行数，隔离行中的源数据行号按它换算为整个文件中的行号。
+    """
+    valid, quarantined = split_valid_rows(chunk, validate_frame(chunk, row_offset=row_offset))
+    if len(valid) == 0:
+        return None, None, quarantined
+    result_df, scores = screen_frame(valid)
+    return result_df, scores[['raw_probability', 'risk_score', 'prediction']], quarantined
+
+
+def _score_range(path, header, start, end, usecols, row_offset):
+    """子进程：解析一个行块并筛查"""
+    with open(path, 'rb') as f:
+        f.seek(start)
+        chunk = read_block(header + f.read(end - start), usecols)
+    return _screen_chunk(chunk, row_offset)
+
+
+def _iter_scored_chunks(input_path, usecols, workers, chunk_size, block_bytes):
+    if workers <= 1:
+        # 流式读取（压缩文件边解压边解析）；分块迭代无法在中途改变类型，这里由 pandas 推断类型
+        with open_stream(input_path, detect_compression(input_path)) as stream:
+            row_offset = 0
+            for chunk in pd.read_csv(stream, chunksize=chunk_size, usecols=usecols):
+                yield _screen_chunk(chunk, row_offset)
+                row_offset += len(chunk)
+        return
+
+    header, ranges = csv_byte_ranges(input_path, block_bytes, min_blocks=workers)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        # 先并行数行数，得到每个行块在源文件中的起始行号
+        line_counts = list(pool.map(count_lines, [input_path] * len(ranges),
+                                    [r[0] for r in ranges], [r[1] for r in ranges]))
+        offsets = np.concatenate([[0], np.cumsum(line_counts)[:-1]]).astype(int).tolist()
+        tasks = [(input_path, header, start, end, usecols, offset) for (start, end), offset in zip(ranges, offsets)]
+        yield from ordered_results(pool, _score_range, tasks, workers * 2)
+
+
+def peak_rss_mb():
+    """(主进程, 子进程中最大) 的峰值常驻内存（MB）；非 Unix 平台返回 (None, None)"""
+    try:
+        import resource
+    except ImportError:
+        return None, None
+    # Linux 上 ru_maxrss 单位为 KB，macOS 上为字节
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale
+    return own, children
+
+
+def score_file(input_path, output_path, workers=1, chunk_size=DEFAULT_CHUNK_SIZE,
+               block_bytes=SCORING_BLOCK_BYTES, quarantine_path=None, keep_columns=None):
+    """对整个文件做批量筛查并按原顺序写出，返回运行摘要"""
+    usecols = input_columns(input_path, keep_columns)
+    quarantine_path = quarantine_path or os.path.splitext(output_path)[0] + QUARANTINE_SUFFIX
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    if workers > 1 and detect_compression(input_path):
+        # 压缩文件无法按字节区间切块，只能单进程流式处理
+        print("压缩输入只能单进程处理，已忽略 --workers", file=sys.stderr)
+        workers = 1
+
+    model, _ = load_model()
+    if model is None:
+        raise RuntimeError("模型未加载，无法进行预测。")
+    model_version = get_model_version()
+    audit = get_audit_logger()
+
+    start = time.perf_counter()
+    rows = quarantined_rows = 0
+    risk_counts = pd.Series(0, index=[label for _, label in RISK_LEVELS] + [HIGHEST_RISK_LEVEL])
+    writer = ResultWriter(output_path)
+    # 隔离文件只在出现异常行时创建
+    quarantine_writer = None
+    try:
+        chunks = _iter_scored_chunks(input_path, usecols, workers, chunk_size, block_bytes)
+        for result_df, scores, quarantined in chunks:
+            if result_df is not None:
+                writer.write(result_df)
+                audit.record_batch(result_df, scores, model_version, AUDIT_SOURCE)
+                risk_counts = risk_counts.add(result_df['风险等级'].value_counts(), fill_value=0)
+                rows += len(result_df)
+            if len(quarantined):
+                quarantine_writer = quarantine_writer or ResultWriter(quarantine_path)
+                quarantine_writer.write(quarantined)
+                quarantined_rows += len(quarantined)
+    finally:
+        writer.close()
+        if quarantine_writer is not None:
+            quarantine_writer.close()
+    seconds = time.perf_counter() - start
+
+    own_rss, child_rss = peak_rss_mb()
+    return {
+        'rows': rows,
+        'quarantined_rows': quarantined_rows,
+        'quarantine_path': quarantine_path if quarantined_rows else None,
+        'seconds': seconds,
+        'rows_per_second': rows / seconds if seconds > 0 else float('nan'),
+        'workers': workers,
+        'risk_counts': risk_counts.astype(int).to_dict(),
+        'peak_rss_mb': own_rss,
+        'peak_worker_rss_mb': child_rss if workers > 1 else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="命令行批量筛查（输出列与批量筛查页面一致）")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    score_parser = subparsers.add_parser('score', help="对 CSV 文件批量评分")
+    score_parser.add_argument('input', help="包含 8 项指标的 CSV（可为 .gz / .zip）")
+    score_parser.add_argument('-o', '--output', required=True, help="输出文件（.parquet 或 .csv）")
+    score_parser.add_argument('--workers', type=int, default=1, help="进程数，0 表示使用全部 CPU 核")
+    score_parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="单进程模式每块行数")
+    score_parser.add_argument('--block-mb', type=float, default=SCORING_BLOCK_BYTES / 1024 / 1024,
+                              help="多进程模式每个任务的字节数（MB）")
+    score_parser.add_argument('--quarantine', help="异常行输出文件（默认为输出文件名加 " + QUARANTINE_SUFFIX + "）")
+    score_parser.add_argument('--keep-columns', help="除 8 项指标外保留到结果中的列，逗号分隔（默认自动识别编号类列）")
+    args = parser.parse_args()
+
+    keep_columns = [col.strip() for col in args.keep_columns.split(',')] if args.keep_columns else None
+    try:
+        summary = score_file(args.input, args.output, args.workers, args.chunk_size,
+                             int(args.block_mb * 1024 * 1024), args.quarantine, keep_columns)
+    except (ValueError, RuntimeError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"✅ 已筛查 {summary['rows']:,} 行 -> {args.output}")
+    print(f"   用时 {summary['seconds']:.2f} 秒，吞吐量 {summary['rows_per_second']:,.0f} 行/秒"
+          f"（{summary['workers']} 个进程）")
+    for level, count in summary['risk_counts'].items():
+        share = count / summary['rows'] * 100 if summary['rows'] else 0.0
+        print(f"   {level}: {count:,} ({share:.1f}%)")
+    if summary['quarantined_rows']:
+        print(f"⚠️ {summary['quarantined_rows']:,} 行未通过校验，已隔离 -> {summary['quarantine_path']}")
+    if summary['peak_rss_mb'] is not None:
+        line = f"   峰值内存: 主进程 {summary['peak_rss_mb']:.0f} MB"
+        if summary['peak_worker_rss_mb'] is not None:
+            line += f"，子进程最大 {summary['peak_worker_rss_mb']:.0f} MB"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,417 @@
+"""
+糖尿病预测项目 - 分块（out-of-core）预处理流程
+功能: 把 data_pre_process 中的分类(2)、按年龄组中位数填充(3)、IQR 截断(5)、
+      训练/测试划分(7) 和 Z-score 标准化(8) 改为分块执行，内存占用只与块大小有关：
+        第一遍：扫描原始数据，用分位数草图拟合各年龄组填充中位数和填充后的 IQR 边界；
+        第二遍：逐块分类、填充、截断，按患者键的哈希划分训练/测试集并追加写出，
+                同时累计训练集的均值/标准差；
+        最后对写出的训练/测试集逐块标准化，生成 *_normalized.csv。
+      划分不需要整体打乱：同一患者键总是落在同一侧，结果与块大小无关。
+      --workers > 1 时，变换和标准化阶段按字节区间把文件切成互不相交的行块，
+      在进程池中并行解析和变换（拟合参数通过 initializer 每个进程只传一次），
+      主进程按原顺序拼接写出。训练/测试集与单进程模式逐字节一致；各块的矩按不同顺序合并，
+      标准化参数只在浮点舍入位上有差别。
+
+用法（在项目根目录执行）:
+    python -m src.chunked_preprocessing --input data/synthetic/population.csv --output-dir data/processed/chunked
+    python -m src.chunked_preprocessing --input big.csv --output-dir out --key-col PatientID
+    python -m src.chunked_preprocessing --input big.csv --output-dir out --workers 32
+"""
+
+import argparse
+import io
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from src.streaming_stats import DEFAULT_CHUNK_SIZE, QuantileSketch, RunningMoments, iter_csv_chunks, sketch_k_for_error
+
+# =================================================================
+# ⭐⭐⭐ 流程配置区（与 data_pre_process 各脚本保持一致）⭐⭐⭐
+# =================================================================
+
+TARGET_COL = 'Outcome'
+
+NUMERIC_COLS = [
+    'Pregnancies', 'Glucose', 'BloodPressure', 'SkinThickness',
+    'Insulin', 'BMI', 'DiabetesPedigreeFunction', 'Age'
+]
+
+# 3_fill_missing_value.py：0 值按年龄组（非 0 值）中位数填充
+ZERO_TO_FILL_COLS = ['Glucose', 'BloodPressure', 'SkinThickness', 'BMI', 'Insulin']
+
+# 5_eliminate_outlier.py：按 Q1 - 1.5 IQR / Q3 + 1.5 IQR 截断
+CLIP_COLS = ['SkinThickness', 'Insulin', 'BloodPressure', 'BMI', 'DiabetesPedigreeFunction', 'Glucose']
+
+# 7_data_sampling.py：测试集占 20%
+TEST_SIZE = 0.2
+
+# 哈希划分的盐值：修改后划分结果整体改变
+SPLIT_SALT = 'diabetes-split-42'
+
+# 分位数草图的目标秩误差
+DEFAULT_EPSILON = 0.001
+
+# 并行模式下每个行块的目标字节数
+PARALLEL_BLOCK_BYTES = 32 * 1024 * 1024
+
+# 默认输出目录：不能是 data/processed，否则会覆盖 model_predictor 计算标准化参数所用的 diabetes_train.csv
+DEFAULT_OUTPUT_DIR = "data/processed/chunked"
+
+OUTPUT_FILES = {
+    'train': 'diabetes_train.csv',
+    'test': 'diabetes_test.csv',
+    'train_normalized': 'diabetes_train_normalized.csv',
+    'test_normalized': 'diabetes_test_normalized.csv',
+    'params': 'preprocessing_params.json',
+}
+
+
+# =================================================================
+# 逐块变换（只依赖已拟合的参数，可在任意块上独立执行）
+# =================================================================
+
+def categorize_raw(df: pd.DataFrame) -> pd.DataFrame:
+    """按 2_data_categorization.py 的规则对原始值分组（在填充之前执行，与原流程一致）"""
+    p, b, a = df['Pregnancies'], df['BMI'], df['Age']
+    return pd.DataFrame({
+        'Pregnancies_category': np.select(
+            [p == 0, (p >= 1) & (p <= 3), (p >= 4) & (p <= 7)],
+            ['0次', '1-3次', '4-7次'], default='≥8次'),
+        'BMI_category': np.select(
+            [b < 27, (b >= 27) & (b < 32), (b >= 32) & (b < 37)],
+            ['<27', '27-32', '32-37'], default='≥37'),
+        'Age_category': np.select(
+            [a < 20, (a >= 20) & (a < 30), (a >= 30) & (a < 40)],
+            ['<20岁', '20-30岁', '30-40岁'], default='≥40岁'),
+    }, index=df.index)
+
+
+def fill_chunk(df: pd.DataFrame, params: dict) -> pd.DataFrame:
+    """
+    0 值替换为所在年龄组的中位数；该组没有非 0 值时使用全局中位数。
+    填充列一律转为 float（无论本块是否有 0 值），写出格式（117 还是 117.0）才与块边界无关。
+    """
+    df = df.copy()
+    for col in ZERO_TO_FILL_COLS:
+        df[col] = df[col].astype(float)
+        zero_mask = (df[col] == 0).to_numpy()
+        if zero_mask.any():
+            fill = df.loc[zero_mask, 'Age_category'].map(params['fill_values'][col])
+            df.loc[zero_mask, col] = fill.fillna(params['fill_fallback'][col]).to_numpy()
+    return df
+
+
+def clip_chunk(df: pd.DataFrame, params: dict) -> pd.DataFrame:
+    df = df.copy()
+    for col, (lower, upper) in params['clip_bounds'].items():
+        df[col] = df[col].clip(lower=lower, upper=upper)
+    return df
+
+
+def normalize_chunk(df: pd.DataFrame, params: dict) -> pd.DataFrame:
+    df = df.copy()
+    for col in NUMERIC_COLS:
+        df[col] = (df[col] - params['means'][col]) / params['stds'][col]
+    return df
+
+
+def split_mask(df: pd.DataFrame, key_col=None, test_size=TEST_SIZE, salt=SPLIT_SALT) -> np.ndarray:
+    """
+    返回“属于测试集”的布尔数组。
+    以患者键（未指定时为全局行号）和 Outcome 一起做稳定哈希，映射到 [0, 1) 后与 test_size 比较：
+    每个 Outcome 分层中测试集比例的期望都等于 test_size，且结果与块划分、运行次数无关。
+    """
+    keys = df[key_col].astype(str) if key_col else pd.Series(df.index.astype(str), index=df.index)
+    hashed = pd.util.hash_pandas_object(
+        pd.DataFrame({'key': keys, 'outcome': df[TARGET_COL].astype(str)}),
+        index=False, hash_key=(salt + '0' * 16)[:16])
+    return (hashed.to_numpy() / np.float64(2 ** 64)) < test_size
+
+
+def transform_chunk(chunk: pd.DataFrame, params: dict, key_col=None, test_size=TEST_SIZE):
+    """分类 + 填充 + 截断 + 划分，返回 (训练部分, 测试部分)，列顺序与原流程输出一致"""
+    df = pd.concat([chunk, categorize_raw(chunk)], axis=1)
+    df = clip_chunk(fill_chunk(df, params), params)
+    is_test = split_mask(df, key_col, test_size)
+    if key_col:
+        df = df.drop(columns=[key_col])
+    return df[~is_test], df[is_test]
+
+
+# =================================================================
+# 拟合与执行
+# =================================================================
+
+def fit_fill_and_clip(input_path, chunk_size=DEFAULT_CHUNK_SIZE, epsilon=DEFAULT_EPSILON):
+    """
+    第一遍：拟合填充中位数和 IQR 截断边界。
+    填充后的分布 = 非 0 值 + 各年龄组“0 值个数 × 该组中位数”，因此不必再扫描一遍填充结果：
+    非 0 值直接进草图，填充值在扫描结束后按个数加权补入。
+    """
+    k = sketch_k_for_error(epsilon)
+    group_sketches = {col: {} for col in ZERO_TO_FILL_COLS}
+    zero_counts = {col: {} for col in ZERO_TO_FILL_COLS}
+    value_sketches = {col: QuantileSketch(k, seed=j) for j, col in enumerate(CLIP_COLS)}
+    rows = 0
+
+    for chunk in iter_csv_chunks(input_path, chunk_size):
+        rows += len(chunk)
+        age_category = categorize_raw(chunk)['Age_category']
+        for col in CLIP_COLS:
+            values = chunk[col].to_numpy(dtype=float)
+            if col not in ZERO_TO_FILL_COLS:
+                value_sketches[col].update(values)
+                continue
+
+            non_zero = values > 0
+            value_sketches[col].update(values[non_zero])
+            for group, count in age_category[~non_zero].value_counts().items():
+                zero_counts[col][group] = zero_counts[col].get(group, 0) + int(count)
+            for group, idx in pd.Series(np.flatnonzero(non_zero)).groupby(age_category.to_numpy()[non_zero]):
+                if group not in group_sketches[col]:
+                    group_sketches[col][group] = QuantileSketch(k, seed=len(group_sketches[col]))
+                group_sketches[col][group].update(values[idx.to_numpy()])
+
+    params = {'rows': rows, 'epsilon': epsilon, 'fill_values': {}, 'fill_fallback': {}, 'clip_bounds': {}}
+    for col in ZERO_TO_FILL_COLS:
+        params['fill_fallback'][col] = value_sketches[col].median()
+        params['fill_values'][col] = {g: s.median() for g, s in group_sketches[col].items()}
+        for group, count in zero_counts[col].items():
+            value_sketches[col].update_weighted(
+                params['fill_values'][col].get(group, params['fill_fallback'][col]), count)
+
+    for col in CLIP_COLS:
+        q1, q3 = value_sketches[col].quantiles([0.25, 0.75])
+        iqr = q3 - q1
+        params['clip_bounds'][col] = [float(q1 - 1.5 * iqr), float(q3 + 1.5 * iqr)]
+
+    return params
+
+
+def _write_chunk(df, path, first):
+    df.to_csv(path, mode='w' if first else 'a', header=first, index=False, encoding='utf-8')
+
+
+def transform_and_split(input_path, params, output_dir, chunk_size=DEFAULT_CHUNK_SIZE,
+                        key_col=None, test_size=TEST_SIZE):
+    """第二遍：逐块变换、划分并追加写出，同时累计训练集的均值/标准差"""
+    paths = {name: os.path.join(output_dir, OUTPUT_FILES[name]) for name in ('train', 'test')}
+    moments = RunningMoments(NUMERIC_COLS)
+    counts = {'train': 0, 'test': 0}
+
+    for i, chunk in enumerate(iter_csv_chunks(input_path, chunk_size)):
+        train_part, test_part = transform_chunk(chunk, params, key_col, test_size)
+        _write_chunk(train_part, paths['train'], i == 0)
+        _write_chunk(test_part, paths['test'], i == 0)
+        moments.update(train_part)
+        counts['train'] += len(train_part)
+        counts['test'] += len(test_part)
+
+    return moments, counts
+
+
+def normalize_outputs(params, output_dir, chunk_size=DEFAULT_CHUNK_SIZE):
+    """用训练集参数逐块标准化训练集和测试集（与 8_normalization.py 一致）"""
+    for split in ('train', 'test'):
+        source = os.path.join(output_dir, OUTPUT_FILES[split])
+        target = os.path.join(output_dir, OUTPUT_FILES[split + '_normalized'])
+        for i, chunk in enumerate(iter_csv_chunks(source, chunk_size)):
+            _write_chunk(normalize_chunk(chunk, params), target, i == 0)
+
+
+# =================================================================
+# 进程池并行（变换与标准化阶段）
+# =================================================================
+
+# 子进程内的只读参数，由 _init_worker 设置一次
+_worker_params = {}
+
+
+def _init_worker(params, key_col, test_size):
+    _worker_params.update(params=params, key_col=key_col, test_size=test_size)
+
+
+def csv_byte_ranges(path, block_bytes=PARALLEL_BLOCK_BYTES, min_blocks=1):
+    """
+    把 CSV 数据部分切成按行对齐的字节区间，返回 (表头字节, [(起点, 终点), ...])。
+    假设字段内没有换行（本项目的数据均满足）。
+    """
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        header = f.readline()
+        data_start = f.tell()
+        blocks = max(min_blocks, -(-(size - data_start) // block_bytes))
+        bounds = [data_start]
+        for i in range(1, blocks):
+            f.seek(data_start + (size - data_start) * i // blocks)
+            f.readline()
+            if bounds[-1] < f.tell() < size:
+                bounds.append(f.tell())
+    bounds.append(size)
+    return header, [(start, end) for start, end in zip(bounds[:-1], bounds[1:]) if end > start]
+
+
+def count_lines(path, start, end):
+    """统计字节区间内的换行数（即完整数据行数）"""
+    count = 0
+    with open(path, 'rb') as f:
+        f.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            block = f.read(min(remaining, 16 * 1024 * 1024))
+            count += block.count(b'\n')
+            remaining -= len(block)
+    return count
+
+
+def _read_range(path, header, start, end, row_offset=0):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        chunk = pd.read_csv(io.BytesIO(header + f.read(end - start)))
+    # 行号与单进程分块读取时一致，保证未指定患者键时的划分结果相同
+    chunk.index = pd.RangeIndex(row_offset, row_offset + len(chunk))
+    return chunk
+
+
+def _transform_range(path, header, start, end, row_offset):
+    """子进程：解析一个行块并完成分类/填充/截断/划分，返回不含表头的 CSV 字节和训练集矩"""
+    chunk = _read_range(path, header, start, end, row_offset)
+    train_part, test_part = transform_chunk(
+        chunk, _worker_params['params'], _worker_params['key_col'], _worker_params['test_size'])
+    return (list(train_part.columns),
+            train_part.to_csv(index=False, header=False).encode('utf-8'),
+            test_part.to_csv(index=False, header=False).encode('utf-8'),
+            RunningMoments(NUMERIC_COLS).update(train_part),
+            len(train_part), len(test_part))
+
+
+def _normalize_range(path, header, start, end):
+    chunk = _read_range(path, header, start, end)
+    return normalize_chunk(chunk, _worker_params['params']).to_csv(index=False, header=False).encode('utf-8')
+
+
+def ordered_results(pool, fn, tasks, window):
+    """按提交顺序产出结果；同时在途的任务不超过 window 个，限制主进程内存"""
+    pending = deque()
+    for task in tasks:
+        pending.append(pool.submit(fn, *task))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def _header_bytes(columns):
+    return pd.DataFrame(columns=columns).to_csv(index=False).encode('utf-8')
+
+
+def transform_and_split_parallel(input_path, params, output_dir, workers,
+                                 key_col=None, test_size=TEST_SIZE, block_bytes=PARALLEL_BLOCK_BYTES):
+    """transform_and_split 的多进程版本，输出文件与单进程模式一致"""
+    paths = {name: os.path.join(output_dir, OUTPUT_FILES[name]) for name in ('train', 'test')}
+    header, ranges = csv_byte_ranges(input_path, block_bytes, min_blocks=workers * 4)
+    moments = RunningMoments(NUMERIC_COLS)
+    counts = {'train': 0, 'test': 0}
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(params, key_col, test_size)) as pool:
+        # 先并行数行数，得到每个行块的全局起始行号
+        line_counts = list(pool.map(count_lines, [input_path] * len(ranges),
+                                    [r[0] for r in ranges], [r[1] for r in ranges]))
+        offsets = np.concatenate([[0], np.cumsum(line_counts)[:-1]]).tolist()
+        tasks = [(input_path, header, start, end, offset) for (start, end), offset in zip(ranges, offsets)]
+
+        with open(paths['train'], 'wb') as train_file, open(paths['test'], 'wb') as test_file:
+            for i, (columns, train_csv, test_csv, part_moments, n_train, n_test) in enumerate(
+                    ordered_results(pool, _transform_range, tasks, workers * 2)):
+                if i == 0:
+                    train_file.write(_header_bytes(columns))
+                    test_file.write(_header_bytes(columns))
+                train_file.write(train_csv)
+                test_file.write(test_csv)
+                moments.merge(part_moments)
+                counts['train'] += n_train
+                counts['test'] += n_test
+
+    return moments, counts
+
+
+def normalize_outputs_parallel(params, output_dir, workers, block_bytes=PARALLEL_BLOCK_BYTES):
+    """normalize_outputs 的多进程版本"""
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(params, None, TEST_SIZE)) as pool:
+        for split in ('train', 'test'):
+            source = os.path.join(output_dir, OUTPUT_FILES[split])
+            target = os.path.join(output_dir, OUTPUT_FILES[split + '_normalized'])
+            header, ranges = csv_byte_ranges(source, block_bytes, min_blocks=workers * 4)
+            tasks = [(source, header, start, end) for start, end in ranges]
+            with open(target, 'wb') as f:
+                f.write(header)
+                for normalized_csv in ordered_results(pool, _normalize_range, tasks, workers * 2):
+                    f.write(normalized_csv)
+
+
+def run_pipeline(input_path, output_dir, chunk_size=DEFAULT_CHUNK_SIZE, epsilon=DEFAULT_EPSILON,
+                 key_col=None, test_size=TEST_SIZE, workers=1):
+    """执行完整的分块流程，返回拟合参数（同时写出 preprocessing_params.json）；workers > 1 时并行变换"""
+    os.makedirs(output_dir, exist_ok=True)
+    timings = {}
+
+    start = time.perf_counter()
+    params = fit_fill_and_clip(input_path, chunk_size, epsilon)
+    timings['fit'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if workers > 1:
+        moments, counts = transform_and_split_parallel(input_path, params, output_dir, workers, key_col, test_size)
+    else:
+        moments, counts = transform_and_split(input_path, params, output_dir, chunk_size, key_col, test_size)
+    params['means'], params['stds'] = moments.means(), moments.stds()
+    params['split_counts'] = counts
+    timings['transform'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if workers > 1:
+        normalize_outputs_parallel(params, output_dir, workers)
+    else:
+        normalize_outputs(params, output_dir, chunk_size)
+    timings['normalize'] = time.perf_counter() - start
+
+    params['timings'] = timings
+    with open(os.path.join(output_dir, OUTPUT_FILES['params']), 'w', encoding='utf-8') as f:
+        json.dump(params, f, ensure_ascii=False, indent=2)
+    return params
+
+
+def main():
+    parser = argparse.ArgumentParser(description="分块（out-of-core）数据预处理")
+    parser.add_argument('--input', default="data/raw/diabetes.csv", help="原始数据 CSV")
+    parser.add_argument('--output-dir', default=DEFAULT_OUTPUT_DIR)
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--epsilon', type=float, default=DEFAULT_EPSILON, help="分位数草图的目标秩误差")
+    parser.add_argument('--key-col', default=None, help="患者键列名，默认使用行号")
+    parser.add_argument('--test-size', type=float, default=TEST_SIZE)
+    parser.add_argument('--workers', type=int, default=1, help="变换/标准化阶段的进程数，0 表示全部 CPU 核")
+    args = parser.parse_args()
+
+    workers = args.workers or os.cpu_count() or 1
+    params = run_pipeline(args.input, args.output_dir, args.chunk_size, args.epsilon,
+                          args.key_col, args.test_size, workers)
+
+    counts, timings = params['split_counts'], params['timings']
+    print(f"处理完成：{params['rows']:,} 行 -> 训练集 {counts['train']:,} 行 / 测试集 {counts['test']:,} 行")
+    print(f"用时：拟合 {timings['fit']:.2f}s，变换 {timings['transform']:.2f}s，标准化 {timings['normalize']:.2f}s")
+    print("IQR 截断边界:")
+    for col, (lower, upper) in params['clip_bounds'].items():
+        print(f"  {col:<26} [{lower:.2f}, {upper:.2f}]")
+    print(f"输出目录: {args.output_dir}（{workers} 个进程）")
+
+
+if __name__ == "__main__":
+    main()
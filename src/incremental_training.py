@@ -0,0 +1,285 @@
+"""
+糖尿病预测项目 - 增量训练
+功能: 新的已标注筛查数据到达时，只用这一批数据更新模型，不再重跑整条 data_pre_process 流程和 GridSearchCV。
+      维护的充分统计量（均可增量更新、与历史数据量无关）：
+        - 各年龄组非零值的中位数草图        -> 对应 3_fill_missing_value.py 的按年龄组中位数填充
+        - 填充后各列的分位数草图（Q1/Q3）   -> 对应 5_eliminate_outlier.py 的 IQR 截断
+        - 截断后各数值列的 Welford 均值/方差 -> 对应 8_normalization.py 的 Z-score（首个批次后冻结）
+      模型使用 SGDClassifier(loss='log_loss') 的 partial_fit，即在线逻辑回归。
+      Z-score 参数只用第一个批次拟合，之后冻结：后续批次只更新 SGD 权重，
+      否则早先批次学到的系数对应的是旧的尺度，导出的标准化参数与权重无法配套。
+      （填充中位数和截断边界只用于清洗训练数据，仍随每个批次更新。）
+      特征由 model_predictor.preprocess_batch 生成（分类分箱作用在 Z-score 之后的值上，与线上服务一致），
+      export 同时导出可移植 JSON，可直接由 PortableModel 评分。
+
+用法（在项目根目录执行）:
+    python -m src.incremental_training update --data data/raw/diabetes.csv
+    python -m src.incremental_training update --data data/new_screenings.csv
+    python -m src.incremental_training evaluate --data data/processed/diabetes_test.csv
+    python -m src.incremental_training export -o analysis/models/disease_classifier_incremental.pkl
+"""
+
+import argparse
+import json
+import os
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import SGDClassifier
+from sklearn.metrics import recall_score, roc_auc_score
+
+from src.chunked_preprocessing import CLIP_COLS, ZERO_TO_FILL_COLS, categorize_raw
+from src.model_predictor import NUMERICAL_FEATURES, OPTIMAL_THRESHOLD, preprocess_batch
+from src.portable_model import build_portable_spec, write_portable_spec
+from src.streaming_stats import DEFAULT_SKETCH_K, GroupedQuantileSketch, QuantileSketch, RunningMoments
+
+# =================================================================
+# ⭐⭐⭐ 增量训练配置区 ⭐⭐⭐
+# =================================================================
+
+STATE_PATH = "analysis/models/incremental_state.pkl"
+INCREMENTAL_MODEL_PATH = "analysis/models/disease_classifier_incremental.pkl"
+
+TARGET_COL = 'Outcome'
+
+# 每个新批次重复 partial_fit 的轮数（批次较小时多跑几轮更稳定）
+DEFAULT_EPOCHS = 5
+
+DEFAULT_CHUNK_SIZE = 100_000
+
+
+class IncrementalTrainer:
+    """增量训练状态：预处理统计量草图 + 在线逻辑回归"""
+
+    def __init__(self, sketch_k=DEFAULT_SKETCH_K, epochs=DEFAULT_EPOCHS, alpha=1e-3, random_state=42):
+        self.epochs = epochs
+        self.random_state = random_state
+
+        self.age_medians = {col: GroupedQuantileSketch(sketch_k, random_state) for col in ZERO_TO_FILL_COLS}
+        self.global_medians = {col: QuantileSketch(sketch_k, random_state) for col in ZERO_TO_FILL_COLS}
+        self.clip_sketches = {col: QuantileSketch(sketch_k, random_state) for col in CLIP_COLS}
+        self.moments = RunningMoments(NUMERICAL_FEATURES)
+
+        self.model = SGDClassifier(loss='log_loss', penalty='l2', alpha=alpha, random_state=random_state)
+        self._rng = np.random.default_rng(random_state)
+
+        self.rows_seen = 0
+        self.batches_seen = 0
+
+    # ---------------- 当前统计量 ----------------
+
+    def fill_values(self) -> dict:
+        """{列: {年龄组: 中位数}}；某年龄组还没有非零值时由 fill() 回退到全局中位数"""
+        return {col: sketch.medians() for col, sketch in self.age_medians.items()}
+
+    def clip_bounds(self) -> dict:
+        """{列: (下界, 上界)}，Q1 - 1.5 IQR 与 Q3 + 1.5 IQR"""
+        bounds = {}
+        for col, sketch in self.clip_sketches.items():
+            q1, q3 = sketch.quantiles([0.25, 0.75])
+            iqr = q3 - q1
+            bounds[col] = (q1 - 1.5 * iqr, q3 + 1.5 * iqr)
+        return bounds
+
+    @property
+    def scaler_frozen(self):
+        """第一个批次完成后标准化参数不再变化"""
+        return self.batches_seen > 0
+
+    def standardization_params(self):
+        """返回 (means, stds)，格式与 model_predictor.load_standardization_params 相同"""
+        return self.moments.means(), self.moments.stds()
+
+    # ---------------- 各预处理步骤 ----------------
+
+    def _fill(self, df, age_category):
+        df = df.copy()
+        for col in ZERO_TO_FILL_COLS:
+            zero_mask = (df[col] == 0).to_numpy()
+            if not zero_mask.any():
+                continue
+            medians = self.age_medians[col].medians()
+            fallback = self.global_medians[col].median()
+            fill = age_category[zero_mask].map(medians).fillna(fallback).to_numpy()
+            df[col] = df[col].astype(float)
+            df.loc[zero_mask, col] = fill
+        return df
+
+    def _clip(self, df):
+        df = df.copy()
+        for col, (lower, upper) in self.clip_bounds().items():
+            df[col] = df[col].clip(lower=lower, upper=upper)
+        return df
+
+    def _features(self, df_clipped):
+        """
+        Z-score + 独热编码，直接调用服务端的 preprocess_batch（传入增量统计量），
+        分类分箱与线上一致地作用在 Z-score 之后的值上，导出的模型可直接用于服务。
+        """
+        means, stds = self.standardization_params()
+        return preprocess_batch(df_clipped, means, stds)
+
+    def transform(self, df_raw: pd.DataFrame) -> pd.DataFrame:
+        """用当前统计量处理原始数据（不更新任何状态）"""
+        categories = categorize_raw(df_raw)
+        filled = self._fill(df_raw[NUMERICAL_FEATURES], categories['Age_category'])
+        return self._features(self._clip(filled))
+
+    # ---------------- 增量更新 ----------------
+
+    def update(self, df_batch: pd.DataFrame) -> dict:
+        """
+        用一批新的已标注数据更新统计量和模型，成本只与本批次大小有关。
+        顺序与离线流程一致：中位数 -> 填充 -> IQR -> 截断 -> 均值/方差 -> 标准化 -> partial_fit，
+        其中均值/方差只在第一个批次拟合（见 scaler_frozen）。
+        """
+        start = time.perf_counter()
+        df = df_batch[NUMERICAL_FEATURES]
+        y = df_batch[TARGET_COL].astype(int).to_numpy()
+        categories = categorize_raw(df)
+
+        for col in ZERO_TO_FILL_COLS:
+            non_zero = (df[col] > 0).to_numpy()
+            self.age_medians[col].update(categories['Age_category'][non_zero], df[col][non_zero])
+            self.global_medians[col].update(df[col][non_zero].to_numpy())
+        filled = self._fill(df, categories['Age_category'])
+
+        for col in CLIP_COLS:
+            self.clip_sketches[col].update(filled[col].to_numpy())
+        clipped = self._clip(filled)
+
+        if not self.scaler_frozen:
+            self.moments.update(clipped)
+        X = self._features(clipped)
+
+        for _ in range(self.epochs):
+            order = self._rng.permutation(len(X))
+            self.model.partial_fit(X.iloc[order], y[order], classes=np.array([0, 1]))
+
+        self.rows_seen += len(df_batch)
+        self.batches_seen += 1
+        return {'rows': len(df_batch), 'seconds': time.perf_counter() - start}
+
+    def update_from_csv(self, path, chunk_size=DEFAULT_CHUNK_SIZE) -> dict:
+        """按块读取 CSV 并逐块更新，内存占用只与 chunk_size 有关；首次更新时第一块用于拟合标准化参数"""
+        rows, seconds = 0, 0.0
+        for chunk in pd.read_csv(path, chunksize=chunk_size):
+            summary = self.update(chunk)
+            rows += summary['rows']
+            seconds += summary['seconds']
+        return {'rows': rows, 'seconds': seconds}
+
+    def predict_proba(self, df_raw: pd.DataFrame) -> np.ndarray:
+        return self.model.predict_proba(self.transform(df_raw))[:, 1]
+
+    def evaluate(self, df: pd.DataFrame, threshold=OPTIMAL_THRESHOLD) -> dict:
+        y = df[TARGET_COL].astype(int).to_numpy()
+        proba = self.predict_proba(df)
+        return {
+            'rows': len(df),
+            'auc': roc_auc_score(y, proba),
+            'accuracy': float(((proba >= threshold).astype(int) == y).mean()),
+            'recall': recall_score(y, (proba >= threshold).astype(int), zero_division=0),
+        }
+
+    # ---------------- 持久化 ----------------
+
+    def save(self, path=STATE_PATH):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        joblib.dump(self, path)
+
+    @staticmethod
+    def load(path=STATE_PATH):
+        return joblib.load(path)
+
+    def export_model(self, path=INCREMENTAL_MODEL_PATH):
+        """
+        导出模型（.pkl）、同名 .params.json（标准化参数、填充中位数、截断边界）
+        和同名 .portable.json（src/portable_model.py 格式，内含本模型的标准化参数）。
+        pkl 模型在服务端会使用 diabetes_train.csv 重新计算的均值/标准差；
+        要按增量统计量评分，请用 PortableModel 加载 .portable.json。
+        返回 (params 路径, portable 路径)。
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        joblib.dump(self.model, path)
+
+        means, stds = self.standardization_params()
+        params = {
+            'rows_seen': self.rows_seen,
+            'batches_seen': self.batches_seen,
+            'means': means,
+            'stds': stds,
+            'fill_values': self.fill_values(),
+            'clip_bounds': {col: list(bounds) for col, bounds in self.clip_bounds().items()},
+        }
+        base = os.path.splitext(path)[0]
+        params_path = base + '.params.json'
+        with open(params_path, 'w', encoding='utf-8') as f:
+            json.dump(params, f, ensure_ascii=False, indent=2)
+
+        portable_path = base + '.portable.json'
+        version = f"{os.path.basename(path)}@{self.rows_seen}rows-{self.batches_seen}batches"
+        write_portable_spec(build_portable_spec(self.model, means, stds, path, version), portable_path)
+        return params_path, portable_path
+
+
+def load_or_create_trainer(path=STATE_PATH):
+    return IncrementalTrainer.load(path) if os.path.exists(path) else IncrementalTrainer()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="增量训练：用新标注的筛查数据更新模型")
+    parser.add_argument('--state', default=STATE_PATH, help="增量训练状态文件")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    update_parser = subparsers.add_parser('update', help="用新批次数据更新（状态不存在时自动创建）")
+    update_parser.add_argument('--data', required=True, help="包含 8 项原始指标和 Outcome 的 CSV")
+    update_parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+
+    evaluate_parser = subparsers.add_parser('evaluate', help="在测试集上评估当前模型")
+    evaluate_parser.add_argument('--data', required=True)
+
+    export_parser = subparsers.add_parser('export', help="导出模型和预处理参数")
+    export_parser.add_argument('-o', '--output', default=INCREMENTAL_MODEL_PATH)
+
+    subparsers.add_parser('status', help="查看当前状态")
+    args = parser.parse_args()
+
+    if args.command == 'update':
+        trainer = load_or_create_trainer(args.state)
+        summary = trainer.update_from_csv(args.data, args.chunk_size)
+        trainer.save(args.state)
+        print(f"已增量更新 {summary['rows']:,} 行，用时 {summary['seconds']:.2f} 秒")
+        print(f"累计: {trainer.rows_seen:,} 行 / {trainer.batches_seen} 个批次 -> {args.state}")
+        return
+
+    if not os.path.exists(args.state):
+        parser.error(f"状态文件不存在: {args.state}，请先执行 update")
+    trainer = IncrementalTrainer.load(args.state)
+
+    if args.command == 'evaluate':
+        metrics = trainer.evaluate(pd.read_csv(args.data))
+        print(f"评估样本: {metrics['rows']}")
+        print(f"AUC: {metrics['auc']:.4f}")
+        print(f"准确率 (阈值 {OPTIMAL_THRESHOLD}): {metrics['accuracy']:.4f}")
+        print(f"召回率 (阈值 {OPTIMAL_THRESHOLD}): {metrics['recall']:.4f}")
+    elif args.command == 'export':
+        params_path, portable_path = trainer.export_model(args.output)
+        print(f"模型已导出: {args.output}")
+        print(f"预处理参数已导出: {params_path}")
+        print(f"可移植模型已导出: {portable_path}")
+    else:
+        means, stds = trainer.standardization_params()
+        print(f"累计: {trainer.rows_seen:,} 行 / {trainer.batches_seen} 个批次")
+        print("标准化参数（首个批次拟合后冻结）:")
+        for col in NUMERICAL_FEATURES:
+            print(f"  {col:<26} 均值 {means[col]:10.4f}  标准差 {stds[col]:10.4f}")
+        print("IQR 截断边界:")
+        for col, (lower, upper) in trainer.clip_bounds().items():
+            print(f"  {col:<26} [{lower:.2f}, {upper:.2f}]")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+糖尿病预测项目 - 热路径计时与诊断面板
+功能: 为数据加载、预处理、predict_proba、图表构建和渲染等阶段提供计时装饰器/上下文管理器，
+      记录耗时、调用次数和内存变化（环形缓冲区），并可在侧边栏显示当前重跑最慢的阶段
+      和各阶段的滚动分位数。
+
+默认关闭：设置环境变量 DIABETES_PROFILING=1 后启动 Streamlit 才会生效。
+关闭时 timed() 直接返回原函数、stage() 返回空上下文，不增加任何调用开销。
+"""
+
+import itertools
+import os
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+
+# =================================================================
+# ⭐⭐⭐ 配置区 ⭐⭐⭐
+# =================================================================
+
+ENABLED = os.environ.get('DIABETES_PROFILING', '').lower() in ('1', 'true', 'yes', 'on')
+
+# 环形缓冲区保留的最近记录数
+BUFFER_SIZE = 5000
+
+# 面板中显示的最慢阶段数
+TOP_N_STAGES = 10
+
+_records = deque(maxlen=BUFFER_SIZE)
+_call_counts = Counter()
+_lock = threading.Lock()
+_run_counter = itertools.count(1)
+_local = threading.local()
+_NULL_CONTEXT = nullcontext()
+
+
+def _current_rss():
+    """当前进程常驻内存（字节）；仅 Linux 可读 /proc，其他平台返回 None"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _record(name, seconds, mem_delta):
+    with _lock:
+        _records.append({
+            'run_id': getattr(_local, 'run_id', 0),
+            'stage': name,
+            'seconds': seconds,
+            'mem_delta': mem_delta,
+        })
+        _call_counts[name] += 1
+
+
+@contextmanager
+def _timed_block(name):
+    rss_before = _current_rss()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        rss_after = _current_rss()
+        # 多线程进程中 RSS 变化包含其他线程的分配，只作参考
+        mem_delta = rss_after - rss_before if rss_before is not None and rss_after is not None else None
+        _record(name, elapsed, mem_delta)
+
+
+def stage(name):
+    """上下文管理器：with stage('predict_proba'): ..."""
+    return _timed_block(name) if ENABLED else _NULL_CONTEXT
+
+
+def timed(name):
+    """函数装饰器；关闭时原样返回被装饰函数"""
+    def decorator(func):
+        if not ENABLED:
+            return func
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with _timed_block(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def start_run():
+    """标记一次页面重跑开始（在页面脚本顶部调用），之后本线程的记录归入这次重跑"""
+    if ENABLED:
+        _local.run_id = next(_run_counter)
+
+
+def get_records():
+    with _lock:
+        return list(_records)
+
+
+def get_call_counts():
+    with _lock:
+        return dict(_call_counts)
+
+
+def summarize(records=None):
+    """按阶段汇总：调用次数、总耗时、p50/p95/p99（毫秒）、平均内存变化（MB）"""
+    import numpy as np
+    import pandas as pd
+
+    records = get_records() if records is None else records
+    if not records:
+        return pd.DataFrame()
+
+    df = pd.DataFrame(records)
+    df['ms'] = df['seconds'] * 1000
+    summary = df.groupby('stage').agg(
+        调用次数=('ms', 'size'),
+        总耗时_ms=('ms', 'sum'),
+        p50_ms=('ms', lambda s: np.percentile(s, 50)),
+        p95_ms=('ms', lambda s: np.percentile(s, 95)),
+        p99_ms=('ms', lambda s: np.percentile(s, 99)),
+        内存变化_MB=('mem_delta', lambda s: s.dropna().mean() / 1024 / 1024 if s.notna().any() else None),
+    )
+    return summary.sort_values('总耗时_ms', ascending=False).round(2)
+
+
+def render_diagnostics_panel():
+    """在侧边栏显示诊断面板（在页面 main() 末尾调用）；未开启时不做任何事"""
+    if not ENABLED:
+        return
+
+    import streamlit as st
+
+    run_id = getattr(_local, 'run_id', None)
+    records = get_records()
+    current = [r for r in records if r['run_id'] == run_id]
+
+    with st.sidebar.expander("⏱️ 性能诊断", expanded=False):
+        st.markdown("**本次重跑最慢的阶段**")
+        if current:
+            st.dataframe(summarize(current).head(TOP_N_STAGES)[['调用次数', '总耗时_ms', '内存变化_MB']],
+                         use_container_width=True)
+        else:
+            st.caption("本次重跑没有记录到计时阶段")
+
+        st.markdown(f"**滚动分位数（最近 {len(records)} 条记录）**")
+        if records:
+            st.dataframe(summarize(records)[['调用次数', 'p50_ms', 'p95_ms', 'p99_ms']],
+                         use_container_width=True)
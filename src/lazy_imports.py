@@ -0,0 +1,240 @@
+"""
+糖尿病预测项目 - 延迟导入与导入耗时报告
+功能:
+    lazy_import(name)          —— 返回模块代理，第一次访问属性时才真正导入（如 plotly.express、seaborn）
+    lazy_attr(module, attr)    —— 延迟导入模块中的函数（如 plotly.subplots.make_subplots）
+    cache_resource / show_error —— 可选的 Streamlit 依赖：进程中已加载 Streamlit 时使用
+                                   st.cache_resource / st.error，否则退化为进程内缓存和标准错误输出，
+                                   命令行工具和预测服务导入 src.model_predictor 时不再加载 Streamlit
+    import_time_report         —— 在全新子进程中以 -X importtime 导入页面或模块，汇总耗时最多的顶层依赖；
+                                   页面另外报告解析全部延迟导入后的耗时（首次渲染时实际付出的导入开销）
+
+用法（在项目根目录执行）:
+    python -m src.lazy_imports
+    python -m src.lazy_imports pages/2_batch_screening.py src.model_predictor --top 15
+"""
+
+import argparse
+import glob
+import importlib
+import os
+import subprocess
+import sys
+import threading
+import time
+import types
+from functools import wraps
+
+# =================================================================
+# ⭐⭐⭐ 配置区 ⭐⭐⭐
+# =================================================================
+
+# 默认报告对象：全部页面 + 预测模块
+DEFAULT_TARGETS = ['app.py'] + sorted(glob.glob('pages/*.py')) + ['src.model_predictor']
+
+# 报告中列出的顶层依赖数
+DEFAULT_TOP_N = 10
+
+
+# =================================================================
+# 延迟导入
+# =================================================================
+
+class LazyModule(types.ModuleType):
+    """模块代理：第一次访问属性时导入真实模块，之后该属性直接缓存在代理上"""
+
+    def __init__(self, name):
+        super().__init__(name)
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            self._module = importlib.import_module(self.__name__)
+        return self._module
+
+    def __getattr__(self, attr):
+        value = getattr(self._load(), attr)
+        setattr(self, attr, value)
+        return value
+
+    def __repr__(self):
+        state = '已导入' if self._module is not None else '未导入'
+        return f"<LazyModule '{self.__name__}' ({state})>"
+
+
+def lazy_import(name):
+    """模块已导入时直接返回真实模块，否则返回 LazyModule 代理"""
+    return sys.modules.get(name) or LazyModule(name)
+
+
+def lazy_attr(module_name, attr):
+    """延迟导入的函数：第一次调用时才导入 module_name"""
+    module = lazy_import(module_name)
+
+    def proxy(*args, **kwargs):
+        return getattr(module, attr)(*args, **kwargs)
+
+    proxy.__name__ = attr
+    proxy.__qualname__ = attr
+    proxy.lazy_module = module
+    return proxy
+
+
+def resolve_lazy(namespace):
+    """导入命名空间（如页面的全局变量）中全部延迟导入的模块，返回这些模块名"""
+    names = []
+    for value in list(namespace.values()):
+        module = getattr(value, 'lazy_module', value)
+        if isinstance(module, LazyModule):
+            module._load()
+            names.append(module.__name__)
+    return sorted(set(names))
+
+
+# =================================================================
+# 可选的 Streamlit 依赖
+# =================================================================
+
+def streamlit_loaded():
+    """Streamlit 页面运行时模块早已导入；命令行 / 服务进程中不会导入"""
+    return 'streamlit' in sys.modules
+
+
+def _memoize(func):
+    """st.cache_resource 的进程内替代：按参数缓存返回值，提供同样的 clear()"""
+    cache = {}
+    lock = threading.Lock()
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        key = (args, tuple(sorted(kwargs.items())))
+        with lock:
+            if key in cache:
+                return cache[key]
+        value = func(*args, **kwargs)
+        with lock:
+            return cache.setdefault(key, value)
+
+    wrapper.clear = cache.clear
+    return wrapper
+
+
+def cache_resource(func):
+    """在 Streamlit 中等同于 st.cache_resource，否则为进程内缓存"""
+    if streamlit_loaded():
+        import streamlit as st
+        return st.cache_resource(func)
+    return _memoize(func)
+
+
+def show_error(message):
+    """在 Streamlit 中显示 st.error，否则写到标准错误"""
+    if streamlit_loaded():
+        import streamlit as st
+        st.error(message)
+    else:
+        print(message, file=sys.stderr)
+
+
+# =================================================================
+# 导入耗时报告
+# =================================================================
+
+def _import_command(target, resolve=False):
+    if target.endswith('.py'):
+        # 页面只执行顶层代码（main() 由 __main__ 守卫，不会执行），因此默认不触发延迟导入；
+        # resolve=True 时再导入页面中全部延迟导入的模块，得到首次渲染实际付出的导入开销
+        code = f"import runpy; namespace = runpy.run_path({target!r}, run_name='__page__')"
+        if resolve:
+            code += "; from src.lazy_imports import resolve_lazy; print(','.join(resolve_lazy(namespace)))"
+    else:
+        code = f"import {target}"
+    return [sys.executable, '-X', 'importtime', '-c', code]
+
+
+def parse_importtime(stderr):
+    """解析 -X importtime 输出，返回 [(模块, 自身微秒, 累计微秒, 嵌套深度)]"""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue
+        name = parts[2][1:]
+        depth = (len(name) - len(name.lstrip(' '))) // 2
+        entries.append((name.strip(), int(parts[0]), int(parts[1]), depth))
+    return entries
+
+
+def _import_env():
+    return dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [os.getcwd(), os.environ.get('PYTHONPATH')])))
+
+
+def _resolved_import_ms(target):
+    """页面顶层代码 + 全部延迟导入的导入耗时，返回 (毫秒, 延迟导入的模块名)；失败时返回 (None, [])"""
+    result = subprocess.run(_import_command(target, resolve=True), capture_output=True, text=True, env=_import_env())
+    if result.returncode:
+        return None, []
+    entries = parse_importtime(result.stderr)
+    lazy = result.stdout.strip().splitlines()[-1] if result.stdout.strip() else ''
+    return sum(e[2] for e in entries if e[3] == 0) / 1000, [name for name in lazy.split(',') if name]
+
+
+def import_time_report(target, top_n=DEFAULT_TOP_N):
+    """
+    在全新子进程中导入 target，返回总耗时、导入总耗时、是否加载 Streamlit 以及最慢的顶层依赖。
+    页面还返回 resolved_import_ms：解析全部延迟导入后的导入耗时（import_ms 不含这部分）。
+    """
+    env = _import_env()
+    start = time.perf_counter()
+    result = subprocess.run(_import_command(target), capture_output=True, text=True, env=env)
+    wall_seconds = time.perf_counter() - start
+
+    entries = parse_importtime(result.stderr)
+    top_level = [e for e in entries if e[3] == 0]
+    # 页面的依赖位于第 0 层；模块目标本身在第 0 层，其直接依赖在第 1 层
+    dependency_depth = 0 if target.endswith('.py') else 1
+    dependencies = sorted((e for e in entries if e[3] == dependency_depth and e[0] != target),
+                          key=lambda e: e[2], reverse=True)
+    resolved_ms, lazy_modules = _resolved_import_ms(target) if target.endswith('.py') else (None, [])
+    return {
+        'target': target,
+        'ok': result.returncode == 0,
+        'error': result.stderr.strip().splitlines()[-1] if result.returncode else None,
+        'wall_ms': wall_seconds * 1000,
+        'import_ms': sum(e[2] for e in top_level) / 1000,
+        'modules': len(entries),
+        'streamlit': any(e[0] == 'streamlit' for e in entries),
+        'top': [(name, cumulative / 1000) for name, _, cumulative, _ in dependencies[:top_n]],
+        'resolved_import_ms': resolved_ms,
+        'lazy_modules': lazy_modules,
+    }
+
+
+def print_report(report):
+    status = '' if report['ok'] else f"  ✗ 失败: {report['error']}"
+    print(f"\n=== {report['target']} ==={status}")
+    print(f"  进程总耗时 {report['wall_ms']:.0f} ms，其中导入 {report['import_ms']:.0f} ms"
+          f"（{report['modules']} 个模块），加载 Streamlit: {'是' if report['streamlit'] else '否'}")
+    if report['resolved_import_ms'] is not None and report['lazy_modules']:
+        extra = report['resolved_import_ms'] - report['import_ms']
+        print(f"  解析延迟导入后导入 {report['resolved_import_ms']:.0f} ms（+{extra:.0f} ms，首次渲染时付出）："
+              + ', '.join(report['lazy_modules']))
+    for name, ms in report['top']:
+        print(f"    {name:<32} {ms:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="页面与模块的导入耗时报告（-X importtime）")
+    parser.add_argument('targets', nargs='*', default=DEFAULT_TARGETS, help="页面路径或模块名")
+    parser.add_argument('--top', type=int, default=DEFAULT_TOP_N, help="列出的顶层依赖数")
+    args = parser.parse_args()
+
+    print("页面只执行顶层代码，不运行 main()；\"导入\"不含延迟导入的模块，其开销另列为\"解析延迟导入后\"。")
+    for target in args.targets:
+        print_report(import_time_report(target, args.top))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+糖尿病预测项目 - 预测请求微批合并器
+功能: 把并发到达的单条预测请求在几毫秒内攒成一个批次，用一次 predict_proba 完成评分，
+      再把结果分发回各自的调用方。max_batch_size 和 max_wait_ms 共同限定尾延迟。
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import pandas as pd
+
+from src.model_predictor import predict_risk_batch, prediction_cache, prediction_cache_key
+
+# =================================================================
+# ⭐⭐⭐ 默认参数 ⭐⭐⭐
+# =================================================================
+
+# 单个批次最多合并的请求数
+DEFAULT_MAX_BATCH_SIZE = 64
+
+# 第一个请求到达后最多等待的时间（毫秒）
+DEFAULT_MAX_WAIT_MS = 5.0
+
+_STOP = object()
+
+
+class PredictionMicroBatcher:
+    """
+    后台线程微批预测器。
+    submit() 立即返回 Future；后台线程收集请求、批量评分并回填结果。
+    score_fn 接收 DataFrame，返回按行对齐的结果 DataFrame（默认 predict_risk_batch）。
+    """
+
+    def __init__(self, score_fn=predict_risk_batch,
+                 max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_wait_ms=DEFAULT_MAX_WAIT_MS):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size 必须 >= 1")
+
+        self.score_fn = score_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        # 统计信息：已处理批次数与请求数
+        self.batches = 0
+        self.rows = 0
+
+        self._queue = queue.Queue()
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name="prediction-micro-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, raw_data: dict) -> Future:
+        """提交一条原始输入，返回的 Future 结果为 {'raw_probability', 'risk_score', 'prediction'}"""
+        if self._closed:
+            raise RuntimeError("微批合并器已关闭")
+
+        future = Future()
+        self._queue.put((raw_data, future))
+        return future
+
+    def predict(self, raw_data: dict, timeout=None):
+        """
+        同步接口：返回 (显示评分, 诊断结果)，与 predict_risk 前两个返回值口径一致。
+        与 predict_risk 共用 prediction_cache，命中时不进入批次队列。
+        """
+        cache_key = prediction_cache_key(raw_data)
+        cached = prediction_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        result = self.submit(raw_data).result(timeout=timeout)
+        value = (result['risk_score'], result['prediction'])
+        prediction_cache.put(cache_key, value)
+        return value
+
+    def stats(self):
+        """返回批次数、请求数和平均批大小"""
+        batches, rows = self.batches, self.rows
+        return {
+            'batches': batches,
+            'rows': rows,
+            'mean_batch_size': rows / batches if batches else 0.0,
+        }
+
+    def close(self, timeout=None):
+        """停止接收新请求，处理完队列中剩余请求后退出后台线程"""
+        if not self._closed:
+            self._closed = True
+            self._queue.put(_STOP)
+        self._worker.join(timeout)
+
+    # ---------- 后台线程 ----------
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+
+            batch = [item]
+            deadline = time.perf_counter() + self.max_wait
+
+            # 在截止时间之前尽量攒满一个批次
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            self._score(batch)
+
+        # 关闭前把剩余请求处理完，避免调用方永远等待
+        remaining_items = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                remaining_items.append(item)
+        for start in range(0, len(remaining_items), self.max_batch_size):
+            self._score(remaining_items[start:start + self.max_batch_size])
+
+    def _score(self, batch):
+        # 调用方已取消的请求不再参与评分
+        batch = [(raw, future) for raw, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+
+        self.batches += 1
+        self.rows += len(batch)
+        self._score_split(batch)
+
+    def _score_split(self, batch):
+        """
+        整批评分；失败时二分后分别重试，直到定位到出错的单行。
+        这样只有输入有问题的调用方拿到异常，同批次其他调用方照常得到结果。
+        """
+        try:
+            df = pd.DataFrame.from_records([raw for raw, _ in batch])
+            results = self.score_fn(df).to_dict('records')
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0][1].set_exception(e)
+                return
+            middle = len(batch) // 2
+            self._score_split(batch[:middle])
+            self._score_split(batch[middle:])
+            return
+
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
@@ -2,7 +2,13 @@ import pandas as pd
 import numpy as np
 import joblib
 import os
-import streamlit as st  # 在 Streamlit 应用中，可以使用 st.cache_resource
+import hashlib
+import threading
+from collections import OrderedDict
+from src.instrumentation import stage, timed
+from src.audit_log import get_audit_logger
+# 在 Streamlit 应用中等同于 st.cache_resource / st.error；命令行和服务进程中不导入 Streamlit
+from src.lazy_imports import cache_resource, show_error
 
 # =================================================================
 # ⭐⭐⭐ 模型和常量配置区 ⭐⭐⭐
@@ -32,17 +38,33 @@ NUMERICAL_FEATURES = [
     'Insulin', 'BMI', 'DiabetesPedigreeFunction', 'Age'
 ]
 
+# 5. 特征中文名（用于结果解读）
+FEATURE_NAMES_CN = {
+    'Pregnancies': '怀孕次数',
+    'Glucose': '血糖浓度',
+    'BloodPressure': '舒张压',
+    'SkinThickness': '皮褶厚度',
+    'Insulin': '胰岛素',
+    'BMI': '体质指数',
+    'DiabetesPedigreeFunction': '遗传函数',
+    'Age': '年龄'
+}
+
+# 6. 预测缓存大小（按 8 项输入 + 模型版本缓存，超出后淘汰最久未使用的条目）
+PREDICTION_CACHE_SIZE = 4096
+
 
 # 参数加载函数
 
-@st.cache_resource
+@cache_resource
+@timed('数据加载: 标准化参数')
 def load_standardization_params():
     """
     加载原始训练数据，计算数值特征的均值和标准差 (mu 和 sigma)。
     由于 StandardSclaer 对象缺失，此函数用于手动计算参数。
     """
     if not os.path.exists(RAW_TRAIN_DATA_PATH):
-        st.error(f"致命错误：原始训练数据文件未找到，请检查路径: {RAW_TRAIN_DATA_PATH}")
+        show_error(f"致命错误：原始训练数据文件未找到，请检查路径: {RAW_TRAIN_DATA_PATH}")
         return None, None
 
     try:
@@ -56,18 +78,29 @@ def load_standardization_params():
         return means, stds
 
     except Exception as e:
-        st.error(f"加载或计算标准化参数失败。错误: {e}")
+        show_error(f"加载或计算标准化参数失败。错误: {e}")
         return None, None
 
 
 # 5. 模型加载函数
-@st.cache_resource
+def _model_file_signature():
+    """模型文件的 (修改时间, 大小)，用于判断文件是否被替换"""
+    stat = os.stat(MODEL_PATH)
+    return stat.st_mtime_ns, stat.st_size
+
+
 def load_model():
-    """加载已保存的模型，并提取优势比用于结果解读"""
+    """加载已保存的模型，并提取优势比用于结果解读；模型文件被替换后自动重新加载"""
     if not os.path.exists(MODEL_PATH):
-        st.error(f"错误：模型文件未找到，请检查路径: {MODEL_PATH}")
+        show_error(f"错误：模型文件未找到，请检查路径: {MODEL_PATH}")
         return None, None
+    return _load_model_file(_model_file_signature())
 
+
+@cache_resource
+@timed('模型加载')
+def _load_model_file(signature):
+    """按文件签名缓存：签名变化即为新的缓存项"""
     try:
         model = joblib.load(MODEL_PATH)
         # 提取优势比 (Odds Ratio)
@@ -84,80 +117,179 @@ def load_model():
         return model, key_odds_ratios
 
     except Exception as e:
-        st.error(f"模型加载或解析失败: {e}")
+        show_error(f"模型加载或解析失败: {e}")
         return None, None
 
 
-# 5. 数据预处理函数
-def preprocess_data(raw_data: dict) -> pd.DataFrame:
+# 6. 分类函数（保持与训练时一致）
+def categorize_pregnancies(p):
+    if p == 0:
+        return '0次'
+    elif 1 <= p <= 3:
+        return '1-3次'
+    elif 4 <= p <= 7:
+        return '4-7次'
+    else:
+        return '≥8次'
+
+
+def categorize_bmi(b):
+    if b < 27.0:
+        return '<27'
+    elif 27.0 <= b < 32.0:
+        return '27-32'
+    elif 32.0 <= b < 37.0:
+        return '32-37'
+    else:
+        return '≥37'
+
+
+def categorize_age(a):
+    if a < 30:
+        return '<30岁'
+    elif 30 <= a < 40:
+        return '30-40岁'
+    else:
+        return '≥40岁'
+
+
+def _categorize_batch(df: pd.DataFrame) -> dict:
     """
-    对用户输入数据进行预处理（分类、OHE、特征对齐）。
+    categorize_* 的向量化版本，条件与标量函数逐条对应（包括 NaN 落入最后一档的行为）。
+    """
+    p, b, a = df['Pregnancies'], df['BMI'], df['Age']
+    return {
+        'Pregnancies_category': np.select(
+            [p == 0, (p >= 1) & (p <= 3), (p >= 4) & (p <= 7)],
+            ['0次', '1-3次', '4-7次'], default='≥8次'),
+        'BMI_category': np.select(
+            [b < 27.0, (b >= 27.0) & (b < 32.0), (b >= 32.0) & (b < 37.0)],
+            ['<27', '27-32', '32-37'], default='≥37'),
+        'Age_category': np.select(
+            [a < 30, (a >= 30) & (a < 40)],
+            ['<30岁', '30-40岁'], default='≥40岁'),
+    }
+
+
+# 7. 数据预处理函数
+@timed('preprocess')
+def preprocess_batch(df_raw: pd.DataFrame, means=None, stds=None) -> pd.DataFrame:
+    """
+    对多行原始输入一次性完成标准化、分类、OHE 和特征对齐。
+    结果与逐行调用 preprocess_data 完全一致，但只做一次列运算。
+    means / stds 默认由训练集计算（load_standardization_params），增量训练传入自己的统计量。
     """
-    df = pd.DataFrame([raw_data])
-
     # 第一步：加载参数并执行手动标准化 (Z-score)
-    means, stds = load_standardization_params()
+    if means is None or stds is None:
+        means, stds = load_standardization_params()
 
     if means is None or stds is None:
         # 阻止继续执行
         raise RuntimeError("无法加载标准化参数，无法进行预测。")
 
+    df = df_raw[NUMERICAL_FEATURES].astype(float)
+
     # 对数值特征执行 Z-score (X - mu) / sigma
-    for feature in NUMERICAL_FEATURES:
-        mu = means[feature]
-        sigma = stds[feature]
-        # X_std = (X - mu) / sigma
-        df[feature] = (df[feature] - mu) / sigma
-
-    # --- 分类函数（保持与训练时一致）---
-    def categorize_pregnancies(p):
-        if p == 0:
-            return '0次'
-        elif 1 <= p <= 3:
-            return '1-3次'
-        elif 4 <= p <= 7:
-            return '4-7次'
-        else:
-            return '≥8次'
-
-    def categorize_bmi(b):
-        if b < 27.0:
-            return '<27'
-        elif 27.0 <= b < 32.0:
-            return '27-32'
-        elif 32.0 <= b < 37.0:
-            return '32-37'
-        else:
-            return '≥37'
+    mu = pd.Series(means)[NUMERICAL_FEATURES]
+    sigma = pd.Series(stds)[NUMERICAL_FEATURES]
+    df = (df - mu) / sigma
 
-    def categorize_age(a):
-        if a < 30:
-            return '<30岁'
-        elif 30 <= a < 40:
-            return '30-40岁'
-        else:
-            return '≥40岁'
+    # 分类 + 独热编码：只生成 FINAL_FEATURES 中存在的列，参考列自然被丢弃
+    for category_col, labels in _categorize_batch(df).items():
+        prefix = category_col + '_'
+        for col in FINAL_FEATURES:
+            if col.startswith(prefix):
+                df[col] = (labels == col[len(prefix):]).astype(float)
 
-    df['Pregnancies_category'] = df['Pregnancies'].apply(categorize_pregnancies)
-    df['BMI_category'] = df['BMI'].apply(categorize_bmi)
-    df['Age_category'] = df['Age'].apply(categorize_age)
+    # 严格按照 FINAL_FEATURES 列表的顺序和列名来排列列
+    return df[FINAL_FEATURES]
 
-    # 2. 执行独热编码 (OHE)
-    # drop_first=False 确保生成所有 OHE 列，然后再通过 FINAL_FEATURES 筛选掉参考列
-    df_ohe = pd.get_dummies(df, columns=['Pregnancies_category', 'BMI_category', 'Age_category'], drop_first=False)
 
-    # 3. 特征对齐（解决 ValueError 的关键）
-    for col in FINAL_FEATURES:
-        if col not in df_ohe.columns:
-            df_ohe[col] = 0
+def preprocess_data(raw_data: dict) -> pd.DataFrame:
+    """
+    对用户输入数据进行预处理（分类、OHE、特征对齐）。
+    """
+    return preprocess_batch(pd.DataFrame([raw_data]))
 
-    # 严格按照 FINAL_FEATURES 列表的顺序和列名来排列列
-    X_final = df_ohe[FINAL_FEATURES]
 
-    return X_final.astype(float)
+# 8. 预测缓存
+_model_version = (None, None)    # (文件签名, 版本号)
+_model_version_lock = threading.Lock()
 
 
-# 7. 概率转换函数
+def get_model_version() -> str:
+    """
+    以模型文件内容的哈希作为版本号。
+    文件的 (修改时间, 大小) 变化时重新计算哈希，替换模型文件后缓存键自动失效，无需重启。
+    """
+    global _model_version
+    signature = _model_file_signature()
+    with _model_version_lock:
+        if _model_version[0] != signature:
+            with open(MODEL_PATH, 'rb') as f:
+                digest = hashlib.sha256(f.read()).hexdigest()[:12]
+            _model_version = (signature, f"{os.path.basename(MODEL_PATH)}@{digest}")
+        return _model_version[1]
+
+
+def prediction_cache_key(raw_data: dict) -> tuple:
+    """
+    规范化缓存键：模型版本 + 按 NUMERICAL_FEATURES 顺序排列的 8 项输入。
+    输入统一转为 float 并舍入到 6 位小数，消除 25 与 25.0、浮点步长误差带来的差异。
+    """
+    return (get_model_version(),) + tuple(round(float(raw_data[f]), 6) for f in NUMERICAL_FEATURES)
+
+
+class PredictionCache:
+    """线程安全的 LRU 预测缓存，记录命中/未命中次数"""
+
+    def __init__(self, maxsize=PREDICTION_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+            }
+
+
+# 模块级共享缓存：缓存值为 (显示评分, 诊断结果)
+prediction_cache = PredictionCache()
+
+
+# 9. 概率转换函数
 def adjust_probability_display(raw_probability):
     """
     根据阈值调整概率显示，让大于0.45的概率显示为大于0.5
@@ -165,6 +297,15 @@ def adjust_probability_display(raw_probability):
     - prob ≤ 0.45: 映射到 0-0.5 范围
     - prob > 0.45: 映射到 0.5-1.0 范围
     """
+    if np.ndim(raw_probability) > 0:
+        # 批量输入：按同样的分段规则逐元素映射
+        raw_probability = np.asarray(raw_probability, dtype=float)
+        return np.where(
+            raw_probability <= OPTIMAL_THRESHOLD,
+            raw_probability * (0.5 / OPTIMAL_THRESHOLD),
+            0.5 + (raw_probability - OPTIMAL_THRESHOLD) * (0.5 / (1.0 - OPTIMAL_THRESHOLD))
+        )
+
     if raw_probability <= OPTIMAL_THRESHOLD:
         # 线性映射到 0-0.5 范围
         adjusted_prob = raw_probability * (0.5 / OPTIMAL_THRESHOLD)
@@ -174,10 +315,12 @@ def adjust_probability_display(raw_probability):
 
     return adjusted_prob
 
-# 8. 核心预测函数
+# 10. 核心预测函数
 def predict_risk(raw_data: dict):
     """
     接收原始输入，返回风险概率、诊断结果和优势比。
+    相同输入命中 prediction_cache 时直接返回，不再经过 pandas 和 sklearn。
+    每次预测都会写入审计日志（只入队，不在此处做文件 I/O）。
     """
     best_classifier, odds_ratios = load_model()
 
@@ -185,11 +328,18 @@ def predict_risk(raw_data: dict):
         return None, None, None
 
     try:
+        cache_key = prediction_cache_key(raw_data)
+        cached = prediction_cache.get(cache_key)
+        if cached is not None:
+            get_audit_logger().record(raw_data, cached[0], cached[1], cache_key[0], 'predict_risk')
+            return cached[0], cached[1], odds_ratios
+
         # 预处理数据
         X_final = preprocess_data(raw_data)
 
         # 预测概率
-        prediction_proba = best_classifier.predict_proba(X_final)[:, 1]
+        with stage('predict_proba'):
+            prediction_proba = best_classifier.predict_proba(X_final)[:, 1]
         raw_probability = prediction_proba[0]  # 保持0-1范围用于分类判断
 
         # 应用最佳阈值进行最终诊断（使用原始概率）
@@ -198,8 +348,82 @@ def predict_risk(raw_data: dict):
         # 转换显示概率（用于前端展示）
         display_probability = adjust_probability_display(raw_probability) * 100  # 转换为百分比
 
+        prediction_cache.put(cache_key, (display_probability, final_prediction))
+        get_audit_logger().record(raw_data, display_probability, final_prediction, cache_key[0],
+                                  'predict_risk', raw_probability=raw_probability)
+
         return display_probability, final_prediction, odds_ratios
 
     except Exception as e:
-        st.error(f"预测失败：特征对齐或模型计算出错。详细错误: {e}")
-        return None, None, None
\ No newline at end of file
+        show_error(f"预测失败：特征对齐或模型计算出错。详细错误: {e}")
+        return None, None, None
+
+
+# 11. 批量预测函数
+def predict_risk_batch(df_raw: pd.DataFrame, explain=False) -> pd.DataFrame:
+    """
+    对多行原始输入做一次矩阵预测，返回与 predict_risk 相同口径的结果表：
+    raw_probability（0-1 原始概率）、risk_score（0-100 显示评分）、prediction（阈值诊断）。
+    explain=True 时复用同一个特征矩阵，追加 8 列 contrib_<特征> 的 logit 贡献。
+    出错时直接抛出异常，由调用方决定如何展示。
+    """
+    best_classifier, _ = load_model()
+
+    if best_classifier is None:
+        raise RuntimeError("模型未加载，无法进行预测。")
+
+    X_final = preprocess_batch(df_raw)
+    with stage('predict_proba'):
+        raw_probability = best_classifier.predict_proba(X_final)[:, 1]
+
+    results = pd.DataFrame({
+        'raw_probability': raw_probability,
+        'risk_score': adjust_probability_display(raw_probability) * 100,
+        'prediction': (raw_probability >= OPTIMAL_THRESHOLD).astype(int)
+    }, index=df_raw.index)
+
+    if explain:
+        results = results.join(explain_contributions(X_final, best_classifier).add_prefix('contrib_'))
+
+    return results
+
+
+# 12. 个体化解释函数
+def explain_contributions(X_final: pd.DataFrame, model) -> pd.DataFrame:
+    """
+    计算每位患者各项指标对 logit 的加性贡献：系数 × 标准化值（OHE 列为系数 × 0/1），
+    再把分类 OHE 列归并回其原始特征，得到 8 列贡献。
+    数值特征的 0 点是训练集均值，分类特征的 0 点是参考组，因此贡献是相对“平均患者”的偏离。
+    """
+    coefs = pd.Series(model.coef_[0], index=model.feature_names_in_)[X_final.columns].to_numpy()
+
+    # (OHE 后列数 × 8) 的归并矩阵：由某原始特征派生的列在该特征处为 1
+    group_matrix = np.array([
+        [col == feature or col.startswith(feature + '_category_') for feature in NUMERICAL_FEATURES]
+        for col in X_final.columns
+    ], dtype=float)
+
+    contributions = (X_final.to_numpy() * coefs) @ group_matrix
+    return pd.DataFrame(contributions, index=X_final.index, columns=NUMERICAL_FEATURES)
+
+
+def top_risk_drivers(contributions: pd.DataFrame, k=3) -> pd.DataFrame:
+    """
+    按贡献从大到小取每行前 k 项指标，返回 k 列文字说明，例如 “血糖浓度 (+0.85)”。
+    contributions 的列可以是 8 项特征名，也可以带 contrib_ 前缀。
+    """
+    features = [col[len('contrib_'):] if col.startswith('contrib_') else col for col in contributions.columns]
+    names = np.array([FEATURE_NAMES_CN.get(f, f) for f in features], dtype=object)
+
+    values = contributions.to_numpy()
+    order = np.argsort(-values, axis=1)[:, :k]
+    top_values = np.take_along_axis(values, order, axis=1)
+
+    # 贡献保留两位小数后取值有限，只格式化去重后的数值，避免逐行调用 format；
+    # 加 0.0 把 -0.0 归一为 0.0，否则 np.unique 合并两者后显示的符号取决于分块内容
+    unique_values, inverse = np.unique(np.round(top_values, 2) + 0.0, return_inverse=True)
+    formatted = np.array([f' ({v:+.2f})' for v in unique_values], dtype=object)[inverse.reshape(top_values.shape)]
+
+    labels = names[order] + formatted
+    return pd.DataFrame(labels, index=contributions.index,
+                        columns=[f'主要风险因素{i + 1}' for i in range(order.shape[1])])
@@ -0,0 +1,260 @@
+"""
+糖尿病预测项目 - 可移植模型格式
+功能: 把 disease_classifier_ohe_new.pkl 连同完整的特征流水线导出为一个自描述的小型 JSON：
+      特征顺序、Z-score 参数、分类分箱规则、OHE 列、系数、截距、决策阈值和显示评分映射。
+      PortableModel 只依赖 NumPy 读取并评分，不需要导入 scikit-learn（冷启动省去数百毫秒），
+      也不受 scikit-learn 升级后 pickle 格式变化的影响。
+
+      与 src/model_predictor.py 的 preprocess_batch 一致：分类分箱作用在 Z-score 之后的值上
+      （bins.applied_to = "standardized"），因此两条路径的结果逐位一致（浮点误差以内）。
+
+用法（在项目根目录执行）:
+    python -m src.portable_model export
+    python -m src.portable_model verify --data data/raw/diabetes.csv
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+# =================================================================
+# ⭐⭐⭐ 配置区 ⭐⭐⭐
+# =================================================================
+
+PORTABLE_MODEL_PATH = "analysis/models/disease_classifier_ohe_new.portable.json"
+
+FORMAT_NAME = "diabetes-logistic-portable"
+FORMAT_VERSION = 1
+
+# 分箱规则：按顺序匹配，第一个满足的规则生效，都不满足时取 default（与 np.select 相同，NaN 落入 default）
+# lo 为闭区间下界；hi 为上界，hi_inclusive 决定是否包含
+CATEGORY_BINS = {
+    'Pregnancies': {
+        'rules': [
+            {'label': '0次', 'lo': 0, 'hi': 0, 'hi_inclusive': True},
+            {'label': '1-3次', 'lo': 1, 'hi': 3, 'hi_inclusive': True},
+            {'label': '4-7次', 'lo': 4, 'hi': 7, 'hi_inclusive': True},
+        ],
+        'default': '≥8次',
+    },
+    'BMI': {
+        'rules': [
+            {'label': '<27', 'hi': 27.0, 'hi_inclusive': False},
+            {'label': '27-32', 'lo': 27.0, 'hi': 32.0, 'hi_inclusive': False},
+            {'label': '32-37', 'lo': 32.0, 'hi': 37.0, 'hi_inclusive': False},
+        ],
+        'default': '≥37',
+    },
+    'Age': {
+        'rules': [
+            {'label': '<30岁', 'hi': 30, 'hi_inclusive': False},
+            {'label': '30-40岁', 'lo': 30, 'hi': 40, 'hi_inclusive': False},
+        ],
+        'default': '≥40岁',
+    },
+}
+
+
+# =================================================================
+# 导出（需要 scikit-learn，仅在离线环境执行）
+# =================================================================
+
+def build_portable_spec(model, means, stds, source_model, source_model_version):
+    """由线性模型（需有 coef_ / intercept_ / feature_names_in_）和 Z-score 参数生成可移植描述"""
+    from src.model_predictor import NUMERICAL_FEATURES, OPTIMAL_THRESHOLD
+
+    return {
+        'format': FORMAT_NAME,
+        'format_version': FORMAT_VERSION,
+        'source_model': source_model,
+        'source_model_version': source_model_version,
+        'exported_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'input_features': list(NUMERICAL_FEATURES),
+        'scaler': {
+            'means': [float(means[f]) for f in NUMERICAL_FEATURES],
+            'stds': [float(stds[f]) for f in NUMERICAL_FEATURES],
+        },
+        'bins': {'applied_to': 'standardized', 'features': CATEGORY_BINS},
+        'model_columns': [str(col) for col in model.feature_names_in_],
+        'coefficients': [float(c) for c in model.coef_[0]],
+        'intercept': float(model.intercept_[0]),
+        'threshold': OPTIMAL_THRESHOLD,
+        'display': {'type': 'piecewise_linear', 'pivot': OPTIMAL_THRESHOLD, 'pivot_score': 0.5},
+    }
+
+
+def write_portable_spec(spec, output):
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(spec, f, ensure_ascii=False, indent=2)
+
+
+def export_portable_model(output=PORTABLE_MODEL_PATH):
+    """从 pkl 模型和训练集标准化参数导出可移植 JSON，返回导出的字典"""
+    from src.model_predictor import (
+        MODEL_PATH,
+        get_model_version,
+        load_model,
+        load_standardization_params,
+    )
+
+    model, _ = load_model()
+    means, stds = load_standardization_params()
+    if model is None or means is None or stds is None:
+        raise RuntimeError("模型或标准化参数加载失败，无法导出。")
+
+    spec = build_portable_spec(model, means, stds, MODEL_PATH, get_model_version())
+    write_portable_spec(spec, output)
+    return spec
+
+
+# =================================================================
+# 加载与评分（只依赖 NumPy）
+# =================================================================
+
+class PortableModel:
+    """可移植模型：score() 输入 8 项原始指标，输出与 predict_risk_batch 相同口径的三列结果"""
+
+    def __init__(self, spec):
+        if spec.get('format') != FORMAT_NAME or spec.get('format_version') != FORMAT_VERSION:
+            raise ValueError(f"不支持的模型格式: {spec.get('format')} v{spec.get('format_version')}")
+
+        self.spec = spec
+        self.input_features = spec['input_features']
+        self.means = np.asarray(spec['scaler']['means'], dtype=float)
+        self.stds = np.asarray(spec['scaler']['stds'], dtype=float)
+        self.coefficients = np.asarray(spec['coefficients'], dtype=float)
+        self.intercept = float(spec['intercept'])
+        self.threshold = float(spec['threshold'])
+        self.model_version = spec['source_model_version']
+        self._standardized_bins = spec['bins']['applied_to'] == 'standardized'
+
+        # 每个模型列的来源：('numeric', 输入列下标) 或 ('category', 输入列下标, 标签)
+        self._columns = []
+        for col in spec['model_columns']:
+            if '_category_' in col:
+                source, label = col.split('_category_')
+                self._columns.append(('category', self.input_features.index(source), label))
+            else:
+                self._columns.append(('numeric', self.input_features.index(col)))
+
+    @classmethod
+    def load(cls, path=PORTABLE_MODEL_PATH):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def _as_matrix(self, data):
+        """接受 (n, 8) 数组，或按列名取值的映射（dict / DataFrame）"""
+        if hasattr(data, 'keys'):
+            return np.column_stack([np.asarray(data[f], dtype=float) for f in self.input_features])
+        matrix = np.asarray(data, dtype=float)
+        return matrix.reshape(1, -1) if matrix.ndim == 1 else matrix
+
+    def _categorize(self, values, feature):
+        rules = self.spec['bins']['features'][feature]
+        conditions, labels = [], []
+        for rule in rules['rules']:
+            mask = np.ones(values.shape, dtype=bool)
+            if 'lo' in rule:
+                mask &= values >= rule['lo']
+            if 'hi' in rule:
+                mask &= values <= rule['hi'] if rule['hi_inclusive'] else values < rule['hi']
+            conditions.append(mask)
+            labels.append(rule['label'])
+        return np.select(conditions, labels, default=rules['default'])
+
+    def features(self, data):
+        """原始输入 -> 模型特征矩阵（列顺序为 model_columns）"""
+        raw = self._as_matrix(data)
+        standardized = (raw - self.means) / self.stds
+        binned_source = standardized if self._standardized_bins else raw
+
+        labels = {}
+        X = np.empty((len(raw), len(self._columns)))
+        for j, column in enumerate(self._columns):
+            if column[0] == 'numeric':
+                X[:, j] = standardized[:, column[1]]
+            else:
+                _, idx, label = column
+                if idx not in labels:
+                    labels[idx] = self._categorize(binned_source[:, idx], self.input_features[idx])
+                X[:, j] = labels[idx] == label
+        return X
+
+    def predict_proba(self, data):
+        logits = self.features(data) @ self.coefficients + self.intercept
+        return 1.0 / (1.0 + np.exp(-logits))
+
+    def display_score(self, raw_probability):
+        """与 adjust_probability_display 相同的分段线性映射（0-100）"""
+        pivot = self.spec['display']['pivot']
+        pivot_score = self.spec['display']['pivot_score']
+        p = np.asarray(raw_probability, dtype=float)
+        adjusted = np.where(p <= pivot, p * (pivot_score / pivot),
+                            pivot_score + (p - pivot) * ((1.0 - pivot_score) / (1.0 - pivot)))
+        return adjusted * 100
+
+    def score(self, data) -> dict:
+        """返回 {'raw_probability', 'risk_score', 'prediction'} 三个数组"""
+        raw_probability = self.predict_proba(data)
+        return {
+            'raw_probability': raw_probability,
+            'risk_score': self.display_score(raw_probability),
+            'prediction': (raw_probability >= self.threshold).astype(int),
+        }
+
+
+def load_portable_model(path=PORTABLE_MODEL_PATH):
+    return PortableModel.load(path)
+
+
+def verify_against_sklearn(data_path, path=PORTABLE_MODEL_PATH):
+    """在同一份数据上比较可移植模型与 predict_risk_batch 的结果，返回最大差异"""
+    import pandas as pd
+    from src.model_predictor import NUMERICAL_FEATURES, predict_risk_batch
+
+    df = pd.read_csv(data_path)[NUMERICAL_FEATURES]
+    start = time.perf_counter()
+    portable = load_portable_model(path)
+    load_ms = (time.perf_counter() - start) * 1000
+
+    expected = predict_risk_batch(df)
+    actual = portable.score(df)
+    return {
+        'rows': len(df),
+        'load_ms': load_ms,
+        'max_probability_diff': float(np.abs(actual['raw_probability'] - expected['raw_probability']).max()),
+        'max_score_diff': float(np.abs(actual['risk_score'] - expected['risk_score']).max()),
+        'prediction_mismatches': int((actual['prediction'] != expected['prediction'].to_numpy()).sum()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="可移植模型（JSON + NumPy）导出与校验")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = subparsers.add_parser('export', help="从 pkl 模型导出可移植 JSON")
+    export_parser.add_argument('-o', '--output', default=PORTABLE_MODEL_PATH)
+
+    verify_parser = subparsers.add_parser('verify', help="与 scikit-learn 路径逐行比较")
+    verify_parser.add_argument('--data', default="data/raw/diabetes.csv")
+    verify_parser.add_argument('--model', default=PORTABLE_MODEL_PATH)
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        spec = export_portable_model(args.output)
+        print(f"可移植模型已导出: {args.output}（{len(spec['model_columns'])} 个特征，"
+              f"{os.path.getsize(args.output)} 字节，来源 {spec['source_model_version']}）")
+    else:
+        result = verify_against_sklearn(args.data, args.model)
+        print(f"校验样本: {result['rows']}，加载用时 {result['load_ms']:.1f} ms")
+        print(f"概率最大差异: {result['max_probability_diff']:.2e}")
+        print(f"评分最大差异: {result['max_score_diff']:.2e}")
+        print(f"诊断不一致: {result['prediction_mismatches']} 行")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+"""
+糖尿病预测项目 - 独立预测服务
+功能: 在 Streamlit 页面之外提供轻量级 HTTP/JSON 评分接口（仅依赖标准库），
+      启动时预加载模型与标准化参数，支持单条/批量请求并统计 p50/p99 延迟。
+
+用法（在项目根目录执行）:
+    python -m src.prediction_service --host 127.0.0.1 --port 8000
+
+接口:
+    POST /predict   请求体为单个患者字典，或患者字典列表，或 {"instances": [...]}
+    GET  /metrics   返回请求计数与延迟分位数（毫秒）
+    GET  /health    存活检查
+
+加 --max-wait-ms N 启动时，并发到达的单条请求会经 PredictionMicroBatcher 合并为批次评分。
+加 --portable-model 启动时使用 src/portable_model.py 导出的 JSON 模型评分，进程不导入 scikit-learn。
+"""
+
+import argparse
+import json
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from src.audit_log import get_audit_logger
+from src.micro_batcher import DEFAULT_MAX_BATCH_SIZE, PredictionMicroBatcher
+from src.model_predictor import (
+    NUMERICAL_FEATURES,
+    get_model_version,
+    load_model,
+    load_standardization_params,
+    predict_risk_batch,
+)
+from src.portable_model import load_portable_model
+
+# =================================================================
+# ⭐⭐⭐ 服务配置区 ⭐⭐⭐
+# =================================================================
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8000
+
+# 延迟统计保留最近的请求数（环形缓冲区）
+LATENCY_WINDOW = 10000
+
+# 单次请求允许的最大批量行数
+MAX_BATCH_SIZE = 100000
+
+
+class LatencyRecorder:
+    """线程安全的延迟记录器，只保留最近 window 次请求用于计算分位数"""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.total_requests = 0
+        self.total_rows = 0
+
+    def record(self, seconds, rows=1):
+        with self._lock:
+            self._samples.append(seconds)
+            self.total_requests += 1
+            self.total_rows += rows
+
+    def summary(self):
+        """返回请求数、行数以及 p50/p99/平均延迟（毫秒）"""
+        with self._lock:
+            samples = np.array(self._samples, dtype=float) * 1000
+            total_requests, total_rows = self.total_requests, self.total_rows
+
+        if samples.size == 0:
+            p50 = p99 = mean = None
+        else:
+            p50, p99 = np.percentile(samples, [50, 99])
+            mean = samples.mean()
+
+        return {
+            'requests': total_requests,
+            'rows': total_rows,
+            'window': int(samples.size),
+            'p50_ms': None if p50 is None else round(float(p50), 3),
+            'p99_ms': None if p99 is None else round(float(p99), 3),
+            'mean_ms': None if mean is None else round(float(mean), 3),
+        }
+
+
+def warm_up():
+    """预加载模型与标准化参数，并做一次预测，保证首个请求不承担加载开销"""
+    model, _ = load_model()
+    means, stds = load_standardization_params()
+    if model is None or means is None or stds is None:
+        raise RuntimeError("模型或标准化参数加载失败，服务无法启动。")
+
+    predict_risk_batch(pd.DataFrame([means]))
+
+
+def warm_up_portable(path):
+    """加载可移植模型并做一次预测，返回 PortableModel"""
+    portable = load_portable_model(path)
+    portable.score(np.asarray([portable.means]))
+    return portable
+
+
+def parse_payload(payload):
+    """
+    将请求体解析为 (DataFrame, 是否为单条请求)。
+    缺少必需特征、类型不符或取值不是有限数值时抛出 ValueError。
+    """
+    if isinstance(payload, dict) and 'instances' in payload:
+        payload = payload['instances']
+
+    single = isinstance(payload, dict)
+    records = [payload] if single else payload
+
+    if not isinstance(records, list) or len(records) == 0:
+        raise ValueError("请求体必须是患者字典、非空列表或 {\"instances\": [...]}")
+    if len(records) > MAX_BATCH_SIZE:
+        raise ValueError(f"单次请求最多 {MAX_BATCH_SIZE} 行")
+    if not all(isinstance(r, dict) for r in records):
+        raise ValueError("列表中的每一项都必须是患者字典")
+
+    df = pd.DataFrame.from_records(records)
+    missing_columns = [col for col in NUMERICAL_FEATURES if col not in df.columns]
+    if missing_columns:
+        raise ValueError("缺少必需的特征: " + ', '.join(missing_columns))
+
+    try:
+        df[NUMERICAL_FEATURES] = df[NUMERICAL_FEATURES].astype(float)
+    except (TypeError, ValueError):
+        raise ValueError("特征值必须为数值")
+
+    # null / NaN / Infinity 能通过 float 转换，但会让模型报错或（可移植模型）静默给出 NaN 概率和阴性诊断
+    not_finite = ~np.isfinite(df[NUMERICAL_FEATURES].to_numpy())
+    if not_finite.any():
+        rows, cols = np.nonzero(not_finite)
+        fields = [f"{NUMERICAL_FEATURES[col]}" + ("" if single else f"（第 {row + 1} 行）")
+                  for row, col in zip(rows[:10], cols[:10])]
+        raise ValueError("特征值必须为有限数值，不能为 null / NaN / Infinity: " + ', '.join(fields))
+
+    return df, single
+
+
+def score_payload(payload, batcher=None, portable=None):
+    """
+    对请求体评分，返回可直接序列化为 JSON 的结果。
+    传入 batcher 时，单条请求交给微批合并器与其他并发请求一起评分；
+    传入 portable（PortableModel）时用它代替 scikit-learn 模型评分。
+    """
+    df, single = parse_payload(payload)
+    if portable is not None:
+        results = pd.DataFrame(portable.score(df), index=df.index)
+        model_version = portable.model_version
+    elif single and batcher is not None:
+        results = pd.DataFrame([batcher.submit(df.iloc[0].to_dict()).result()])
+        model_version = get_model_version()
+    else:
+        results = predict_risk_batch(df)
+        model_version = get_model_version()
+    get_audit_logger().record_batch(df, results, model_version, 'prediction_service')
+
+    predictions = [
+        {
+            'risk_score': float(row.risk_score),
+            'prediction': int(row.prediction),
+            'probability': float(row.raw_probability),
+        }
+        for row in results.itertuples(index=False)
+    ]
+
+    return (predictions[0] if single else {'predictions': predictions}), len(df)
+
+
+class PredictionRequestHandler(BaseHTTPRequestHandler):
+    """HTTP 请求处理器，延迟记录器挂在 server 对象上"""
+
+    def _send_json(self, status, body):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send_json(200, {'status': 'ok'})
+        elif self.path == '/metrics':
+            self._send_json(200, self.server.latency.summary())
+        else:
+            self._send_json(404, {'error': '未知路径'})
+
+    def do_POST(self):
+        if self.path != '/predict':
+            self._send_json(404, {'error': '未知路径'})
+            return
+
+        start = time.perf_counter()
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            payload = json.loads(self.rfile.read(length) or b'null')
+            body, rows = score_payload(payload, self.server.batcher, self.server.portable)
+        except (ValueError, json.JSONDecodeError) as e:
+            self._send_json(400, {'error': str(e)})
+            return
+        except Exception as e:
+            self._send_json(500, {'error': f"预测失败: {e}"})
+            return
+
+        self.server.latency.record(time.perf_counter() - start, rows)
+        self._send_json(200, body)
+
+    def log_message(self, format, *args):
+        # 高并发下逐条打印访问日志本身就是瓶颈，默认关闭
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def create_server(host=DEFAULT_HOST, port=DEFAULT_PORT, verbose=False, batcher=None, portable=None):
+    """创建（但不启动）预测服务，调用前模型应已预热"""
+    server = ThreadingHTTPServer((host, port), PredictionRequestHandler)
+    server.daemon_threads = True
+    server.latency = LatencyRecorder()
+    server.verbose = verbose
+    server.batcher = batcher
+    server.portable = portable
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="糖尿病风险预测 HTTP 服务")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--verbose', action='store_true', help="打印每个请求的访问日志")
+    parser.add_argument('--max-wait-ms', type=float, default=0.0,
+                        help="单条请求微批合并的最大等待时间，0 表示不合并")
+    parser.add_argument('--max-batch-size', type=int, default=DEFAULT_MAX_BATCH_SIZE,
+                        help="微批合并的最大批大小")
+    parser.add_argument('--portable-model', default=None, metavar='PATH',
+                        help="使用可移植 JSON 模型评分（python -m src.portable_model export 生成）")
+    args = parser.parse_args()
+    if args.portable_model and args.max_wait_ms > 0:
+        parser.error("--portable-model 与 --max-wait-ms 不能同时使用")
+
+    start = time.perf_counter()
+    portable = None
+    if args.portable_model:
+        portable = warm_up_portable(args.portable_model)
+    else:
+        warm_up()
+    print(f"模型预热完成，用时 {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    batcher = None
+    if args.max_wait_ms > 0:
+        batcher = PredictionMicroBatcher(max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms)
+
+    server = create_server(args.host, args.port, args.verbose, batcher, portable)
+    print(f"预测服务已启动: http://{args.host}:{args.port}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if batcher is not None:
+            batcher.close()
+            print("微批统计:", json.dumps(batcher.stats(), ensure_ascii=False))
+        print("服务已停止，延迟统计:", json.dumps(server.latency.summary(), ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+糖尿病预测项目 - 滑块网格风险查找表
+功能: 逻辑回归的 logit 可按 8 项原始输入拆分为互不相关的加性贡献
+      （数值特征的线性项 + 由该特征派生的分类 OHE 项）。
+      预先计算每个滑块位置的贡献，查询时只需 8 次数组查找和一次 sigmoid，
+      同时可直接得到任一特征的 what-if 曲线。
+"""
+
+import numpy as np
+import pandas as pd
+
+from src.lazy_imports import cache_resource
+from src.model_predictor import (
+    FINAL_FEATURES,
+    NUMERICAL_FEATURES,
+    OPTIMAL_THRESHOLD,
+    adjust_probability_display,
+    get_model_version,
+    load_model,
+    load_standardization_params,
+    preprocess_batch,
+)
+
+# =================================================================
+# ⭐⭐⭐ 滑块网格配置（与 pages/1_personal_assessment.py 的滑块保持一致）⭐⭐⭐
+# =================================================================
+
+# 特征: (最小值, 最大值, 步长)
+SLIDER_GRID = {
+    'Pregnancies': (0, 20, 1),
+    'Glucose': (0, 300, 1),
+    'BloodPressure': (0, 150, 1),
+    'SkinThickness': (0, 100, 1),
+    'Insulin': (0, 500, 1),
+    'BMI': (0.0, 50.0, 0.1),
+    'DiabetesPedigreeFunction': (0.0, 2.5, 0.01),
+    'Age': (1, 100, 1),
+}
+
+
+def feature_columns(feature):
+    """返回 FINAL_FEATURES 中由某个原始特征派生的所有列（数值列本身 + 其分类 OHE 列）"""
+    return [col for col in FINAL_FEATURES
+            if col == feature or col.startswith(feature + '_category_')]
+
+
+class RiskLookupTable:
+    """
+    按特征拆分的 logit 贡献表。
+    tables[feature][i] 为该特征取第 i 个滑块值时对 logit 的贡献，
+    logit = intercept + Σ tables[feature][index(feature)]。
+    """
+
+    def __init__(self, intercept, grids, tables):
+        self.intercept = float(intercept)
+        self.grids = grids
+        self.tables = tables
+
+    @classmethod
+    def build(cls, model, grid=SLIDER_GRID):
+        """
+        用 preprocess_batch 对每个特征的全部滑块取值做一次批量预处理，
+        再与该特征相关列的系数相乘，保证与模型预测口径完全一致。
+        """
+        means, _ = load_standardization_params()
+        if means is None:
+            raise RuntimeError("无法加载标准化参数，无法构建查找表。")
+
+        coefs = pd.Series(model.coef_[0], index=model.feature_names_in_)
+
+        grids, tables = {}, {}
+        for feature in NUMERICAL_FEATURES:
+            low, high, step = grid[feature]
+            n = int(round((high - low) / step)) + 1
+            values = np.round(low + step * np.arange(n), 6)
+
+            # 其他特征取训练均值即可：它们不会影响本特征派生列的取值
+            df = pd.DataFrame({f: means[f] for f in NUMERICAL_FEATURES}, index=range(n))
+            df[feature] = values
+
+            cols = feature_columns(feature)
+            X = preprocess_batch(df)[cols].to_numpy()
+            grids[feature] = values
+            tables[feature] = X @ coefs[cols].to_numpy()
+
+        return cls(model.intercept_[0], grids, tables)
+
+    def _index(self, feature, value):
+        """返回 value 在滑块网格中的位置；不在网格上时返回 None"""
+        grid = self.grids[feature]
+        low, high, step = SLIDER_GRID[feature]
+        idx = int(round((float(value) - low) / step))
+        if 0 <= idx < len(grid) and abs(grid[idx] - float(value)) < 1e-6:
+            return idx
+        return None
+
+    def logit(self, raw_data: dict):
+        """8 次查表求和得到 logit；任一输入不在滑块网格上时返回 None"""
+        total = self.intercept
+        for feature in NUMERICAL_FEATURES:
+            idx = self._index(feature, raw_data[feature])
+            if idx is None:
+                return None
+            total += self.tables[feature][idx]
+        return total
+
+    def predict(self, raw_data: dict):
+        """
+        常数时间评分，返回 (显示评分, 诊断结果)，与 predict_risk 前两个返回值口径一致。
+        输入不在网格上时返回 None，调用方应回退到模型预测。
+        """
+        logit = self.logit(raw_data)
+        if logit is None:
+            return None
+
+        raw_probability = 1.0 / (1.0 + np.exp(-logit))
+        final_prediction = 1 if raw_probability >= OPTIMAL_THRESHOLD else 0
+        return adjust_probability_display(raw_probability) * 100, final_prediction
+
+    def what_if(self, raw_data: dict, feature):
+        """
+        固定其他输入，只让 feature 扫过整个滑块范围。
+        返回 (滑块取值数组, 显示评分数组)；输入不在网格上时返回 None。
+        """
+        logit = self.logit(raw_data)
+        if logit is None:
+            return None
+
+        current = self.tables[feature][self._index(feature, raw_data[feature])]
+        logits = logit - current + self.tables[feature]
+        raw_probability = 1.0 / (1.0 + np.exp(-logits))
+        return self.grids[feature], adjust_probability_display(raw_probability) * 100
+
+
+def get_risk_lookup_table():
+    """构建并缓存查找表；模型文件被替换后按新版本重新构建，模型不可用时返回 None"""
+    return _build_risk_lookup_table(get_model_version())
+
+
+@cache_resource
+def _build_risk_lookup_table(model_version):
+    model, _ = load_model()
+    if model is None or not hasattr(model, 'coef_'):
+        return None
+    return RiskLookupTable.build(model)
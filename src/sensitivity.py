@@ -0,0 +1,45 @@
+"""
+糖尿病预测项目 - What-if 敏感性分析
+功能: 固定当前患者的其他输入，让 8 项指标分别扫过各自的滑块范围，
+      把全部 8 × N 个变体拼成一个矩阵，只调用一次 predict_risk_batch 完成评分。
+"""
+
+import numpy as np
+import pandas as pd
+
+from src.instrumentation import timed
+from src.model_predictor import NUMERICAL_FEATURES, predict_risk_batch
+from src.risk_lookup import SLIDER_GRID
+
+# 每个特征扫描的点数（会对齐到滑块步长并去重，实际点数可能更少）
+SENSITIVITY_POINTS = 100
+
+
+def sensitivity_grid(feature, points=SENSITIVITY_POINTS):
+    """在滑块范围内均匀取点，并对齐到滑块步长"""
+    low, high, step = SLIDER_GRID[feature]
+    values = np.round(np.linspace(low, high, points) / step) * step
+    return np.unique(np.round(values, 6))
+
+
+@timed('敏感性分析')
+def compute_sensitivity_curves(raw_data: dict, points=SENSITIVITY_POINTS) -> dict:
+    """
+    返回 {特征: (扫描取值数组, 显示评分数组)}。
+    所有变体在同一个矩阵中评分，成本约等于一次批量预测。
+    """
+    base = np.array([float(raw_data[f]) for f in NUMERICAL_FEATURES])
+    grids = [sensitivity_grid(f, points) for f in NUMERICAL_FEATURES]
+
+    # 每个特征一个行块：先复制当前输入，再把该特征列替换为扫描值
+    X = np.tile(base, (sum(len(g) for g in grids), 1))
+    offsets = np.cumsum([0] + [len(g) for g in grids])
+    for j, values in enumerate(grids):
+        X[offsets[j]:offsets[j + 1], j] = values
+
+    scores = predict_risk_batch(pd.DataFrame(X, columns=NUMERICAL_FEATURES))['risk_score'].to_numpy()
+
+    return {
+        feature: (grids[j], scores[offsets[j]:offsets[j + 1]])
+        for j, feature in enumerate(NUMERICAL_FEATURES)
+    }
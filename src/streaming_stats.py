@@ -0,0 +1,319 @@
+"""
+糖尿病预测项目 - 可增量更新的统计量
+功能: 为增量训练和大数据预处理提供只需单次遍历、可合并的统计量：
+      RunningMoments        —— Welford/Chan 批量更新的均值与标准差（与 pandas std 一致，ddof=1）
+      QuantileSketch        —— KLL 风格的分位数草图，内存与数据量无关
+      GroupedQuantileSketch —— 按分组维护的分位数草图（例如各年龄组的中位数）
+      以及在分块读取的 CSV 上单次遍历得到四分位数/IQR 边界和分组中位数的辅助函数，
+      供 data_pre_process 中的 3/4/5 号脚本在 --streaming 模式下使用。
+"""
+
+import argparse
+import math
+
+import numpy as np
+import pandas as pd
+
+# =================================================================
+# ⭐⭐⭐ 默认参数 ⭐⭐⭐
+# =================================================================
+
+# KLL 草图的精度参数 k：越大越精确，内存约为 O(k)
+DEFAULT_SKETCH_K = 200
+
+# 单个分位数查询的归一化秩误差约为 KLL_ERROR_CONSTANT / k（实测约 99% 的查询落在此范围内）
+KLL_ERROR_CONSTANT = 2.3
+
+# 分块读取 CSV 的默认行数
+DEFAULT_CHUNK_SIZE = 500_000
+
+# data_pre_process 脚本 --streaming 模式下分位数草图的默认目标秩误差
+DEFAULT_EPSILON = 0.001
+
+# 各层容量按 c^(深度) 递减
+_KLL_C = 2.0 / 3.0
+
+
+class RunningMoments:
+    """
+    多列并行的均值/方差累加器。
+    update() 一次接收一个批次，用 Chan 等人的合并公式更新，成本只与批次大小有关。
+    """
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        self.count = 0
+        self.mean = np.zeros(len(self.columns))
+        self.m2 = np.zeros(len(self.columns))
+
+    def update(self, df: pd.DataFrame):
+        values = df[self.columns].to_numpy(dtype=float)
+        n = len(values)
+        if n == 0:
+            return self
+
+        batch_mean = values.mean(axis=0)
+        batch_m2 = ((values - batch_mean) ** 2).sum(axis=0)
+        self._combine(n, batch_mean, batch_m2)
+        return self
+
+    def merge(self, other):
+        """合并另一个累加器（例如其他进程、其他分块的结果）"""
+        if other.count:
+            self._combine(other.count, other.mean, other.m2)
+        return self
+
+    def _combine(self, n, mean, m2):
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean = self.mean + delta * (n / total)
+        self.m2 = self.m2 + m2 + delta ** 2 * (self.count * n / total)
+        self.count = total
+
+    def means(self) -> dict:
+        return dict(zip(self.columns, self.mean.tolist()))
+
+    def stds(self) -> dict:
+        """样本标准差（ddof=1），与 DataFrame.std() 一致"""
+        if self.count < 2:
+            return {col: float('nan') for col in self.columns}
+        return dict(zip(self.columns, np.sqrt(self.m2 / (self.count - 1)).tolist()))
+
+
+def sketch_k_for_error(epsilon):
+    """目标秩误差 -> KLL 参数 k"""
+    if not 0 < epsilon < 1:
+        raise ValueError("epsilon 必须在 (0, 1) 之间")
+    return max(8, math.ceil(KLL_ERROR_CONSTANT / epsilon))
+
+
+class QuantileSketch:
+    """
+    KLL 分位数草图。
+    数据先进入第 0 层；某层超出容量时排序、随机保留奇数或偶数位置的一半推到上一层，
+    第 h 层的每个元素代表 2^h 个原始值。秩误差约为 O(1/k)，与数据量无关。
+    """
+
+    def __init__(self, k=DEFAULT_SKETCH_K, seed=None):
+        self.k = k
+        self.n = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self._levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    @classmethod
+    def from_error(cls, epsilon, seed=None):
+        """按目标秩误差创建草图，例如 epsilon=0.01 表示返回值的秩与目标分位数相差约 1% 以内"""
+        return cls(sketch_k_for_error(epsilon), seed)
+
+    @property
+    def rank_error(self):
+        """当前 k 对应的近似秩误差"""
+        return KLL_ERROR_CONSTANT / self.k
+
+    def _capacity(self, level):
+        depth = len(self._levels) - level - 1
+        return max(2, int(np.ceil(self.k * _KLL_C ** depth)))
+
+    def update(self, values):
+        """批量插入（自动忽略 NaN）"""
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return self
+
+        self.n += values.size
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        self._levels[0] = np.concatenate([self._levels[0], values])
+        self._compress()
+        return self
+
+    def update_weighted(self, value, count):
+        """
+        插入 count 个相同的值。按 count 的二进制位直接放入对应层（第 h 层元素权重为 2^h），
+        不需要展开成长度为 count 的数组。
+        """
+        count = int(count)
+        if count <= 0:
+            return self
+
+        self.n += count
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        level = 0
+        while count:
+            if count & 1:
+                while len(self._levels) <= level:
+                    self._levels.append(np.empty(0))
+                self._levels[level] = np.append(self._levels[level], float(value))
+            count >>= 1
+            level += 1
+        self._compress()
+        return self
+
+    def merge(self, other):
+        """合并另一个草图：逐层拼接后统一压缩"""
+        if other.n == 0:
+            return self
+        while len(self._levels) < len(other._levels):
+            self._levels.append(np.empty(0))
+        for level, items in enumerate(other._levels):
+            self._levels[level] = np.concatenate([self._levels[level], items])
+        self.n += other.n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def _compress(self):
+        level = 0
+        while level < len(self._levels):
+            items = self._levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self._levels):
+                    self._levels.append(np.empty(0))
+
+                items = np.sort(items)
+                # 奇数个元素时留下最大的一个在本层，其余两两配对，随机保留其中一个
+                keep = items[-1:] if len(items) % 2 else items[:0]
+                paired = items[:len(items) - len(keep)]
+                promoted = paired[self._rng.integers(2)::2]
+
+                self._levels[level] = keep
+                self._levels[level + 1] = np.concatenate([self._levels[level + 1], promoted])
+            level += 1
+
+    def _weighted_items(self):
+        items = np.concatenate(self._levels)
+        weights = np.concatenate([np.full(len(lv), 2.0 ** h) for h, lv in enumerate(self._levels)])
+        order = np.argsort(items, kind='stable')
+        return items[order], np.cumsum(weights[order])
+
+    def quantiles(self, qs):
+        """返回一组分位数（0 <= q <= 1）；q=0/1 时返回精确的最小/最大值"""
+        qs = np.atleast_1d(np.asarray(qs, dtype=float))
+        if self.n == 0:
+            return np.full(qs.shape, np.nan)
+        if len(self._levels) == 1:
+            # 尚未发生压缩时草图保存了全部数据，直接给出与 pandas 一致的精确分位数（线性插值）
+            return np.quantile(self._levels[0], np.clip(qs, 0.0, 1.0))
+
+        items, cum_weights = self._weighted_items()
+        targets = qs * cum_weights[-1]
+        idx = np.clip(np.searchsorted(cum_weights, targets, side='left'), 0, len(items) - 1)
+        result = items[idx]
+        result[qs <= 0] = self.min
+        result[qs >= 1] = self.max
+        return result
+
+    def quantile(self, q):
+        return float(self.quantiles([q])[0])
+
+    def median(self):
+        return self.quantile(0.5)
+
+    def __len__(self):
+        """草图中实际保存的元素个数"""
+        return sum(len(lv) for lv in self._levels)
+
+
+class GroupedQuantileSketch:
+    """按分组键维护的分位数草图，update() 一次处理一个批次的全部分组"""
+
+    def __init__(self, k=DEFAULT_SKETCH_K, seed=None):
+        self.k = k
+        self.seed = seed
+        self.sketches = {}
+
+    def update(self, keys, values):
+        frame = pd.DataFrame({'key': np.asarray(keys), 'value': np.asarray(values, dtype=float)})
+        for key, group in frame.groupby('key', sort=False):
+            if key not in self.sketches:
+                self.sketches[key] = QuantileSketch(self.k, self.seed)
+            self.sketches[key].update(group['value'].to_numpy())
+        return self
+
+    def merge(self, other):
+        for key, sketch in other.sketches.items():
+            if key in self.sketches:
+                self.sketches[key].merge(sketch)
+            else:
+                self.sketches[key] = sketch
+        return self
+
+    def quantile(self, key, q):
+        sketch = self.sketches.get(key)
+        return float('nan') if sketch is None else sketch.quantile(q)
+
+    def medians(self) -> dict:
+        return {key: sketch.median() for key, sketch in self.sketches.items()}
+
+
+# =================================================================
+# 分块单遍统计
+# =================================================================
+
+def parse_streaming_args(description=None, argv=None):
+    """
+    data_pre_process 中 3/4/5 号脚本共用的命令行参数。
+    默认整表读入内存；--streaming 时分块读取两遍，用分位数草图近似中位数 / 四分位数（适合超大数据）。
+    使用 parse_args 且不允许缩写：拼错的参数（如 --stream）直接报错，而不是悄悄按其他模式运行。
+    """
+    parser = argparse.ArgumentParser(description=description, allow_abbrev=False)
+    parser.add_argument('--streaming', action='store_true', help="分块流式处理")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--epsilon', type=float, default=DEFAULT_EPSILON, help="分位数草图的目标秩误差")
+    return parser.parse_args(argv)
+
+
+def iter_csv_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE, usecols=None):
+    """分块读取 CSV，内存占用只与 chunk_size 有关"""
+    yield from pd.read_csv(path, chunksize=chunk_size, usecols=usecols)
+
+
+def column_quantile_sketches(chunks, columns, epsilon=None, k=DEFAULT_SKETCH_K, exclude_zero_cols=()):
+    """
+    单次遍历分块数据，为每列建立分位数草图，同时统计行数。
+    exclude_zero_cols 中的列不计入 0 值（0 表示缺失时使用）。
+    返回 ({列: QuantileSketch}, 总行数)。
+    """
+    k = sketch_k_for_error(epsilon) if epsilon is not None else k
+    sketches = {col: QuantileSketch(k, seed=j) for j, col in enumerate(columns)}
+    rows = 0
+    for chunk in chunks:
+        rows += len(chunk)
+        for col in columns:
+            values = chunk[col].to_numpy(dtype=float)
+            if col in exclude_zero_cols:
+                values = values[values != 0]
+            sketches[col].update(values)
+    return sketches, rows
+
+
+def iqr_bounds(sketch, whisker=1.5):
+    """返回 (Q1, Q3, IQR, 下界, 上界)，与 Q1 - 1.5 IQR / Q3 + 1.5 IQR 的箱线图规则一致"""
+    q1, q3 = sketch.quantiles([0.25, 0.75])
+    iqr = q3 - q1
+    return q1, q3, iqr, q1 - whisker * iqr, q3 + whisker * iqr
+
+
+def group_median_sketches(chunks, group_col, value_cols, epsilon=None, k=DEFAULT_SKETCH_K, exclude_zero=True):
+    """
+    单次遍历分块数据，按 group_col 分组为 value_cols 建立中位数草图，同时建立全局草图作为回退。
+    exclude_zero=True 时只统计非零值（与 3_fill_missing_value.py 的口径一致）。
+    返回 ({列: GroupedQuantileSketch}, {列: QuantileSketch}, 总行数)。
+    """
+    k = sketch_k_for_error(epsilon) if epsilon is not None else k
+    grouped = {col: GroupedQuantileSketch(k, seed=j) for j, col in enumerate(value_cols)}
+    overall = {col: QuantileSketch(k, seed=j) for j, col in enumerate(value_cols)}
+    rows = 0
+    for chunk in chunks:
+        rows += len(chunk)
+        for col in value_cols:
+            values = chunk[col].to_numpy(dtype=float)
+            mask = values > 0 if exclude_zero else np.ones(len(values), dtype=bool)
+            grouped[col].update(chunk[group_col].to_numpy()[mask], values[mask])
+            overall[col].update(values[mask])
+    return grouped, overall, rows
@@ -0,0 +1,216 @@
+"""
+糖尿病预测项目 - 合成人群生成器
+功能: 从 Pima 原始数据拟合按 Outcome 分组的边缘分布和相关结构（高斯 Copula），
+      并复现 1_missing_value_detection.py 中“0 值视为缺失”的联合缺失模式，
+      按块流式生成任意规模的合成数据（CSV / Parquet），用于本地复现生产规模下的
+      批量筛查和 data_pre_process 脚本行为。相同 seed 生成完全相同的数据。
+
+用法（在项目根目录执行）:
+    python -m src.synthetic_population -n 10000000 -o data/synthetic/population.csv
+    python -m src.synthetic_population -n 10000000 -o data/synthetic/population.parquet --format parquet
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr, ndtri
+
+# =================================================================
+# ⭐⭐⭐ 生成器配置区 ⭐⭐⭐
+# =================================================================
+
+RAW_DATA_PATH = "data/raw/diabetes.csv"
+
+FEATURES = [
+    'Pregnancies', 'Glucose', 'BloodPressure', 'SkinThickness',
+    'Insulin', 'BMI', 'DiabetesPedigreeFunction', 'Age'
+]
+TARGET = 'Outcome'
+
+# 与 1_missing_value_detection.py 一致：这些列的 0 值视为缺失
+ZERO_AS_MISSING_COLS = ['Glucose', 'BloodPressure', 'SkinThickness', 'BMI', 'Insulin']
+
+# 输出精度：与原始数据保持一致，其余列为整数
+DECIMALS = {'BMI': 1, 'DiabetesPedigreeFunction': 3}
+
+DEFAULT_CHUNK_SIZE = 1_000_000
+
+
+def _nearest_correlation(corr):
+    """把特征值截断为正，修正成半正定矩阵后重新归一化对角线"""
+    values, vectors = np.linalg.eigh(corr)
+    fixed = vectors @ np.diag(np.clip(values, 1e-6, None)) @ vectors.T
+    d = np.sqrt(np.diag(fixed))
+    return fixed / np.outer(d, d)
+
+
+class PimaPopulationModel:
+    """按 Outcome 分组的高斯 Copula 模型 + 经验缺失模式"""
+
+    def __init__(self, positive_rate, class_models):
+        self.positive_rate = positive_rate
+        # class_models[outcome] = {'quantiles', 'cholesky', 'patterns', 'pattern_probs'}
+        self.class_models = class_models
+
+    @classmethod
+    def fit(cls, df):
+        """从原始数据拟合：边缘分布（经验分位数）、normal-score 相关矩阵、缺失模式分布"""
+        class_models = {}
+
+        for outcome in (0, 1):
+            group = df[df[TARGET] == outcome]
+            n = len(group)
+
+            quantiles = {}
+            normal_scores = np.zeros((n, len(FEATURES)))
+
+            for j, col in enumerate(FEATURES):
+                values = group[col].to_numpy(dtype=float)
+                observed = values != 0 if col in ZERO_AS_MISSING_COLS else np.ones(n, dtype=bool)
+
+                # 边缘分布只用观测到的值；缺失位置的 normal score 取 0（即中位数），不影响相关估计的方向
+                quantiles[col] = np.sort(values[observed])
+                ranks = pd.Series(values[observed]).rank(method='average').to_numpy()
+                normal_scores[observed, j] = ndtri(ranks / (observed.sum() + 1))
+
+            corr = _nearest_correlation(np.corrcoef(normal_scores, rowvar=False))
+
+            # 联合缺失模式：按整行的 0 值组合统计频率，保留 SkinThickness/Insulin 常同时缺失的特点
+            missing = (group[ZERO_AS_MISSING_COLS] == 0).to_numpy()
+            patterns, counts = np.unique(missing, axis=0, return_counts=True)
+
+            class_models[outcome] = {
+                'quantiles': quantiles,
+                'cholesky': np.linalg.cholesky(corr),
+                'patterns': patterns,
+                'pattern_probs': counts / counts.sum(),
+            }
+
+        return cls(float(df[TARGET].mean()), class_models)
+
+    def _sample_class(self, outcome, n, rng):
+        model = self.class_models[outcome]
+
+        # 相关的标准正态 -> 均匀分布 -> 经验分位数插值
+        z = rng.standard_normal((n, len(FEATURES))) @ model['cholesky'].T
+        u = ndtr(z)
+
+        columns = {}
+        for j, col in enumerate(FEATURES):
+            sorted_values = model['quantiles'][col]
+            grid = np.linspace(0.0, 1.0, len(sorted_values))
+            values = np.interp(u[:, j], grid, sorted_values)
+            if col in DECIMALS:
+                columns[col] = np.round(values, DECIMALS[col])
+            else:
+                columns[col] = np.rint(values).astype(np.int64)
+
+        # 套用缺失模式：被选中的列置 0
+        pattern_idx = rng.choice(len(model['pattern_probs']), size=n, p=model['pattern_probs'])
+        missing = model['patterns'][pattern_idx]
+        for k, col in enumerate(ZERO_AS_MISSING_COLS):
+            columns[col] = np.where(missing[:, k], 0, columns[col])
+
+        columns[TARGET] = np.full(n, outcome, dtype=np.int64)
+        return columns
+
+    def sample(self, n, rng):
+        """生成 n 行合成数据（列顺序与原始 CSV 一致，类别比例与原始数据一致）"""
+        outcomes = rng.random(n) < self.positive_rate
+        n_positive = int(outcomes.sum())
+
+        negative = self._sample_class(0, n - n_positive, rng)
+        positive = self._sample_class(1, n_positive, rng)
+
+        # 按 outcomes 的随机顺序交错两组样本
+        columns = {}
+        for col in FEATURES + [TARGET]:
+            merged = np.empty(n, dtype=negative[col].dtype)
+            merged[~outcomes] = negative[col]
+            merged[outcomes] = positive[col]
+            columns[col] = merged
+        return pd.DataFrame(columns)
+
+    def iter_chunks(self, n_rows, chunk_size=DEFAULT_CHUNK_SIZE, seed=42):
+        """按块生成，内存占用只与 chunk_size 有关"""
+        rng = np.random.default_rng(seed)
+        produced = 0
+        while produced < n_rows:
+            size = min(chunk_size, n_rows - produced)
+            yield self.sample(size, rng)
+            produced += size
+
+
+def load_population_model(raw_path=RAW_DATA_PATH):
+    """读取原始数据并拟合生成模型"""
+    return PimaPopulationModel.fit(pd.read_csv(raw_path))
+
+
+def generate_population(n_rows, seed=42, raw_path=RAW_DATA_PATH):
+    """一次性在内存中生成 n_rows 行（适合中小规模）"""
+    model = load_population_model(raw_path)
+    return pd.concat(model.iter_chunks(n_rows, seed=seed), ignore_index=True)
+
+
+def write_population(output_path, n_rows, fmt='csv', chunk_size=DEFAULT_CHUNK_SIZE,
+                     seed=42, raw_path=RAW_DATA_PATH):
+    """流式写出合成数据，返回写出的行数"""
+    model = load_population_model(raw_path)
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+
+    written = 0
+    if fmt == 'csv':
+        with open(output_path, 'w', encoding='utf-8', newline='') as f:
+            for i, chunk in enumerate(model.iter_chunks(n_rows, chunk_size, seed)):
+                chunk.to_csv(f, index=False, header=(i == 0))
+                written += len(chunk)
+    elif fmt == 'parquet':
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("写出 Parquet 需要安装 pyarrow：pip install pyarrow")
+
+        writer = None
+        try:
+            for chunk in model.iter_chunks(n_rows, chunk_size, seed):
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(output_path, table.schema)
+                writer.write_table(table)
+                written += len(chunk)
+        finally:
+            if writer is not None:
+                writer.close()
+    else:
+        raise ValueError(f"不支持的输出格式: {fmt}")
+
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成 Pima 分布的合成人群数据")
+    parser.add_argument('-n', '--rows', type=int, required=True, help="生成行数")
+    parser.add_argument('-o', '--output', required=True, help="输出文件路径")
+    parser.add_argument('--format', choices=['csv', 'parquet'], default=None,
+                        help="输出格式，默认按扩展名判断")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--raw', default=RAW_DATA_PATH, help="用于拟合的原始数据")
+    args = parser.parse_args()
+
+    fmt = args.format or ('parquet' if args.output.endswith('.parquet') else 'csv')
+
+    start = time.perf_counter()
+    written = write_population(args.output, args.rows, fmt, args.chunk_size, args.seed, args.raw)
+    elapsed = time.perf_counter() - start
+
+    print(f"已生成 {written:,} 行 -> {args.output}")
+    print(f"用时 {elapsed:.2f} 秒（{written / elapsed:,.0f} 行/秒）")
+
+
+if __name__ == "__main__":
+    main()
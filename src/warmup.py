@@ -0,0 +1,207 @@
+"""
+糖尿病预测项目 - 启动预热
+功能: 服务启动后第一次执行 app.py 或任一页面时，在后台线程中完成所有"首个用户才付出"的一次性开销：
+        - 导入 plotly / seaborn / scipy / sklearn 等重量级模块
+        - 填充 st.cache_resource：模型、标准化参数、模型版本号、风险查找表
+        - 用均值患者做一次预测，走完预处理 + predict_proba 的完整路径
+        - 重建一次 matplotlib 字体缓存（load_font_manager_once，不修改后端和 rcParams）
+        - 预先构建并序列化各页面用到的 plotly 图表类型（首次构建时 plotly 才加载校验器）
+      预热只做导入、缓存加载和字体缓存重建，不改动任何页面会设置的全局状态。
+      每一步的耗时记录在 WarmupReport 中，并打印到服务日志。
+
+      app.py 和 pages/ 下每个页面都调用 start_warmup()，直接打开某个页面也会触发预热；
+      st.cache_resource 对整个进程只执行一次，因此预热也只在第一次执行时触发，
+      部署后对任一页面做一次健康检查请求即可完成预热。
+
+用法（在项目根目录执行，单独测量各步骤的冷启动耗时）:
+    python -m src.warmup
+"""
+
+import importlib
+import threading
+import time
+
+import streamlit as st
+
+# =================================================================
+# ⭐⭐⭐ 预热配置区 ⭐⭐⭐
+# =================================================================
+
+# 各页面顶层导入的重量级模块
+HEAVY_MODULES = [
+    'plotly.graph_objects', 'plotly.express', 'plotly.subplots',
+    'matplotlib.pyplot', 'seaborn', 'scipy.stats', 'sklearn.linear_model',
+]
+
+# 页面会读取的数据集（预读进操作系统页缓存）
+DATASET_PATHS = [
+    "data/raw/diabetes.csv",
+    "data/processed/diabetes_train.csv",
+    "src/data/diabetes.csv",
+]
+
+_font_lock = threading.Lock()
+_font_manager_loaded = False
+
+
+def load_font_manager_once():
+    """重建 matplotlib 字体缓存，每个进程只做一次（页面每次重跑都会执行顶层代码）"""
+    global _font_manager_loaded
+    with _font_lock:
+        if not _font_manager_loaded:
+            import matplotlib.font_manager as fm
+            fm._load_fontmanager(try_read_cache=False)
+            _font_manager_loaded = True
+
+
+class WarmupReport:
+    """预热进度与各步骤耗时（线程安全，供页面查询）"""
+
+    def __init__(self):
+        self.steps = []
+        self.errors = []
+        self.started_at = time.time()
+        self.finished = threading.Event()
+        self._lock = threading.Lock()
+
+    def run_step(self, name, func):
+        start = time.perf_counter()
+        try:
+            func()
+        except Exception as e:
+            # 预热失败不影响服务，页面首次使用时会按原路径重新加载并报告错误
+            with self._lock:
+                self.errors.append(f"{name}: {e}")
+        finally:
+            with self._lock:
+                self.steps.append((name, time.perf_counter() - start))
+
+    def total_seconds(self):
+        with self._lock:
+            return sum(seconds for _, seconds in self.steps)
+
+    def summary(self):
+        with self._lock:
+            lines = [f"  {name:<16} {seconds * 1000:9.1f} ms" for name, seconds in self.steps]
+            errors = list(self.errors)
+        lines.append(f"  {'合计':<16} {self.total_seconds() * 1000:9.1f} ms")
+        lines.extend(f"  ✗ {error}" for error in errors)
+        return "\n".join(lines)
+
+
+# =================================================================
+# 预热步骤
+# =================================================================
+
+def _import_heavy_modules():
+    for name in HEAVY_MODULES:
+        importlib.import_module(name)
+
+
+def _load_model_and_params():
+    from src.model_predictor import get_model_version, load_model, load_standardization_params
+
+    model, _ = load_model()
+    means, stds = load_standardization_params()
+    if model is None or means is None or stds is None:
+        raise RuntimeError("模型或标准化参数加载失败")
+    get_model_version()
+
+
+def _dummy_prediction():
+    """
+    用均值患者走一遍批量预测路径，不经过 predict_risk，避免在审计日志和预测缓存中留下虚拟患者；
+    审计日志的写入线程在这里提前启动。
+    """
+    import pandas as pd
+    from src.audit_log import get_audit_logger
+    from src.model_predictor import load_standardization_params, predict_risk_batch
+
+    means, _ = load_standardization_params()
+    predict_risk_batch(pd.DataFrame([means]), explain=True)
+    get_audit_logger()
+
+
+def _build_lookup_table():
+    from src.risk_lookup import get_risk_lookup_table
+    get_risk_lookup_table()
+
+
+def _read_datasets():
+    import os
+    for path in DATASET_PATHS:
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                while f.read(1 << 20):
+                    pass
+
+
+def _prerender_figures():
+    """
+    各页面用到的 plotly 图表类型各构建并序列化一次（首次构建时 plotly 才加载校验器）。
+    不涉及 matplotlib：后端和 rcParams 是进程级全局状态，由页面自己设置，后台线程修改会与正在渲染的会话冲突。
+    """
+    import numpy as np
+    import pandas as pd
+    import plotly.express as px
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
+    values = np.linspace(0.0, 1.0, 50)
+    frame = pd.DataFrame({'x': values, 'y': values[::-1], 'Outcome': (values > 0.5).astype(int)})
+
+    subplots = make_subplots(rows=1, cols=2)
+    subplots.add_trace(go.Box(y=values), row=1, col=1)
+    subplots.add_trace(go.Histogram(x=values), row=1, col=2)
+
+    figures = [
+        go.Figure(go.Indicator(mode="gauge+number+delta", value=50, gauge={'axis': {'range': [0, 100]}})),
+        go.Figure(go.Heatmap(z=[[1, 2], [3, 4]])),
+        go.Figure(go.Bar(x=[1, 2], y=['a', 'b'], orientation='h')),
+        go.Figure(go.Scatter(x=values, y=values, mode='lines+markers')),
+        go.Figure(go.Scatterpolar(r=[1, 2, 3], theta=['a', 'b', 'c'], fill='toself')),
+        go.Figure(go.Scatter3d(x=values, y=values, z=values, mode='markers')),
+        go.Figure(go.Pie(labels=['a', 'b'], values=[1, 2])),
+        px.histogram(frame, x='x', color='Outcome'),
+        px.pie(frame, names='Outcome'),
+        subplots,
+    ]
+    for fig in figures:
+        fig.to_json()
+
+
+WARMUP_STEPS = [
+    ('导入重量级模块', _import_heavy_modules),
+    ('模型与标准化参数', _load_model_and_params),
+    ('预测一次', _dummy_prediction),
+    ('风险查找表', _build_lookup_table),
+    ('预读数据集', _read_datasets),
+    ('预渲染图表', _prerender_figures),
+    ('字体缓存', load_font_manager_once),
+]
+
+
+def run_warmup(report=None):
+    """依次执行全部预热步骤，返回 WarmupReport"""
+    report = report or WarmupReport()
+    for name, func in WARMUP_STEPS:
+        report.run_step(name, func)
+    report.finished.set()
+    print("启动预热完成:\n" + report.summary(), flush=True)
+    return report
+
+
+@st.cache_resource
+def start_warmup():
+    """
+    在后台线程中启动预热（每个进程只启动一次），立即返回 WarmupReport，不阻塞页面渲染。
+    app.py 和 pages/ 下每个页面的顶部都调用它：用户可能不经过首页直接打开某个页面，
+    st.cache_resource 保证无论从哪个页面进入，预热都只启动一次。
+    """
+    report = WarmupReport()
+    threading.Thread(target=run_warmup, args=(report,), name='diabetes-warmup', daemon=True).start()
+    return report
+
+
+if __name__ == "__main__":
+    run_warmup()
@@ -0,0 +1,8 @@
+"""pytest 配置：与其他脚本一样在项目根目录下运行，使 `import src.xxx` 可用"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
@@ -0,0 +1,64 @@
+"""批量筛查任务队列：URL 中的 job_id 必须校验，结果以 Parquet 保存"""
+
+import os
+import time
+
+import pandas as pd
+import pytest
+
+from src import audit_log
+from src.batch_jobs import COMPLETED, BatchJobQueue
+from src.data_validation import REQUIRED_COLUMNS
+
+
+@pytest.fixture
+def jobs(tmp_path, monkeypatch):
+    monkeypatch.setattr(audit_log, 'ENABLED', False)
+    monkeypatch.setattr(audit_log, '_audit_logger', None)
+    return BatchJobQueue(jobs_dir=str(tmp_path / 'jobs'), chunk_rows=200)
+
+
+@pytest.mark.parametrize('job_id', ['.', '..', '../jobs', '/etc', '20250101-120000-abcdeg', '', None])
+def test_invalid_job_id_is_unknown(jobs, tmp_path, job_id):
+    # 任务目录本身放一个"已完成"的 job.json：job_id='.' 未经校验时会删除整个任务目录
+    (tmp_path / 'jobs' / 'job.json').write_text('{"status": "completed", "completed_chunks": 0}')
+
+    assert jobs.get(job_id) is None
+    assert jobs.load_results(job_id) is None
+    jobs.delete(job_id)
+    assert os.path.exists(tmp_path / 'jobs' / 'job.json')
+
+
+def test_job_results_round_trip_through_parquet(jobs):
+    df = pd.read_csv('data/raw/diabetes.csv')[REQUIRED_COLUMNS + ['Outcome']]
+    job_id = jobs.submit(df, 'diabetes.csv')
+
+    deadline = time.time() + 60
+    while jobs.get(job_id)['status'] != COMPLETED:
+        assert time.time() < deadline, jobs.get(job_id)
+        time.sleep(0.1)
+
+    job_dir = os.path.join(jobs.jobs_dir, job_id)
+    assert os.path.exists(os.path.join(job_dir, 'input.parquet'))
+    assert not [name for name in os.listdir(os.path.join(job_dir, 'parts')) if not name.endswith('.parquet')]
+
+    results = jobs.load_results(job_id)
+    assert len(results) == len(df)
+    assert results.index.equals(df.index)
+
+
+def test_sweep_removes_expired_and_excess_finished_jobs(tmp_path, jobs):
+    def make_job(job_id, status, updated_at):
+        os.makedirs(os.path.join(jobs.jobs_dir, job_id, 'parts'))
+        jobs._write({'job_id': job_id, 'status': status, 'created_at': updated_at, 'updated_at': updated_at})
+
+    make_job('20200101-000000-aaaaaa', COMPLETED, '2020-01-01T00:00:00')     # 过期
+    make_job('20200101-000000-bbbbbb', 'interrupted', '2020-01-01T00:00:00') # 过期（已结束）
+    for i in range(3):
+        stamp = f'2099-01-0{i + 1}T00:00:00'
+        make_job(f'20990101-00000{i}-cccccc', COMPLETED, stamp)
+
+    jobs.max_finished = 2
+    assert jobs.sweep() == 3
+    remaining = {job['job_id'] for job in jobs.list_jobs()}
+    assert remaining == {'20990101-000001-cccccc', '20990101-000002-cccccc'}
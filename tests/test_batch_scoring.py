@@ -0,0 +1,41 @@
+"""命令行批量筛查：隔离文件中的行号是整个源文件中的行号，与分块方式无关"""
+
+import pandas as pd
+import pytest
+
+from src import audit_log
+from src.batch_scoring import score_file
+from src.data_validation import SOURCE_ROW_COLUMN, split_valid_rows, validate_frame
+
+BAD_ROWS = [3, 250, 701]   # 源文件中的数据行号（从 1 开始）
+
+
+@pytest.fixture
+def dirty_csv(tmp_path):
+    df = pd.read_csv('data/raw/diabetes.csv')
+    for row in BAD_ROWS:
+        df.loc[row - 1, 'Age'] = 999
+    path = tmp_path / 'dirty.csv'
+    df.to_csv(path, index=False)
+    return path
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_quarantine_has_source_row_numbers(dirty_csv, tmp_path, monkeypatch, workers):
+    monkeypatch.setattr(audit_log, 'ENABLED', False)
+    monkeypatch.setattr(audit_log, '_audit_logger', None)
+    summary = score_file(str(dirty_csv), str(tmp_path / 'out.csv'), workers=workers,
+                         chunk_size=100, block_bytes=4096)
+
+    quarantined = pd.read_csv(summary['quarantine_path'], encoding='utf-8-sig')
+    assert quarantined[SOURCE_ROW_COLUMN].tolist() == BAD_ROWS
+
+
+def test_validate_frame_row_offset():
+    chunk = pd.read_csv('data/raw/diabetes.csv').iloc[200:300]
+    chunk.loc[chunk.index[49], 'Age'] = 999
+    report = validate_frame(chunk, row_offset=200)
+    _, quarantined = split_valid_rows(chunk, report)
+
+    assert report.errors['行号'].tolist() == [250]
+    assert quarantined[SOURCE_ROW_COLUMN].tolist() == [250]
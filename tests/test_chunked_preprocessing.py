@@ -0,0 +1,15 @@
+"""分块预处理：单进程与多进程写出的训练/测试集逐字节一致"""
+
+from src.chunked_preprocessing import OUTPUT_FILES, run_pipeline
+
+
+def test_parallel_output_is_byte_identical_to_serial(tmp_path):
+    serial_dir, parallel_dir = tmp_path / 'serial', tmp_path / 'parallel'
+    # 小块保证部分块中某些填充列没有 0 值
+    run_pipeline('data/raw/diabetes.csv', str(serial_dir), chunk_size=50)
+    run_pipeline('data/raw/diabetes.csv', str(parallel_dir), chunk_size=50, workers=2)
+
+    for name in ('train', 'test'):
+        serial = (serial_dir / OUTPUT_FILES[name]).read_bytes()
+        parallel = (parallel_dir / OUTPUT_FILES[name]).read_bytes()
+        assert serial == parallel, name
@@ -0,0 +1,62 @@
+"""增量训练：标准化参数在首个批次后冻结，导出的模型与参数可复现训练器的预测"""
+
+import json
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from src.chunked_preprocessing import categorize_raw
+from src.incremental_training import IncrementalTrainer
+from src.model_predictor import NUMERICAL_FEATURES, preprocess_batch
+from src.portable_model import PortableModel
+
+
+def test_exported_portable_model_matches_trainer(tmp_path):
+    df = pd.read_csv('data/raw/diabetes.csv')
+    trainer = IncrementalTrainer(epochs=1)
+    trainer.update(df)
+
+    _, portable_path = trainer.export_model(str(tmp_path / 'model.pkl'))
+    portable = PortableModel.load(portable_path)
+
+    # 服务端直接对输入做 Z-score，这里传入训练器已填充、截断后的值
+    features = trainer.transform(df)
+    prepared = trainer._clip(trainer._fill(df[NUMERICAL_FEATURES], categorize_raw(df)['Age_category']))
+    np.testing.assert_allclose(portable.features(prepared), features.to_numpy())
+    np.testing.assert_allclose(portable.predict_proba(prepared), trainer.model.predict_proba(features)[:, 1])
+
+
+def test_scaler_is_frozen_after_first_batch():
+    df = pd.read_csv('data/raw/diabetes.csv')
+    trainer = IncrementalTrainer(epochs=1)
+    trainer.update(df.iloc[:300])
+    means, stds = trainer.standardization_params()
+    trainer.update(df.iloc[300:600])
+    assert trainer.standardization_params() == (means, stds)
+
+
+def test_exported_model_and_params_reproduce_predictions(tmp_path):
+    df = pd.read_csv('data/raw/diabetes.csv')
+    trainer = IncrementalTrainer(epochs=2)
+    trainer.update(df.iloc[:300])
+    trainer.update(df.iloc[300:600])
+    holdout = df.iloc[600:]
+
+    model_path = tmp_path / 'model.pkl'
+    params_path, _ = trainer.export_model(str(model_path))
+    model = joblib.load(model_path)
+    with open(params_path, encoding='utf-8') as f:
+        params = json.load(f)
+
+    # 只用导出的参数重做预处理：填充 -> 截断 -> 与服务端相同的标准化和分箱
+    data = holdout[NUMERICAL_FEATURES].astype(float)
+    age_category = categorize_raw(holdout)['Age_category']
+    for col, medians in params['fill_values'].items():
+        zero = data[col] == 0
+        data.loc[zero, col] = age_category[zero].map(medians)
+    for col, (lower, upper) in params['clip_bounds'].items():
+        data[col] = data[col].clip(lower=lower, upper=upper)
+    features = preprocess_batch(data, params['means'], params['stds'])
+
+    np.testing.assert_allclose(model.predict_proba(features)[:, 1], trainer.predict_proba(holdout))
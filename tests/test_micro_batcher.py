@@ -0,0 +1,29 @@
+"""微批合并器：同批次中一行出错不应影响其他调用方"""
+
+import pandas as pd
+import pytest
+
+from src.micro_batcher import PredictionMicroBatcher
+
+
+def _score(df):
+    """Glucose 不是数值时整批抛出异常，模拟某个调用方的非法输入"""
+    glucose = df['Glucose'].astype(float)
+    return pd.DataFrame({'raw_probability': glucose / 200, 'risk_score': glucose / 2, 'prediction': 0})
+
+
+def test_bad_row_only_fails_its_own_future():
+    batcher = PredictionMicroBatcher(score_fn=_score, max_batch_size=8, max_wait_ms=500)
+    try:
+        good = batcher.submit({'Glucose': 120})
+        bad = batcher.submit({'Glucose': 'abc'})
+        other = batcher.submit({'Glucose': 80})
+
+        assert good.result(timeout=5)['risk_score'] == 60
+        assert other.result(timeout=5)['risk_score'] == 40
+        with pytest.raises(ValueError):
+            bad.result(timeout=5)
+        # 三个请求确实被合并进了同一个批次
+        assert batcher.stats()['batches'] == 1
+    finally:
+        batcher.close(timeout=5)
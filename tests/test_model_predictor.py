@@ -0,0 +1,23 @@
+"""模型版本号：替换模型文件后版本号和已加载的模型随之更新"""
+
+import os
+import shutil
+
+from src import model_predictor
+
+
+def test_replacing_model_file_changes_version(tmp_path, monkeypatch):
+    path = tmp_path / 'model.pkl'
+    shutil.copy(model_predictor.MODEL_PATH, path)
+    monkeypatch.setattr(model_predictor, 'MODEL_PATH', str(path))
+
+    version = model_predictor.get_model_version()
+    model, _ = model_predictor.load_model()
+    assert model_predictor.get_model_version() == version
+
+    with open(path, 'ab') as f:
+        f.write(b'\0')      # joblib 忽略文件末尾多余的字节
+    os.utime(path, ns=(0, 0))
+
+    assert model_predictor.get_model_version() != version
+    assert model_predictor.load_model()[0] is not model
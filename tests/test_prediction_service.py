@@ -0,0 +1,68 @@
+"""预测服务：null / NaN / Infinity 特征值返回 400 并指明字段，而不是 NaN 概率"""
+
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from src import audit_log
+from src.model_predictor import NUMERICAL_FEATURES
+from src.portable_model import export_portable_model
+from src.prediction_service import create_server, warm_up, warm_up_portable
+
+PATIENT = {
+    'Pregnancies': 2, 'Glucose': 120, 'BloodPressure': 70, 'SkinThickness': 20,
+    'Insulin': 80, 'BMI': 30.0, 'DiabetesPedigreeFunction': 0.5, 'Age': 35,
+}
+
+
+@pytest.fixture(params=['sklearn', 'portable'])
+def service_url(request, tmp_path, monkeypatch):
+    monkeypatch.setattr(audit_log, 'ENABLED', False)
+    monkeypatch.setattr(audit_log, '_audit_logger', None)
+    portable = None
+    if request.param == 'portable':
+        path = str(tmp_path / 'model.portable.json')
+        export_portable_model(path)
+        portable = warm_up_portable(path)
+    else:
+        warm_up()
+
+    server = create_server('127.0.0.1', 0, portable=portable)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/predict"
+    server.shutdown()
+    server.server_close()
+
+
+def _post(url, body: str):
+    request = urllib.request.Request(url, data=body.encode('utf-8'), method='POST')
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_valid_request_is_scored(service_url):
+    status, body = _post(service_url, json.dumps(PATIENT))
+    assert status == 200
+    assert 0 <= body['risk_score'] <= 100
+
+
+@pytest.mark.parametrize('value', ['null', 'NaN', 'Infinity', '-Infinity'])
+def test_non_finite_value_is_rejected(service_url, value):
+    body = json.dumps(PATIENT).replace('"Glucose": 120', '"Glucose": ' + value)
+    status, response = _post(service_url, body)
+    assert status == 400
+    assert 'Glucose' in response['error']
+
+
+def test_non_finite_value_in_batch_names_the_row(service_url):
+    batch = [PATIENT, dict(PATIENT, BMI=float('nan'))]
+    status, response = _post(service_url, json.dumps(batch))
+    assert status == 400
+    assert 'BMI（第 2 行）' in response['error']
+    assert all(col not in response['error'] for col in NUMERICAL_FEATURES if col != 'BMI')